@@ -1,45 +1,18 @@
 import os
+import time
 import logging
 from flask import Flask
-from sqlalchemy import text
 from app.config import Config
 from app.extensions import db, migrate
+from app.startup import WarmUpState, start_warm_up, current_rss_mb, loaded_heavy_modules
 from flask_cors import CORS
 
-# CRUD & raw-data blueprints
-from app.route.route_raw import main_bp
-from app.route.route_crud_bangunan import bangunan_bp
-from app.route.route_crud_hsbgn import hsbgn_bp
-
-# Visualization (direct-loss) blueprint
-from app.route.route_visualisasi_directloss import setup_visualisasi_routes
-from app.route.route_directloss import setup_join_routes
-from app.route.route_visualisasi_hazard import register_visualisasi_routes_hazard
-
-# (Optional) preload curves
-from app.repository.repo_kurva_gempa import get_reference_curves_gempa as load_gempa
-from app.repository.repo_kurva_gunungberapi import get_reference_curves_gunungberapi as load_gunung
-from app.repository.repo_kurva_longsor import get_reference_curves_longsor as load_longsor
-from app.repository.repo_kurva_banjir import get_reference_curves_banjir as load_banjir
-
-# visualisasi kurva
-from app.route.route_visualisasi_kurva import disaster_curve_bp
-
-# coba gempa hazard
-from app.route.route_buffer_hazard import bp as buffer_disaster_bp
-#from app.route.route_visualisasi_hazard import bencana_bp  # Hapus import ini agar tidak didaftarkan 2x
-
 # Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Globals for curves
-REFERENCE_CURVES_GEMPA = {}
-REFERENCE_CURVES_GUNUNGBERAPI = {}
-REFERENCE_CURVES_LONGSOR = {}
-REFERENCE_CURVES_BANJIR = {}
-
-def create_app():
+def create_app(warm_up=None):
+    t0 = time.perf_counter()
     app = Flask(__name__)
     app.config.from_object(Config)
 
@@ -55,13 +28,25 @@ def create_app():
     db.init_app(app)
     migrate.init_app(app, db)
 
+    # Route module hanya berisi daftar URL; controller & dependency berat
+    # (geopandas, rasterio, scipy, ...) di-import saat request pertama via LazyView.
+    from app.route.route_raw import main_bp
+    from app.route.route_crud_bangunan import bangunan_bp
+    from app.route.route_crud_hsbgn import hsbgn_bp
+    from app.route.route_visualisasi_directloss import setup_visualisasi_routes
+    from app.route.route_directloss import setup_join_routes
+    from app.route.route_visualisasi_hazard import register_visualisasi_routes_hazard
+    from app.route.route_visualisasi_kurva import disaster_curve_bp
+    from app.route.route_buffer_hazard import bp as buffer_disaster_bp
+    from app.route.route_tile_hazard import tile_bp
+    from app.cli import register_cli
+
     # register CRUD & raw-data blueprints
     app.register_blueprint(main_bp)
     app.register_blueprint(bangunan_bp)
     app.register_blueprint(hsbgn_bp)
     app.register_blueprint(disaster_curve_bp)
-    # Hapus pendaftaran langsung bencana_bp karena sudah didaftarkan via register_visualisasi_routes_hazard
-    # app.register_blueprint(bencana_bp)
+    app.register_blueprint(tile_bp)
 
     # test
     app.register_blueprint(buffer_disaster_bp)
@@ -76,49 +61,23 @@ def create_app():
     # Daftarkan blueprint bencana_bp lewat fungsi khusus agar tidak dobel
     register_visualisasi_routes_hazard(app)
 
-    # preload curves & check DB connection
-    with app.app_context():
-        _load_reference_curves()
-        if app.debug:
-            _check_db_connection()
+    # flask seed-tiles
+    register_cli(app)
+
+    # warm-up (cek DB & preload kurva) di background, status di /api/ready
+    state = WarmUpState()
+    app.extensions['warm_up'] = state
+    state.startup_ms = round((time.perf_counter() - t0) * 1000, 1)
+    logger.info(
+        f"✅ App siap menerima request dalam {state.startup_ms} ms "
+        f"(RSS {current_rss_mb()} MB, modul berat: {loaded_heavy_modules() or '-'})"
+    )
+
+    if warm_up is None:
+        warm_up = app.config.get('WARM_UP_ON_START', True)
+    if warm_up:
+        start_warm_up(app, background=app.config.get('WARM_UP_IN_BACKGROUND', True))
+    else:
+        state.ready = True
 
     return app
-
-def _check_db_connection():
-    try:
-        db.session.execute(text("SELECT 1"))
-        logger.info("✅ Database connected successfully")
-    except Exception as e:
-        logger.error(f"❌ Database connection failed: {e}")
-
-def _load_reference_curves():
-    global REFERENCE_CURVES_GEMPA, REFERENCE_CURVES_GUNUNGBERAPI
-    global REFERENCE_CURVES_LONGSOR, REFERENCE_CURVES_BANJIR
-
-    try:
-        REFERENCE_CURVES_GEMPA = load_gempa()
-        logger.info("✅ Gempa curves loaded")
-    except Exception as e:
-        logger.error(f"❌ Failed to load gempa curves: {e}")
-        REFERENCE_CURVES_GEMPA = {}
-
-    try:
-        REFERENCE_CURVES_GUNUNGBERAPI = load_gunung()
-        logger.info("✅ Gunung Berapi curves loaded")
-    except Exception as e:
-        logger.error(f"❌ Failed to load gunung berapi curves: {e}")
-        REFERENCE_CURVES_GUNUNGBERAPI = {}
-
-    try:
-        REFERENCE_CURVES_LONGSOR = load_longsor()
-        logger.info("✅ Longsor curves loaded")
-    except Exception as e:
-        logger.error(f"❌ Failed to load longsor curves: {e}")
-        REFERENCE_CURVES_LONGSOR = {}
-
-    try:
-        REFERENCE_CURVES_BANJIR = load_banjir()
-        logger.info("✅ Banjir curves loaded")
-    except Exception as e:
-        logger.error(f"❌ Failed to load banjir curves: {e}")
-        REFERENCE_CURVES_BANJIR = {}
@@ -0,0 +1,175 @@
+# app/cache.py
+
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """
+    Cache bytes thread-safe dengan batas total ukuran (LRU).
+
+    Tier memori dibatasi `max_bytes`; jika `disk_dir` diisi, setiap entry juga
+    ditulis ke disk sehingga miss di memori (setelah eviction / restart proses)
+    masih bisa dilayani tanpa render ulang. Key berupa string "a/b/c"; prefix
+    dipakai untuk invalidasi per kelompok (mis. satu raster).
+    """
+
+    def __init__(self, max_bytes, disk_dir=None):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self._data = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    # ---------- public API ----------
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+
+        value = self._read_disk(key)
+        if value is not None:
+            self.disk_hits += 1
+            self._put_memory(key, value)
+            return value
+
+        self.misses += 1
+        return None
+
+    def set(self, key, value):
+        self._put_memory(key, value)
+        self._write_disk(key, value)
+
+    def invalidate_prefix(self, prefix):
+        with self._lock:
+            keys = [k for k in self._data if k.startswith(prefix)]
+            for k in keys:
+                self._size -= len(self._data.pop(k))
+        if self.disk_dir:
+            folder = os.path.join(self.disk_dir, self._disk_prefix(prefix))
+            if os.path.isdir(folder):
+                import shutil
+                shutil.rmtree(folder, ignore_errors=True)
+        if keys:
+            logger.info(f"♻️ {len(keys)} entry cache '{prefix}' diinvalidasi")
+        return len(keys)
+
+    def move_prefix(self, old_prefix, new_prefix, stale):
+        """
+        Pindahkan entry `old_prefix` ke `new_prefix` (memori & disk), kecuali yang
+        stale(key) → dibuang. Dipakai saat revisi berganti tapi sebagian besar entry
+        masih valid. Return (jumlah dipindah, jumlah dibuang).
+        """
+        moved, dropped = set(), set()
+        with self._lock:
+            keys = [k for k in self._data if k.startswith(old_prefix)]
+            for k in keys:
+                value = self._data.pop(k)
+                if stale(k):
+                    self._size -= len(value)
+                    dropped.add(k)
+                else:
+                    self._data[new_prefix + k[len(old_prefix):]] = value
+                    moved.add(k)
+        if self.disk_dir:
+            folder = os.path.join(self.disk_dir, self._disk_prefix(old_prefix))
+            for root, _, files in os.walk(folder):
+                for name in files:
+                    if name.endswith(".tmp"):
+                        continue
+                    path = os.path.join(root, name)
+                    key = os.path.relpath(path, self.disk_dir).replace(os.sep, "/")
+                    try:
+                        if stale(key):
+                            os.remove(path)
+                            dropped.add(key)
+                        else:
+                            target = self._disk_path(new_prefix + key[len(old_prefix):])
+                            os.makedirs(os.path.dirname(target), exist_ok=True)
+                            os.replace(path, target)
+                            moved.add(key)
+                    except OSError:
+                        pass
+            import shutil
+            shutil.rmtree(folder, ignore_errors=True)
+        if moved or dropped:
+            logger.info(f"♻️ Cache '{old_prefix}' → '{new_prefix}': {len(moved)} dipindah, {len(dropped)} dibuang")
+        return len(moved), len(dropped)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "disk_dir": self.disk_dir,
+            }
+
+    # ---------- internal ----------
+
+    def _put_memory(self, key, value):
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._data[key] = value
+            self._size += size
+            while self._size > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._size -= len(evicted)
+
+    @staticmethod
+    def _disk_prefix(prefix):
+        return prefix.strip("/").replace("..", "_")
+
+    def _disk_path(self, key):
+        head, _, tail = key.rpartition("/")
+        name = hashlib.sha1(tail.encode()).hexdigest() if len(tail) > 100 else tail
+        return os.path.join(self.disk_dir, self._disk_prefix(head), name)
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, key, value):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(value)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"⚠️ Gagal menulis cache disk {path}: {e}")
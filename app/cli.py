@@ -0,0 +1,48 @@
+# app/cli.py
+
+import click
+from flask.cli import with_appcontext
+
+
+@click.command('seed-tiles')
+@click.option('--bencana', default=None, help='Hanya bencana ini (default: semua).')
+@click.option('--kolom', default=None, help='Hanya kolom ini (default: semua kolom bencana).')
+@click.option('--zoom', default='4-8', show_default=True, help='Rentang zoom, mis. "4-8" atau "6".')
+@with_appcontext
+def seed_tiles_command(bencana, kolom, zoom):
+    """Pre-render tile hazard ke cache (memori + disk bila TILE_CACHE_DIR diisi)."""
+    from app.controller.controller_visualisasi_hazard import BENCANA_KOLOM
+    from app.service.service_tile_hazard import seed_tiles
+
+    lo, _, hi = zoom.partition('-')
+    zooms = range(int(lo), int(hi or lo) + 1)
+
+    targets = {bencana: BENCANA_KOLOM[bencana]} if bencana else BENCANA_KOLOM
+    total = 0
+    for b, koloms in targets.items():
+        for k in koloms:
+            if kolom and k != kolom:
+                continue
+            n = seed_tiles(b, k, zooms)
+            click.echo(f"{b}/{k}: {n} tile")
+            total += n
+    click.echo(f"Total {total} tile di-seed.")
+
+
+@click.command('refresh-buffers')
+@click.option('--dtype', default=None, help='Hanya jenis hazard ini (default: semua).')
+@click.option('--force', is_flag=True, help='Hitung ulang walau model_intensitas_* tidak berubah.')
+@with_appcontext
+def refresh_buffers_command(dtype, force):
+    """Materialisasi buffer hazard (semua level toleransi) ke tabel hazard_buffer_*."""
+    from app.service.service_buffer_materialize import refresh_buffers, refresh_all_buffers
+
+    reports = [refresh_buffers(dtype, force=force)] if dtype else refresh_all_buffers(force=force)
+    for rep in reports:
+        extra = rep.get('message') or f"{rep.get('rows', 0)} baris"
+        click.echo(f"{rep['dtype']}: {rep['status']} ({extra}, {rep['ms']} ms)")
+
+
+def register_cli(app):
+    app.cli.add_command(seed_tiles_command)
+    app.cli.add_command(refresh_buffers_command)
@@ -30,5 +30,119 @@ class Config:
     if not os.path.exists(UPLOAD_FOLDER):
         os.makedirs(UPLOAD_FOLDER)
 
+    # Interval (detik) cek perubahan tabel referensi kurva oleh registry kurva
+    CURVE_REGISTRY_CHECK_INTERVAL = int(os.getenv('CURVE_REGISTRY_CHECK_INTERVAL', '30'))
+
+    # Cache-Control max-age (detik) untuk /api/disaster-curves (ETag tetap divalidasi)
+    CURVE_CACHE_MAX_AGE = int(os.getenv('CURVE_CACHE_MAX_AGE', '60'))
+
+    # Warm-up (cek DB & preload kurva) saat start; jalan di thread background
+    WARM_UP_ON_START = os.getenv('WARM_UP_ON_START', 'True').lower() in ['true', '1', 't']
+    WARM_UP_IN_BACKGROUND = os.getenv('WARM_UP_IN_BACKGROUND', 'True').lower() in ['true', '1', 't']
+
+    # Jumlah proses worker untuk /process_kurva_all (0 = min(4, jumlah CPU); 1 = tanpa pool)
+    CURVE_PROCESS_WORKERS = int(os.getenv('CURVE_PROCESS_WORKERS', '0'))
+
+    # Folder tujuan CSV output_kurva_*.csv saat export_csv=1 (default: working directory)
+    CURVE_EXPORT_FOLDER = os.getenv('CURVE_EXPORT_FOLDER')
+
+    # IDW raster: anggaran memori per blok baris (MB) & thread cKDTree.query (-1 = semua core)
+    IDW_MEMORY_BUDGET_MB = int(os.getenv('IDW_MEMORY_BUDGET_MB', '256'))
+    IDW_WORKERS = int(os.getenv('IDW_WORKERS', '-1'))
+
+    # Cache union provinsi + mask daratan (.npy); interval cek perubahan tabel provinsi (detik)
+    CLIP_CACHE_FOLDER = os.getenv('CLIP_CACHE_FOLDER')
+    CLIP_CACHE_CHECK_INTERVAL = int(os.getenv('CLIP_CACHE_CHECK_INTERVAL', '30'))
+
+    # GeoTIFF hasil (COG): kompresi DEFLATE/ZSTD & ukuran tile internal
+    RASTER_COMPRESS = os.getenv('RASTER_COMPRESS', 'DEFLATE')
+    RASTER_BLOCKSIZE = int(os.getenv('RASTER_BLOCKSIZE', '512'))
+
+    # Tile hazard /api/tiles/hazard/...: batas cache memori (MB), folder cache disk (opsional),
+    # dan Cache-Control max-age (detik)
+    TILE_CACHE_MAX_MB = int(os.getenv('TILE_CACHE_MAX_MB', '64'))
+    TILE_CACHE_DIR = os.getenv('TILE_CACHE_DIR')
+    TILE_CACHE_MAX_AGE = int(os.getenv('TILE_CACHE_MAX_AGE', '300'))
+
+    # Raster batch (/generate-all-raster): maks proses worker (0 = jumlah CPU; tetap dibatasi memori)
+    RASTER_BATCH_WORKERS = int(os.getenv('RASTER_BATCH_WORKERS', '0'))
+
+    # hazard_raster_tile: ukuran tile (piksel) & jumlah tile per batch INSERT
+    POSTGIS_TILE_SIZE = int(os.getenv('POSTGIS_TILE_SIZE', '256'))
+    POSTGIS_TILE_BATCH = int(os.getenv('POSTGIS_TILE_BATCH', '100'))
+    # Versi nonaktif hazard_raster per bencana/kolom yang disimpan (sisanya dihapus saat simpan)
+    HAZARD_RASTER_KEEP_VERSIONS = int(os.getenv('HAZARD_RASTER_KEEP_VERSIONS', '2'))
+
+    # Maks titik per request batch /api/hazard/<bencana>/sample
+    SAMPLE_MAX_POINTS = int(os.getenv('SAMPLE_MAX_POINTS', '10000'))
+
+    # Resolusi raster hazard (derajat): 'auto' = dari jarak median titik / oversample,
+    # dibatasi min/max; override per bencana lewat RASTER_PIXEL_SIZES="gempa:0.05,banjir:0.01"
+    RASTER_PIXEL_SIZE = os.getenv('RASTER_PIXEL_SIZE', 'auto')
+    RASTER_PIXEL_SIZES = {
+        k.strip(): float(v)
+        for k, _, v in (item.partition(':') for item in os.getenv('RASTER_PIXEL_SIZES', '').split(','))
+        if k.strip() and v.strip()
+    }
+    RASTER_PIXEL_OVERSAMPLE = float(os.getenv('RASTER_PIXEL_OVERSAMPLE', '2'))
+    RASTER_MIN_PIXEL_SIZE = float(os.getenv('RASTER_MIN_PIXEL_SIZE', '0.01'))
+    RASTER_MAX_PIXEL_SIZE = float(os.getenv('RASTER_MAX_PIXEL_SIZE', '0.1'))
+
+    # Kuantisasi raster hazard: uint16 + scale/offset GeoTIFF (±separuh ukuran float32);
+    # scale per bencana bisa dioverride lewat RASTER_QUANT_SCALES="gempa:0.001,gunungberapi:0.01"
+    RASTER_QUANTIZE = os.getenv('RASTER_QUANTIZE', 'False').lower() in ['true', '1', 't']
+    RASTER_QUANT_SCALES = {
+        k.strip(): float(v)
+        for k, _, v in (item.partition(':') for item in os.getenv('RASTER_QUANT_SCALES', '').split(','))
+        if k.strip() and v.strip()
+    }
+
+    # Refresh raster inkremental: hanya tile di sekitar titik yang berubah dihitung ulang;
+    # full rebuild bila porsi tile darat terdampak > RASTER_INCREMENTAL_MAX_FRACTION
+    RASTER_INCREMENTAL = os.getenv('RASTER_INCREMENTAL', 'True').lower() in ['true', '1', 't']
+    RASTER_INCREMENTAL_MAX_FRACTION = float(os.getenv('RASTER_INCREMENTAL_MAX_FRACTION', '0.5'))
+
+    # Statistik raster (dicatat saat generate) untuk natural breaks & legenda:
+    # jumlah bin histogram, ukuran & seed reservoir sample, sumber breaks (histogram|sample)
+    RASTER_STATS_BINS = int(os.getenv('RASTER_STATS_BINS', '1024'))
+    RASTER_STATS_SAMPLE_SIZE = int(os.getenv('RASTER_STATS_SAMPLE_SIZE', '10000'))
+    RASTER_STATS_SEED = int(os.getenv('RASTER_STATS_SEED', '42'))
+    RASTER_BREAKS_METHOD = os.getenv('RASTER_BREAKS_METHOD', 'histogram')
+
+    # GeoServer REST: koneksi, request paralel maks, retry/backoff, file state publish terakhir
+    GEOSERVER_URL = os.getenv('GEOSERVER_URL', 'http://localhost:8081/geoserver')
+    GEOSERVER_USER = os.getenv('GEOSERVER_USER', 'admin')
+    GEOSERVER_PASS = os.getenv('GEOSERVER_PASS', 'geoserver')
+    GEOSERVER_WORKSPACE = os.getenv('GEOSERVER_WORKSPACE', 'ne')
+    GEOSERVER_PUBLISH_WORKERS = int(os.getenv('GEOSERVER_PUBLISH_WORKERS', '4'))
+    GEOSERVER_RETRIES = int(os.getenv('GEOSERVER_RETRIES', '3'))
+    GEOSERVER_BACKOFF = float(os.getenv('GEOSERVER_BACKOFF', '0.5'))
+    GEOSERVER_STATE_FILE = os.getenv('GEOSERVER_STATE_FILE')
+
+    # Buffer hazard termaterialisasi (/api/buffer): level toleransi simplify (derajat),
+    # interval cek perubahan model_intensitas_* (detik), refresh otomatis di background
+    BUFFER_TOLERANCES = [
+        float(v) for v in os.getenv('BUFFER_TOLERANCES', '0.0001,0.0005,0.001,0.0025,0.005,0.01').split(',')
+        if v.strip()
+    ]
+    BUFFER_CHECK_INTERVAL = int(os.getenv('BUFFER_CHECK_INTERVAL', '30'))
+    BUFFER_AUTO_REFRESH = os.getenv('BUFFER_AUTO_REFRESH', 'True').lower() in ['true', '1', 't']
+
+    # Vector tile buffer (/api/buffer/<dtype>/z/x/y.mvt): toleransi simplify dalam piksel tile,
+    # batas fitur per zoom ("zoom_min:limit,..."; berlaku sampai zoom_min berikutnya)
+    BUFFER_MVT_TOLERANCE_PX = float(os.getenv('BUFFER_MVT_TOLERANCE_PX', '0.5'))
+    BUFFER_MVT_FEATURE_LIMITS = {
+        int(k): int(v)
+        for k, _, v in (item.partition(':') for item in
+                        os.getenv('BUFFER_MVT_FEATURE_LIMITS', '0:2000,6:5000,9:10000,12:20000').split(','))
+        if k.strip() and v.strip()
+    }
+
+    # Cache respons /api/buffer (bbox di-snap ke grid sel): batas memori (MB), folder disk
+    # (opsional), ukuran sel = toleransi level × BUFFER_CACHE_TILE_FACTOR (derajat)
+    BUFFER_CACHE_MAX_MB = int(os.getenv('BUFFER_CACHE_MAX_MB', '32'))
+    BUFFER_CACHE_DIR = os.getenv('BUFFER_CACHE_DIR')
+    BUFFER_CACHE_TILE_FACTOR = float(os.getenv('BUFFER_CACHE_TILE_FACTOR', '500'))
+
     # Opsi untuk debug mode
     DEBUG = os.getenv('DEBUG', 'False').lower() in ['true', '1', 't']
@@ -1,4 +1,4 @@
-from app.service.service_buffer_hazard import BufferDisasterService
+from app.service.service_buffer_hazard import BufferDisasterService, MVT_MAX_ZOOM
 
 
 class BufferDisasterController:
@@ -9,7 +9,8 @@ class BufferDisasterController:
                    tol: float) -> dict:
         """
         Delegates to the BufferDisasterService to compute buffer
-        and returns a GeoJSON-like feature collection.
+        and returns the GeoJSON feature collection as an iterator
+        of bytes chunks (for a streamed response).
         """
         return BufferDisasterService.get_feature_collection(
             dtype=dtype,
@@ -18,6 +19,31 @@ class BufferDisasterController:
             tol=tol
         )
 
+    @staticmethod
+    def get_buffer_tile(dtype: str,
+                        field: str,
+                        z: int,
+                        x: int,
+                        y: int):
+        """
+        Validates the tile request, then delegates to the
+        BufferDisasterService to build one Mapbox Vector Tile.
+        Returns (tile bytes, error message, HTTP status).
+        """
+        if not BufferDisasterService.is_valid_field(dtype, field):
+            return None, f"Field '{field}' tidak valid untuk '{dtype}'", 400
+        if not (0 <= z <= MVT_MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            return None, "Koordinat tile tidak valid", 400
+
+        tile, error = BufferDisasterService.get_mvt_tile(
+            dtype=dtype,
+            field=field,
+            z=z,
+            x=x,
+            y=y
+        )
+        return tile, error, 500 if error else 200
+
     @staticmethod
     def get_nearest(dtype: str,
                     field: str,
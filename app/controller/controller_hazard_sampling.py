@@ -0,0 +1,53 @@
+# app/controller/controller_hazard_sampling.py
+
+from flask import current_app, jsonify, request
+from app.service.service_hazard_sampling import is_valid_layer, sample_points
+
+DEFAULT_MAX_POINTS = 10000
+
+
+def sample_hazard_point(bencana, kolom):
+    """GET ?lon=..&lat=.. → nilai intensitas raster di satu titik."""
+    if not is_valid_layer(bencana, kolom):
+        return jsonify({'status': 'error', 'message': 'Jenis bencana atau kolom tidak valid'}), 400
+    try:
+        lon = float(request.args['lon'])
+        lat = float(request.args['lat'])
+    except (KeyError, ValueError):
+        return jsonify({'status': 'error', 'message': 'Parameter lon & lat wajib berupa angka'}), 400
+
+    values, missing = sample_points(bencana, [kolom], [lon], [lat])
+    if missing:
+        return jsonify({'status': 'error', 'message': 'Raster belum digenerate'}), 404
+    return jsonify({'bencana': bencana, 'kolom': kolom, 'lon': lon, 'lat': lat, 'value': values[kolom][0]})
+
+
+def sample_hazard_batch(bencana):
+    """
+    POST {"kolom": ["mmi_500", ...], "points": [[lon, lat], ...]}
+    → {"values": {kolom: [nilai|null, ...]}} dengan urutan sama seperti points.
+    """
+    body = request.get_json(silent=True) or {}
+    koloms = body.get('kolom') or []
+    if isinstance(koloms, str):
+        koloms = [koloms]
+    points = body.get('points') or []
+
+    if not koloms or any(not is_valid_layer(bencana, k) for k in koloms):
+        return jsonify({'status': 'error', 'message': 'Jenis bencana atau kolom tidak valid'}), 400
+    max_points = current_app.config.get('SAMPLE_MAX_POINTS', DEFAULT_MAX_POINTS)
+    if not points or len(points) > max_points:
+        return jsonify({'status': 'error', 'message': f'points wajib diisi (maks {max_points})'}), 400
+    try:
+        lons = [float(p[0]) for p in points]
+        lats = [float(p[1]) for p in points]
+    except (TypeError, ValueError, IndexError):
+        return jsonify({'status': 'error', 'message': 'Format points harus [[lon, lat], ...]'}), 400
+
+    values, missing = sample_points(bencana, koloms, lons, lats)
+    return jsonify({
+        'bencana': bencana,
+        'count': len(points),
+        'values': values,
+        'missing': missing,
+    })
@@ -1,4 +1,4 @@
-from flask import jsonify
+from flask import jsonify, request
 import pandas as pd
 
 from app.service.service_kurva_gempa import process_data as process_gempa
@@ -122,6 +122,29 @@ def process_kurva_gunungberapi():
     except Exception as e:
         return jsonify({"error": f"Processing error: {str(e)}"}), 500
 
+# ======================== SEMUA BENCANA ========================
+def process_kurva_all():
+    """Proses keempat bencana paralel; ?bencana=gempa,banjir untuk subset, ?export_csv=1 untuk CSV."""
+    from app.service.service_kurva_all import HAZARD_JOBS, process_all_hazards
+
+    requested = request.args.get('bencana')
+    bencana_list = [b.strip() for b in requested.split(',') if b.strip()] if requested else None
+    unknown = [b for b in bencana_list or [] if b not in HAZARD_JOBS]
+    if unknown:
+        return jsonify({"error": f"Unknown disaster type: {', '.join(unknown)}"}), 400
+    export_csv = request.args.get('export_csv', 'false').lower() in ['true', '1', 't']
+
+    try:
+        reports = process_all_hazards(bencana_list, export_csv=export_csv)
+    except Exception as e:
+        return jsonify({"error": f"Processing error: {str(e)}"}), 500
+
+    failed = [r for r in reports if r["status"] == "error"]
+    return jsonify({
+        "status": "success" if not failed else "partial",
+        "results": reports,
+    }), (200 if not failed else 207)
+
 # ======================== FUNGSI SIMPAN DATABASE ========================
 def save_to_database(output_data, model_class, clear_old_data=True):
     try:
@@ -0,0 +1,41 @@
+# app/controller/controller_tile_hazard.py
+
+from flask import Response, current_app, jsonify, request
+from app.controller.controller_visualisasi_hazard import BENCANA_KOLOM
+from app.service.service_tile_hazard import get_hazard_tile, get_hazard_legend, get_tile_cache, MAX_ZOOM
+
+
+def get_hazard_tile_controller(bencana, kolom, z, x, y):
+    if kolom not in BENCANA_KOLOM.get(bencana, []):
+        return jsonify({'status': 'error', 'message': 'Jenis bencana atau kolom tidak valid'}), 400
+    if not (0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return jsonify({'status': 'error', 'message': 'Koordinat tile tidak valid'}), 400
+
+    png, revision = get_hazard_tile(bencana, kolom, z, x, y)
+    if png is None:
+        return jsonify({'status': 'error', 'message': 'Raster belum digenerate'}), 404
+
+    resp = Response(png, mimetype='image/png')
+    resp.set_etag(f"{revision}-{z}-{x}-{y}")
+    max_age = current_app.config.get('TILE_CACHE_MAX_AGE', 300)
+    resp.headers['Cache-Control'] = f"public, max-age={max_age}"
+    return resp.make_conditional(request)
+
+
+def get_hazard_legend_controller(bencana, kolom):
+    if kolom not in BENCANA_KOLOM.get(bencana, []):
+        return jsonify({'status': 'error', 'message': 'Jenis bencana atau kolom tidak valid'}), 400
+
+    legend, revision = get_hazard_legend(bencana, kolom)
+    if legend is None:
+        return jsonify({'status': 'error', 'message': 'Raster belum digenerate'}), 404
+
+    resp = jsonify({'status': 'success', **legend})
+    resp.set_etag(f"legend-{revision}")
+    max_age = current_app.config.get('TILE_CACHE_MAX_AGE', 300)
+    resp.headers['Cache-Control'] = f"public, max-age={max_age}"
+    return resp.make_conditional(request)
+
+
+def tile_cache_stats():
+    return jsonify(get_tile_cache().stats())
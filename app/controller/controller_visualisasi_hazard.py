@@ -1,66 +1,111 @@
-from flask import Blueprint, jsonify
-from app.service.service_visualisasi_hazard import RasterService
+from flask import jsonify, request
+from app.service.service_visualisasi_hazard import RasterService, DamageRatioRasterService
 from app.geoserver_register import upload_all_geotiffs
-bencana_bp = Blueprint('bencana_bp', __name__)
 
-@bencana_bp.route('/generate-raster/<bencana>/<kolom>', methods=['GET'])
+# Route didaftarkan di app/route/route_visualisasi_hazard.py (lazy)
+
+BENCANA_KOLOM = {
+    'gempa': ['mmi_100', 'mmi_250', 'mmi_500'],
+    'banjir': ['depth_100', 'depth_50', 'depth_25'],
+    'longsor': ['mflux_5', 'mflux_2'],
+    'gunungberapi': ['kpa_50', 'kpa_100', 'kpa_250']
+}
+
 def generate_raster(bencana, kolom):
     allowed_bencana = ['gempa', 'banjir', 'longsor', 'gunungberapi']
     if bencana not in allowed_bencana:
         return jsonify({'status': 'error', 'message': 'Jenis bencana tidak valid'}), 400
+    if kolom not in BENCANA_KOLOM[bencana]:
+        return jsonify({'status': 'error', 'message': 'Jenis bencana atau kolom tidak valid'}), 400
 
-    raster_path, error = RasterService.generate_raster_from_points(bencana, kolom)
+    force = request.args.get('force', 'false').lower() in ['true', '1', 't']
+    raster_path, error = RasterService.generate_raster_from_points(bencana, kolom, force=force)
     if error:
         return jsonify({'status': 'error', 'message': error}), 404
 
     return jsonify({'status': 'success', 'raster_file': raster_path})
 
 
-@bencana_bp.route('/generate-all-raster', methods=['GET'])
 def generate_all_raster():
-    bencana_map = {
-        'gempa': ['mmi_100', 'mmi_250', 'mmi_500'],
-        'banjir': ['depth_100', 'depth_50', 'depth_25'],
-        'longsor': ['mflux_5', 'mflux_2'],
-        'gunungberapi': ['kpa_50', 'kpa_100', 'kpa_250']
-    }
+    """
+    Semua bencana paralel via raster batch runner (satu lintasan IDW per bencana).
+    ?multiband=1 → satu GeoTIFF multi-band per bencana
+    ?publish=geoserver|tiles → publish tumpang tindih dengan generate
+    ?force=1 → hitung ulang walau fingerprint input tidak berubah
+    """
+    from app.service.service_raster_batch import run_raster_batch
+
+    multiband = request.args.get('multiband', 'false').lower() in ['true', '1', 't']
+    publish = request.args.get('publish') or None
+    if publish not in (None, 'geoserver', 'tiles'):
+        return jsonify({'status': 'error', 'message': f'Target publish tidak valid: {publish}'}), 400
+
+    force = request.args.get('force', 'false').lower() in ['true', '1', 't']
+    hasil = run_raster_batch(BENCANA_KOLOM, publish=publish, multiband=multiband, force=force)
+    return jsonify(hasil)
 
-    hasil = []
 
-    for bencana, koloms in bencana_map.items():
+def upload_all_to_geoserver():
+    """
+    Generate semua raster sebagai GeoTIFF dan upload ke GeoServer
+    via REST PUT external.geotiff. ?republish=1 → upload ulang walau tidak berubah.
+    """
+    republish = request.args.get('republish', 'false').lower() in ['true', '1', 't']
+    results = upload_all_geotiffs(republish=republish)
+    return jsonify(results)
+
+
+def generate_dmgratio_raster(bencana, kolom):
+    """
+    ?mode=per_type (default, satu band per tipe kurva) atau ?mode=governing (max antar tipe)
+    ?force=1 → hitung ulang walau raster intensitas & kurva tidak berubah
+    """
+    if kolom not in BENCANA_KOLOM.get(bencana, []):
+        return jsonify({'status': 'error', 'message': 'Jenis bencana atau kolom tidak valid'}), 400
+    mode = request.args.get('mode', 'per_type')
+    if mode not in DamageRatioRasterService.MODES:
+        return jsonify({'status': 'error', 'message': f'Mode tidak valid: {mode}'}), 400
+
+    force = request.args.get('force', 'false').lower() in ['true', '1', 't']
+    path, error = DamageRatioRasterService.generate_dmgratio_raster(bencana, kolom, mode, force=force)
+    if error:
+        return jsonify({'status': 'error', 'message': error}), 404
+    return jsonify({'status': 'success', 'mode': mode, 'raster_file': path})
+
+
+def generate_all_dmgratio_raster():
+    mode = request.args.get('mode', 'per_type')
+    if mode not in DamageRatioRasterService.MODES:
+        return jsonify({'status': 'error', 'message': f'Mode tidak valid: {mode}'}), 400
+
+    hasil = []
+    for bencana, koloms in BENCANA_KOLOM.items():
         for kolom in koloms:
             try:
-                path, error = RasterService.generate_raster_from_points(bencana, kolom)
+                path, error = DamageRatioRasterService.generate_dmgratio_raster(bencana, kolom, mode)
                 if error:
-                    hasil.append({
-                        'bencana': bencana,
-                        'kolom': kolom,
-                        'status': 'error',
-                        'message': error
-                    })
+                    hasil.append({'bencana': bencana, 'kolom': kolom, 'status': 'error', 'message': error})
                 else:
-                    hasil.append({
-                        'bencana': bencana,
-                        'kolom': kolom,
-                        'status': 'success',
-                        'raster_file': path
-                    })
+                    hasil.append({'bencana': bencana, 'kolom': kolom, 'status': 'success', 'raster_file': path})
             except Exception as e:
-                hasil.append({
-                    'bencana': bencana,
-                    'kolom': kolom,
-                    'status': 'error',
-                    'message': str(e)
-                })
-
+                hasil.append({'bencana': bencana, 'kolom': kolom, 'status': 'error', 'message': str(e)})
     return jsonify(hasil)
 
 
-@bencana_bp.route('/geoserver/upload-all', methods=['GET'])
-def upload_all_to_geoserver():
-    """
-    Generate semua raster sebagai GeoTIFF dan upload ke GeoServer
-    via REST PUT external.geotiff
-    """
-    results = upload_all_geotiffs()
-    return jsonify(results)
\ No newline at end of file
+def sample_dmgratio(bencana, kolom):
+    """Damage ratio di titik ?lon=..&lat=.. (dibaca dari raster, tanpa query per titik)."""
+    if kolom not in BENCANA_KOLOM.get(bencana, []):
+        return jsonify({'status': 'error', 'message': 'Jenis bencana atau kolom tidak valid'}), 400
+    try:
+        lon = float(request.args['lon'])
+        lat = float(request.args['lat'])
+    except (KeyError, ValueError):
+        return jsonify({'status': 'error', 'message': 'Parameter lon & lat wajib berupa angka'}), 400
+    mode = request.args.get('mode', 'per_type')
+    if mode not in DamageRatioRasterService.MODES:
+        return jsonify({'status': 'error', 'message': f'Mode tidak valid: {mode}'}), 400
+
+    results, error = DamageRatioRasterService.sample(bencana, kolom, [(lon, lat)], mode)
+    if error:
+        return jsonify({'status': 'error', 'message': error}), 404
+    return jsonify({'status': 'success', 'bencana': bencana, 'kolom': kolom, **results[0]})
@@ -1,8 +1,27 @@
 # app/controller/controller_visualisasi_kurva.py
 
-from flask import jsonify
-from app.service.service_visualisasi_kurva import get_all_disaster_curves
+from flask import Response, current_app, request
+from app.service.service_visualisasi_kurva import (
+    get_disaster_curves_document,
+    DEFAULT_SPLINE_SAMPLES,
+    MAX_SPLINE_SAMPLES,
+)
+
+def _requested_samples():
+    """?samples=N (dibatasi) atau ?dense=1 → jumlah titik sampel spline."""
+    try:
+        samples = int(request.args.get("samples", 0))
+    except ValueError:
+        samples = 0
+    if not samples and request.args.get("dense", "").lower() in ("1", "true", "t", "yes"):
+        samples = DEFAULT_SPLINE_SAMPLES
+    return max(0, min(samples, MAX_SPLINE_SAMPLES))
 
 def get_disaster_curves_controller():
-    data = get_all_disaster_curves()   # sekarang nested sesuai harapan frontend
-    return jsonify(data)
+    # dokumen sudah jadi (nested sesuai harapan frontend); 304 jika ETag cocok
+    body, etag = get_disaster_curves_document(_requested_samples())
+    resp = Response(body, mimetype="application/json")
+    resp.set_etag(etag)
+    max_age = current_app.config.get("CURVE_CACHE_MAX_AGE", 60)
+    resp.headers["Cache-Control"] = f"public, max-age={max_age}, must-revalidate"
+    return resp.make_conditional(request)
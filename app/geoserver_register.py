@@ -1,19 +1,32 @@
 import os
+import json
+import hashlib
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
+from flask import current_app, has_app_context
 
 import rasterio
 import numpy as np
-from mapclassify import NaturalBreaks
 
-from app.service.service_visualisasi_hazard import RasterService
+from app.service.service_raster_stats import get_raster_stats, breaks_from_stats
 
 GEOSERVER_URL  = "http://localhost:8081/geoserver"
 GEOSERVER_USER = "admin"
 GEOSERVER_PASS = "geoserver"
 WORKSPACE      = "ne"
 
+# Publisher: request paralel maks, retry & backoff (detik, eksponensial), status yang di-retry
+DEFAULT_PUBLISH_WORKERS = 4
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
 # definisi bencana → kolom
 BENCANA_MAP = {
     'gempa':       ['mmi_100',    'mmi_250',   'mmi_500'],
@@ -22,35 +35,43 @@ BENCANA_MAP = {
     'gunungberapi':['kpa_50',     'kpa_100',   'kpa_250']
 }
 
+# Warna: pertama untuk 0, lalu untuk setiap kelas Jenks (dipakai juga oleh tile endpoint)
+ZERO_COLOR = "#004d00"  # hijau sangat tua
+POS_COLORS = ["#006400", "#66cc00", "#edd16d", "#cc6600", "#ff0000"]
+
+
+def compute_breaks(tif_path, k=5, band=1):
+    """
+    Natural breaks (Jenks) data > 0 dari statistik raster yang dicatat saat generate
+    (histogram / reservoir sample), tanpa membaca seluruh band.
+    """
+    stats = get_raster_stats(tif_path)
+    return breaks_from_stats(stats['bands'][band - 1], k=k)
 
-def compute_breaks(tif_path, k=5):
-    """Hitung natural breaks (Jenks) hanya dari data > 0."""
+
+def raster_scale_offset(tif_path):
+    """(scale, offset) band 1; (1.0, 0.0) untuk raster float biasa."""
     with rasterio.open(tif_path) as src:
-        arr = src.read(1)
-        mask = (arr != src.nodata) & (arr > 0)
-        data = arr[mask].astype(float)
-    if data.size == 0:
-        return []
-    nb = NaturalBreaks(data, k=k)
-    return nb.bins.tolist()
+        return (src.scales[0] if src.scales else 1.0), (src.offsets[0] if src.offsets else 0.0)
 
 
-def make_sld(layer_name, breaks):
+def make_sld(layer_name, breaks, scale=1.0, offset=0.0):
     """
     Bangun SLD:
      - quantity=0 → hijau sangat tua
      - kemudian kelas‐kelas Jenks untuk nilai > 0
+    Raster kuantisasi: quantity ditulis dalam kode piksel ((nilai - offset) / scale)
+    karena GeoServer mewarnai nilai mentah; label tetap nilai asli.
     """
-    # Warna: pertama untuk 0, lalu untuk setiap kelas Jenks
-    zero_color = "#004d00"  # hijau sangat tua
-    pos_colors = ["#006400", "#66cc00", "#edd16d", "#cc6600", "#ff0000"]
+    zero_color = ZERO_COLOR
+    pos_colors = POS_COLORS
 
     entries = []
     # 1) Entry untuk nol
     entries.append(f"""
       <ColorMapEntry
         color="{zero_color}"
-        quantity="0.0"
+        quantity="{(0.0 - offset) / scale:.6f}"
         label="0"/>
     """)
 
@@ -62,7 +83,7 @@ def make_sld(layer_name, breaks):
         entries.append(f"""
       <ColorMapEntry
         color="{color}"
-        quantity="{upper:.6f}"
+        quantity="{(upper - offset) / scale:.6f}"
         label="{lower:.2f}-{upper:.2f}"/>
         """)
         lower = upper
@@ -97,104 +118,218 @@ def make_sld(layer_name, breaks):
 </StyledLayerDescriptor>"""
 
 
-def upload_style(layer_name, tif_path):
-    """Upload SLD ke GeoServer, lalu assign ke layer."""
-    # 1) hitung kelas
-    breaks = compute_breaks(tif_path, k=5)
-
-    # 2) buat SLD
-    sld_body   = make_sld(layer_name, breaks)
-    style_name = f"{layer_name}_jb"
-
-    # 3) POST untuk create style, jika sudah ada -> PUT
-    url_styles  = f"{GEOSERVER_URL}/rest/styles"
-    url_style   = f"{GEOSERVER_URL}/rest/styles/{style_name}"
-    headers_sld = {"Content-Type": "application/vnd.ogc.sld+xml"}
-    params_post = {"name": style_name}
-
-    r1 = requests.post(
-        url_styles,
-        params=params_post,
-        data=sld_body.encode('utf-8'),
-        auth=HTTPBasicAuth(GEOSERVER_USER, GEOSERVER_PASS),
-        headers=headers_sld
-    )
-    if r1.status_code == 403 and "already exists" in r1.text:
-        r1 = requests.put(
-            url_style,
-            data=sld_body.encode('utf-8'),
-            auth=HTTPBasicAuth(GEOSERVER_USER, GEOSERVER_PASS),
-            headers=headers_sld
+def file_checksum(path, chunk_size=1024 * 1024):
+    """sha256 isi file (dibaca per chunk)."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _config(key, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+class GeoServerPublisher:
+    """
+    Publish GeoTIFF + SLD ke GeoServer REST:
+      - satu requests.Session (keep-alive, pool koneksi) untuk semua request
+      - retry dengan backoff eksponensial untuk error koneksi & 429/5xx
+      - upload coverage dan style satu layer berjalan bersamaan; total request
+        paralel dibatasi `workers` (satu executor dipakai semua pemanggil)
+      - layer dilewati bila checksum raster & SLD (breaks) sama dengan publish
+        terakhir yang tercatat di `state_file`
+    """
+
+    def __init__(self, url=None, user=None, password=None, workspace=None, workers=None,
+                 retries=None, backoff=None, state_file=None):
+        self.url = (url or _config('GEOSERVER_URL', GEOSERVER_URL)).rstrip('/')
+        self.auth = HTTPBasicAuth(user or _config('GEOSERVER_USER', GEOSERVER_USER),
+                                  password or _config('GEOSERVER_PASS', GEOSERVER_PASS))
+        self.workspace = workspace or _config('GEOSERVER_WORKSPACE', WORKSPACE)
+        self.workers = int(workers or _config('GEOSERVER_PUBLISH_WORKERS', DEFAULT_PUBLISH_WORKERS))
+        retries = int(_config('GEOSERVER_RETRIES', DEFAULT_RETRIES) if retries is None else retries)
+        backoff = float(_config('GEOSERVER_BACKOFF', DEFAULT_BACKOFF) if backoff is None else backoff)
+        self.state_file = state_file or _config('GEOSERVER_STATE_FILE', None) or os.path.join(
+            tempfile.gettempdir(), 'geoserver_publish_state.json'
+        )
+
+        # Body file di-rewind otomatis oleh urllib3 saat retry
+        retry = Retry(
+            total=retries, backoff_factor=backoff,
+            status_forcelist=RETRY_STATUS, allowed_methods=None, raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers, max_retries=retry)
+        self.session = requests.Session()
+        self.session.auth = self.auth
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='geoserver')
+
+        self._state_lock = threading.Lock()
+        self._state = self._load_state()
+
+    # ---------- state publish terakhir ----------
+
+    def _load_state(self):
+        try:
+            with open(self.state_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_layer_state(self, layer_name, entry):
+        with self._state_lock:
+            self._state[layer_name] = entry
+            tmp = f"{self.state_file}.{os.getpid()}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(self._state, f, indent=1)
+            os.replace(tmp, self.state_file)
+
+    # ---------- request REST ----------
+
+    def _put_coverage(self, layer_name, tif_path):
+        url = (
+            f"{self.url}/rest/workspaces/{self.workspace}"
+            f"/coveragestores/{layer_name}/file.geotiff"
         )
-    if r1.status_code not in (200, 201):
-        raise RuntimeError(f"Failed to create/update style {style_name}: {r1.status_code}\n{r1.text}")
+        with open(tif_path, 'rb') as f:
+            r = self.session.put(
+                url, data=f,
+                params={'configure': 'all', 'coverageName': layer_name},
+                headers={"Content-Type": "image/tiff"},
+            )
+        if r.status_code not in (200, 201):
+            raise RuntimeError(f"Failed to upload coverage {layer_name}: {r.status_code}\n{r.text.strip()}")
+        return r.status_code
+
+    def _put_style(self, style_name, sld_body, exists):
+        """Buat style (POST) atau perbarui (PUT) bila sudah ada."""
+        headers_sld = {"Content-Type": "application/vnd.ogc.sld+xml"}
+        body = sld_body.encode('utf-8')
+        r = None
+        if not exists:
+            r = self.session.post(f"{self.url}/rest/styles", params={"name": style_name},
+                                  data=body, headers=headers_sld)
+        if r is None or (r.status_code == 403 and "already exists" in r.text):
+            r = self.session.put(f"{self.url}/rest/styles/{style_name}", data=body, headers=headers_sld)
+        if r.status_code not in (200, 201):
+            raise RuntimeError(f"Failed to create/update style {style_name}: {r.status_code}\n{r.text}")
+        return r.status_code
 
-    # 4) Assign style ini sebagai default ke coverage layer
-    url_layer = f"{GEOSERVER_URL}/rest/layers/{WORKSPACE}:{layer_name}"
-    xml = f"""
+    def _assign_style(self, layer_name, style_name):
+        xml = f"""
     <layer>
       <defaultStyle>
         <name>{style_name}</name>
       </defaultStyle>
     </layer>
     """
-    r2 = requests.put(
-        url_layer,
-        data=xml,
-        auth=HTTPBasicAuth(GEOSERVER_USER, GEOSERVER_PASS),
-        headers={"Content-Type": "application/xml"}
-    )
-    if r2.status_code not in (200, 201):
-        raise RuntimeError(f"Failed to assign style {style_name}: {r2.status_code}\n{r2.text}")
+        r = self.session.put(
+            f"{self.url}/rest/layers/{self.workspace}:{layer_name}",
+            data=xml, headers={"Content-Type": "application/xml"},
+        )
+        if r.status_code not in (200, 201):
+            raise RuntimeError(f"Failed to assign style {style_name}: {r.status_code}\n{r.text}")
+        return r.status_code
+
+    # ---------- publish ----------
+
+    def publish(self, bencana, kolom, tif_path, force=False):
+        """Publish satu layer; return record status ('success' / 'skipped' / 'error')."""
+        layer_name = f"hazard_{bencana}_{kolom}"
+        style_name = f"{layer_name}_jb"
+        rec = {'layer': layer_name}
+        try:
+            checksum = file_checksum(tif_path)
+            breaks = compute_breaks(tif_path, k=len(POS_COLORS))
+            sld_body = make_sld(layer_name, breaks, *raster_scale_offset(tif_path))
+            style_sha = hashlib.sha256(sld_body.encode('utf-8')).hexdigest()
+
+            with self._state_lock:
+                prev = self._state.get(layer_name)
+            coverage_changed = force or prev is None or prev.get('checksum') != checksum
+            style_changed = force or prev is None or prev.get('style_sha') != style_sha
+            if not coverage_changed and not style_changed:
+                rec.update(status='skipped', message='Raster & style tidak berubah')
+                return rec
+
+            futures = {}
+            if coverage_changed:
+                futures['upload_code'] = self._executor.submit(self._put_coverage, layer_name, tif_path)
+            if style_changed:
+                futures['style_code'] = self._executor.submit(
+                    self._put_style, style_name, sld_body, prev is not None
+                )
+            for key, fut in futures.items():
+                rec[key] = fut.result()
+
+            # Style default cukup di-assign saat layer baru atau style berubah
+            if prev is None or style_changed:
+                rec['assign_code'] = self._executor.submit(
+                    self._assign_style, layer_name, style_name
+                ).result()
+
+            self._save_layer_state(layer_name, {
+                'checksum': checksum,
+                'breaks': breaks,
+                'style_sha': style_sha,
+            })
+            rec.update(status='success', coverage_uploaded=coverage_changed, style_uploaded=style_changed)
+        except Exception as e:
+            rec.update(status='error', message=str(e))
+        return rec
 
-    return r1.status_code, r2.status_code
+    def publish_many(self, items, force=False):
+        """items: iterable (bencana, kolom, tif_path); return list record (urutan sama)."""
+        items = list(items)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='geoserver-layer') as pool:
+            return list(pool.map(lambda item: self.publish(*item, force=force), items))
 
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.session.close()
 
-def upload_all_geotiffs():
+
+_publisher = None
+_publisher_lock = threading.Lock()
+
+
+def get_publisher():
+    """Publisher bersama (satu session & executor per proses)."""
+    global _publisher
+    with _publisher_lock:
+        if _publisher is None:
+            _publisher = GeoServerPublisher()
+        return _publisher
+
+
+def publish_geotiff(bencana, kolom, tif_path, force=False):
+    """Upload satu GeoTIFF ke GeoServer lalu upload & assign SLD; return record status."""
+    return get_publisher().publish(bencana, kolom, tif_path, force=force)
+
+
+def upload_all_geotiffs(republish=False):
     """
-    1) Generate GeoTIFF via RasterService
-    2) Upload ke GeoServer
+    1) Generate GeoTIFF via raster batch runner (paralel per bencana)
+    2) Upload ke GeoServer begitu raster bencana tersebut selesai
     3) Hitung & upload SLD, assign ke layer
+    Layer yang raster & style-nya tidak berubah dilewati (status 'skipped'), kecuali republish=True.
     """
-    hasil = []
+    from app.service.service_raster_batch import run_raster_batch
 
-    for bencana, koloms in BENCANA_MAP.items():
-        for kolom in koloms:
-            layer_name = f"hazard_{bencana}_{kolom}"
-            rec = {'layer': layer_name}
-            try:
-                # generate .tif
-                tif_path, err = RasterService.generate_raster_from_points(bencana, kolom)
-                if err:
-                    rec.update(status='error', message=err)
-                    hasil.append(rec)
-                    continue
-
-                # upload GeoTIFF
-                url = (
-                    f"{GEOSERVER_URL}/rest/workspaces/{WORKSPACE}"
-                    f"/coveragestores/{layer_name}/file.geotiff"
-                    f"?configure=all&coverageName={layer_name}"
-                )
-                with open(tif_path, 'rb') as f:
-                    r = requests.put(
-                        url, data=f,
-                        auth=HTTPBasicAuth(GEOSERVER_USER,GEOSERVER_PASS),
-                        headers={"Content-Type":"image/tiff"}
-                    )
-                rec['upload_code'] = r.status_code
-                if r.status_code not in (200,201):
-                    rec.update(status='error', message=r.text.strip())
-                    hasil.append(rec)
-                    continue
-
-                # upload & assign style
-                sc1, sc2 = upload_style(layer_name, tif_path)
-                rec.update(status='success', style_codes=(sc1, sc2))
-
-            except Exception as e:
-                rec.update(status='error', message=str(e))
-
-            hasil.append(rec)
+    hasil = []
+    for item in run_raster_batch(BENCANA_MAP, publish='geoserver', republish=republish):
+        rec = {'layer': f"hazard_{item['bencana']}_{item['kolom']}"}
+        publish = item.get('publish') or {}
+        rec.update({k: v for k, v in publish.items() if k != 'layer'})
+        if item['status'] != 'success':
+            rec.update(status='error', message=item.get('message'))
+        rec['generate_ms'] = item.get('generate_ms')
+        rec['publish_ms'] = item.get('publish_ms')
+        hasil.append(rec)
 
     return hasil
@@ -319,3 +319,25 @@ class BanjirReferenceCurve(db.Model):
     tipe_kurva = db.Column(db.String(10), nullable=False)
     x = db.Column(db.Float, nullable=False)
     y = db.Column(db.Float, nullable=False)
+
+
+# Cache batas Indonesia (union provinsi) & mask daratan per definisi grid raster
+
+class ClipBoundary(db.Model):
+    __tablename__ = "clip_boundary"
+    __table_args__ = (
+        db.UniqueConstraint('provinsi_fingerprint', 'pixel_size', name='uq_clip_boundary_grid'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    provinsi_fingerprint = db.Column(db.String(64), nullable=False, index=True)
+    pixel_size = db.Column(db.Float, nullable=False)
+    minx = db.Column(db.Float, nullable=False)
+    miny = db.Column(db.Float, nullable=False)
+    maxx = db.Column(db.Float, nullable=False)
+    maxy = db.Column(db.Float, nullable=False)
+    width = db.Column(db.Integer, nullable=False)
+    height = db.Column(db.Integer, nullable=False)
+    mask_path = db.Column(db.String(512), nullable=False)
+    geom = db.Column(Geometry('GEOMETRY', srid=4326), nullable=False)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
@@ -31,7 +31,8 @@ TYPE_CFG = {
 def get_buffered_features(dtype: str, field: str, bbox: dict, simplify_tolerance: float):
     """
     Buffer & simplify on-the-fly, hanya untuk baris yang memiliki nilai intensitas
-    non-NULL **dan bukan nol** pada field yang diminta.
+    non-NULL **dan bukan nol** pada field yang diminta. Aturan bbox sama dengan jalur
+    tabel tersimpan: buffer ikut bila bbox-nya beririsan dengan bbox request.
     """
     cfg = TYPE_CFG.get(dtype)
     if not cfg:
@@ -49,18 +50,21 @@ def get_buffered_features(dtype: str, field: str, bbox: dict, simplify_tolerance
       ) AS geom
     )
     SELECT
-      ST_AsGeoJSON(
-        ST_SimplifyPreserveTopology(
-          ST_Buffer(p.geom::geography, :buf_deg * 111319.9)::geometry,
-          :tol
-        )
-      ) AS geojson,
+      ST_AsGeoJSON(b.geom) AS geojson,
       p.{field} AS value
-    FROM {cfg["table"]} p, env
-    WHERE p.geom && env.geom
-      AND ST_Intersects(p.geom, env.geom)
+    FROM {cfg["table"]} p
+    CROSS JOIN env
+    CROSS JOIN LATERAL (
+      SELECT ST_SimplifyPreserveTopology(
+        ST_Buffer(p.geom::geography, :buf_deg * 111319.9)::geometry,
+        :tol
+      ) AS geom
+    ) b
+    -- kandidat: titik dalam jangkauan radius buffer dari bbox
+    WHERE p.geom && ST_Expand(env.geom, :buf_deg * 2)
       AND p.{field} IS NOT NULL
-      AND p.{field} <> 0;
+      AND p.{field} <> 0
+      AND b.geom && env.geom;
     """)
 
     params = {
@@ -81,6 +85,242 @@ def get_buffered_features(dtype: str, field: str, bbox: dict, simplify_tolerance
     finally:
         db.session.close()
 
+def buffer_table(dtype: str) -> str:
+    """Tabel buffer termaterialisasi untuk satu jenis hazard."""
+    return f"hazard_buffer_{dtype}"
+
+
+def get_source_fingerprint(dtype: str):
+    """Fingerprint titik + seluruh kolom intensitas model_intensitas_* (None bila dtype tidak dikenal)."""
+    from app.repository.repo_table_version import get_table_fingerprint
+    cfg = TYPE_CFG.get(dtype)
+    if not cfg:
+        return None
+    return get_table_fingerprint(cfg["table"], ["md5(ST_AsBinary(geom)) AS g", *cfg["fields"]])
+
+
+def get_buffer_state(dtype: str):
+    """Baris hazard_buffer_state (fingerprint, tolerances, buffer_deg, n_rows) atau None."""
+    try:
+        return db.session.execute(text("""
+        SELECT fingerprint, tolerances, buffer_deg, n_rows, refreshed_at
+        FROM hazard_buffer_state
+        WHERE dtype = :dtype
+        """), {"dtype": dtype}).mappings().first()
+    except Exception as e:
+        logger.error(f"Error state buffer {dtype}: {e}")
+        db.session.rollback()
+        return None
+
+
+def refresh_buffer_table(dtype: str, tolerances: list, fingerprint: str, force: bool = False):
+    """
+    Isi ulang hazard_buffer_<dtype>: buffer geodesik tiap titik dihitung sekali,
+    lalu disimplify untuk setiap level toleransi. Satu transaksi (DELETE + INSERT),
+    jadi pembaca tetap melihat isi lama sampai commit.
+
+    Refresh bersamaan (thread background tiap proses, CLI) diserialkan dengan advisory
+    lock per tabel; setelah lock didapat state dibaca ulang, dan bila refresh lain sudah
+    menulis fingerprint yang sama (dan bukan force) tabel tidak disentuh.
+    Return (jumlah baris, True bila tabel benar-benar diisi ulang).
+    """
+    cfg = TYPE_CFG[dtype]
+    table = buffer_table(dtype)
+    fields = cfg["fields"]
+    cols = ", ".join(fields)
+    p_cols = ", ".join(f"p.{f}" for f in fields)
+    any_value = " OR ".join(f"(p.{f} IS NOT NULL AND p.{f} <> 0)" for f in fields)
+
+    try:
+        db.session.execute(text("SELECT pg_advisory_xact_lock(hashtext(:table))"), {"table": table})
+        if not force:
+            state = db.session.execute(text("""
+            SELECT fingerprint, tolerances, buffer_deg, n_rows
+            FROM hazard_buffer_state
+            WHERE dtype = :dtype
+            """), {"dtype": dtype}).mappings().first()
+            if (state is not None and state["fingerprint"] == fingerprint
+                    and sorted(state["tolerances"]) == sorted(tolerances)
+                    and state["buffer_deg"] == cfg["buffer_deg"]):
+                db.session.commit()
+                db.session.close()
+                return state["n_rows"], False
+
+        db.session.execute(text(f"DELETE FROM {table}"))
+        result = db.session.execute(text(f"""
+        INSERT INTO {table} (level, tol, {cols}, geom)
+        SELECT l.ord - 1, l.tol, {p_cols},
+               ST_SimplifyPreserveTopology(b.geom, l.tol)
+        FROM {cfg["table"]} p
+        CROSS JOIN LATERAL (
+          SELECT ST_Buffer(p.geom::geography, :buf_deg * 111319.9)::geometry AS geom
+        ) b
+        CROSS JOIN unnest(CAST(:tols AS float8[])) WITH ORDINALITY AS l(tol, ord)
+        WHERE p.geom IS NOT NULL AND ({any_value})
+        """), {"buf_deg": cfg["buffer_deg"], "tols": list(tolerances)})
+        n_rows = result.rowcount
+        db.session.execute(text("""
+        INSERT INTO hazard_buffer_state (dtype, fingerprint, tolerances, buffer_deg, n_rows, refreshed_at)
+        VALUES (:dtype, :fingerprint, CAST(:tols AS float8[]), :buf_deg, :n_rows, now())
+        ON CONFLICT (dtype) DO UPDATE SET
+          fingerprint = EXCLUDED.fingerprint,
+          tolerances = EXCLUDED.tolerances,
+          buffer_deg = EXCLUDED.buffer_deg,
+          n_rows = EXCLUDED.n_rows,
+          refreshed_at = EXCLUDED.refreshed_at
+        """), {
+            "dtype": dtype, "fingerprint": fingerprint, "tols": list(tolerances),
+            "buf_deg": cfg["buffer_deg"], "n_rows": n_rows,
+        })
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        db.session.close()
+        logger.error(f"Error refresh buffer {dtype}: {e}")
+        raise
+
+    # Statistik planner untuk isi baru; gagal di sini tidak membatalkan refresh yang sudah commit
+    try:
+        db.session.execute(text(f"ANALYZE {table}"))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"⚠️ ANALYZE {table} gagal: {e}")
+    finally:
+        db.session.close()
+    return n_rows, True
+
+
+def get_materialized_tile_features(dtype: str, field: str, level: int,
+                                  tile_deg: float, tiles: list):
+    """
+    Buffer tersimpan untuk sekumpulan sel grid (tx, ty) berukuran tile_deg derajat.
+    Setiap buffer milik tepat satu sel, yaitu sel yang memuat pojok kiri-bawah
+    bbox-nya, sehingga hasil per sel bisa di-cache dan digabung tanpa duplikat.
+    Return baris (tx, ty, xmin, ymin, xmax, ymax, geojson, value).
+    """
+    cfg = TYPE_CFG.get(dtype)
+    if not cfg or field not in cfg["fields"] or not tiles:
+        return []
+
+    txs = [t[0] for t in tiles]
+    tys = [t[1] for t in tiles]
+    sql = text(f"""
+    WITH cells AS (
+      SELECT * FROM unnest(CAST(:txs AS int[]), CAST(:tys AS int[])) AS c(tx, ty)
+    ),
+    cand AS (
+      SELECT floor(ST_XMin(b.geom) / :t)::int AS tx,
+             floor(ST_YMin(b.geom) / :t)::int AS ty,
+             b.geom, b.{field} AS value
+      FROM {buffer_table(dtype)} b
+      WHERE b.level = :level
+        AND b.geom && ST_MakeEnvelope(:minx, :miny, :maxx, :maxy, 4326)
+        AND b.{field} IS NOT NULL
+        AND b.{field} <> 0
+    )
+    SELECT cand.tx, cand.ty,
+           ST_XMin(cand.geom) AS xmin, ST_YMin(cand.geom) AS ymin,
+           ST_XMax(cand.geom) AS xmax, ST_YMax(cand.geom) AS ymax,
+           ST_AsGeoJSON(cand.geom) AS geojson, cand.value
+    FROM cand
+    JOIN cells USING (tx, ty);
+    """)
+    params = {
+      "txs": txs,
+      "tys": tys,
+      "t": tile_deg,
+      "level": level,
+      # pojok kiri-bawah ada di sel → bbox buffer beririsan dengan envelope semua sel
+      "minx": min(txs) * tile_deg,
+      "miny": min(tys) * tile_deg,
+      "maxx": (max(txs) + 1) * tile_deg,
+      "maxy": (max(tys) + 1) * tile_deg,
+    }
+
+    try:
+        return db.session.execute(sql, params).fetchall()
+    except Exception as e:
+        logger.error(f"Error buffer tile {dtype}: {e}")
+        return None
+    finally:
+        db.session.close()
+
+
+def get_buffer_mvt(dtype: str, field: str, z: int, x: int, y: int,
+                   tol: float, limit: int, level: int = None):
+    """
+    Satu Mapbox Vector Tile (ST_AsMVT) buffer hazard, layer = dtype, properti hanya
+    `field`. level != None → buffer tersimpan pada level itu; None → buffer &
+    simplify(tol) on-the-fly. Maks `limit` fitur, intensitas tertinggi didahulukan.
+    Return bytes (kosong bila tidak ada fitur) atau None bila gagal.
+    """
+    cfg = TYPE_CFG.get(dtype)
+    if not cfg or field not in cfg["fields"]:
+        logger.error(f"Field '{field}' is not valid for type '{dtype}'")
+        return None
+
+    if level is not None:
+        source = f"""
+        SELECT b.geom, b.{field} AS value
+        FROM {buffer_table(dtype)} b, bounds
+        WHERE b.level = :level
+          AND b.geom && bounds.geom4326
+          AND b.{field} IS NOT NULL
+          AND b.{field} <> 0
+        """
+    else:
+        # titik di luar tile tetap diambil bila buffer-nya bisa menjangkau tile
+        source = f"""
+        SELECT
+          ST_SimplifyPreserveTopology(
+            ST_Buffer(p.geom::geography, :buf_deg * 111319.9)::geometry,
+            :tol
+          ) AS geom,
+          p.{field} AS value
+        FROM {cfg["table"]} p, bounds
+        WHERE p.geom && ST_Expand(bounds.geom4326, :buf_deg * 2)
+          AND p.{field} IS NOT NULL
+          AND p.{field} <> 0
+        """
+
+    sql = text(f"""
+    WITH bounds AS (
+      SELECT ST_TileEnvelope(:z, :x, :y) AS geom3857,
+             ST_Transform(ST_TileEnvelope(:z, :x, :y), 4326) AS geom4326
+    ),
+    src AS ({source}
+      ORDER BY value DESC
+      LIMIT :limit
+    ),
+    mvtgeom AS (
+      SELECT ST_AsMVTGeom(ST_Transform(src.geom, 3857), bounds.geom3857, 4096, 64, true) AS geom,
+             src.value AS {field}
+      FROM src, bounds
+    )
+    SELECT ST_AsMVT(mvtgeom.*, :layer, 4096, 'geom')
+    FROM mvtgeom
+    WHERE geom IS NOT NULL;
+    """)
+    params = {
+      "z": z, "x": x, "y": y,
+      "level": level,
+      "tol": tol,
+      "buf_deg": cfg["buffer_deg"],
+      "limit": limit,
+      "layer": dtype,
+    }
+
+    try:
+        tile = db.session.execute(sql, params).scalar()
+        return bytes(tile) if tile is not None else b""
+    except Exception as e:
+        logger.error(f"Error MVT buffer {dtype} {z}/{x}/{y}: {e}")
+        return None
+    finally:
+        db.session.close()
+
+
 def get_nearest_point(dtype: str, field: str, lat: float, lng: float):
     """
     Cari titik terdekat, kembalikan satu nilai intensitas 'field' dan jarak.
@@ -0,0 +1,83 @@
+# app/repository/repo_clip_boundary.py
+
+import logging
+from sqlalchemy import text
+from geoalchemy2.shape import to_shape, from_shape
+
+from app.extensions import db
+from app.models.models_database import ClipBoundary
+from app.repository.repo_table_version import get_table_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+def get_provinsi_fingerprint():
+    """Fingerprint geometri tabel provinsi; berubah bila ada batas yang diubah/ditambah/dihapus."""
+    return get_table_fingerprint("provinsi", ["md5(ST_AsBinary(geom)) AS g"])
+
+
+def compute_provinsi_union():
+    """Union seluruh provinsi (poligon saja, SRID 4326) sebagai geometri shapely."""
+    logger.info("🗺️ Menghitung union batas provinsi (ST_UnaryUnion)...")
+    row = db.session.execute(text("""
+        SELECT ST_AsBinary(
+          ST_Transform(ST_CollectionExtract(ST_UnaryUnion(ST_MakeValid(geom)), 3), 4326)
+        ) AS wkb
+        FROM provinsi
+    """)).mappings().first()
+    from shapely import wkb
+    return wkb.loads(bytes(row["wkb"]))
+
+
+def get_clip_boundary(fingerprint, pixel_size):
+    return (
+        db.session.query(ClipBoundary)
+        .filter_by(provinsi_fingerprint=fingerprint, pixel_size=pixel_size)
+        .one_or_none()
+    )
+
+
+def get_any_clip_boundary(fingerprint):
+    """Baris apa pun dengan fingerprint ini (geometri union bisa dipakai ulang untuk grid lain)."""
+    return (
+        db.session.query(ClipBoundary)
+        .filter_by(provinsi_fingerprint=fingerprint)
+        .first()
+    )
+
+
+def save_clip_boundary(fingerprint, pixel_size, geometry, bounds, width, height, mask_path):
+    """Simpan baris cache baru dan hapus baris dengan fingerprint lama."""
+    minx, miny, maxx, maxy = bounds
+    try:
+        stale = (
+            db.session.query(ClipBoundary)
+            .filter(ClipBoundary.provinsi_fingerprint != fingerprint)
+            .delete(synchronize_session=False)
+        )
+        if stale:
+            logger.info(f"♻️ {stale} cache clip_boundary lama dihapus")
+        row = ClipBoundary(
+            provinsi_fingerprint=fingerprint,
+            pixel_size=pixel_size,
+            minx=minx, miny=miny, maxx=maxx, maxy=maxy,
+            width=width, height=height,
+            mask_path=mask_path,
+            geom=from_shape(geometry, srid=4326),
+        )
+        db.session.add(row)
+        db.session.commit()
+        return row
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"❌ Gagal menyimpan clip_boundary: {e}")
+        raise
+
+
+def update_mask_path(row, mask_path):
+    row.mask_path = mask_path
+    db.session.commit()
+
+
+def clip_geometry(row):
+    return to_shape(row.geom)
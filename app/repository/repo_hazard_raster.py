@@ -0,0 +1,225 @@
+# app/repository/repo_hazard_raster.py
+
+import logging
+from sqlalchemy import text
+
+from app.extensions import db
+
+logger = logging.getLogger(__name__)
+
+# Jumlah tile per batch INSERT
+DEFAULT_TILE_BATCH = 100
+# Versi nonaktif per bencana/kolom yang disimpan (bisa diaktifkan ulang oleh find_raster)
+DEFAULT_KEEP_VERSIONS = 2
+
+
+def get_point_checksum(table, kolom):
+    """Checksum titik intensitas (koordinat geom + nilai kolom) untuk fingerprint raster."""
+    from app.repository.repo_table_version import get_table_fingerprint
+    return get_table_fingerprint(table, ["ST_X(geom) AS x", "ST_Y(geom) AS y", kolom])
+
+
+def find_raster(bencana, kolom, fingerprint):
+    """
+    Baris hazard_raster dengan fingerprint ini (id, file_path, active) atau None.
+    Versi aktif diutamakan; versi lama yang cocok lagi diaktifkan ulang.
+    """
+    row = db.session.execute(text("""
+        SELECT id, file_path, active
+        FROM hazard_raster
+        WHERE bencana = :bencana AND kolom = :kolom AND fingerprint = :fingerprint
+          AND EXISTS (SELECT 1 FROM hazard_raster_tile t WHERE t.raster_id = hazard_raster.id)
+        ORDER BY active DESC, id DESC
+        LIMIT 1
+    """), {"bencana": bencana, "kolom": kolom, "fingerprint": fingerprint}).mappings().first()
+    if row is not None and not row["active"]:
+        activate_raster(bencana, kolom, row["id"])
+    return row
+
+
+def get_active_raster(bencana, kolom):
+    """Metadata versi aktif (id, fingerprint, value_scale, value_offset) atau None."""
+    return db.session.execute(text("""
+        SELECT id, fingerprint, value_scale, value_offset
+        FROM hazard_raster
+        WHERE bencana = :bencana AND kolom = :kolom AND active
+        ORDER BY id DESC
+        LIMIT 1
+    """), {"bencana": bencana, "kolom": kolom}).mappings().first()
+
+
+def activate_raster(bencana, kolom, raster_id):
+    try:
+        db.session.execute(text("""
+            UPDATE hazard_raster SET active = (id = :raster_id)
+            WHERE bencana = :bencana AND kolom = :kolom AND (active OR id = :raster_id)
+        """), {"bencana": bencana, "kolom": kolom, "raster_id": raster_id})
+        db.session.commit()
+        logger.info(f"♻️ hazard_raster {bencana}-{kolom} versi {raster_id} diaktifkan ulang")
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"❌ Gagal mengaktifkan hazard_raster {raster_id}: {e}")
+        raise
+
+
+def _prune_versions(cur, bencana, kolom, keep):
+    """Hapus versi nonaktif selain `keep` terbaru (tile ikut terhapus lewat ON DELETE CASCADE)."""
+    cur.execute(
+        """
+        DELETE FROM hazard_raster
+        WHERE bencana = %s AND kolom = %s AND NOT active
+          AND id NOT IN (
+            SELECT id FROM hazard_raster
+            WHERE bencana = %s AND kolom = %s AND NOT active
+            ORDER BY id DESC
+            LIMIT %s
+          )
+        """,
+        (bencana, kolom, bencana, kolom, keep),
+    )
+    if cur.rowcount:
+        logger.info(f"🧹 {cur.rowcount} versi lama hazard_raster {bencana}-{kolom} dihapus")
+
+
+def insert_raster_tiles(bencana, kolom, tiles, fingerprint=None, file_path=None,
+                        batch_size=DEFAULT_TILE_BATCH, value_scale=None, value_offset=None,
+                        patch_raster_id=None, replaced=None, keep_versions=DEFAULT_KEEP_VERSIONS):
+    """
+    Simpan satu versi raster sebagai tile:
+      - baris metadata baru di hazard_raster (active), versi lama dinonaktifkan;
+        value_scale/value_offset diisi bila tile berisi kode kuantisasi (16BUI)
+      - tiles: iterable (tile_row, tile_col, wkb_raster) — dikonsumsi bertahap dan
+        di-INSERT per batch, jadi raster utuh tidak pernah ada di memori
+      - patch_raster_id (refresh inkremental): versi aktif tersebut diperbarui di
+        tempat — hanya tile di `replaced` [(tile_row, tile_col), ...] yang diganti
+        `tiles`, fingerprint/file_path dimajukan; tidak ada versi baru
+    Versi nonaktif dipangkas hingga `keep_versions` terbaru. Semua dalam satu
+    transaksi: perubahan baru terlihat setelah seluruh tile masuk.
+    Return (raster_id, jumlah tile yang ditulis); (None, 0) bila gagal.
+    """
+    from psycopg2.extras import execute_values
+
+    conn = db.engine.raw_connection()
+    cur = conn.cursor()
+    n_tiles = 0
+    try:
+        if patch_raster_id is not None:
+            cur.execute(
+                """
+                UPDATE hazard_raster SET fingerprint = %s, file_path = %s
+                WHERE id = %s AND active
+                RETURNING id
+                """,
+                (fingerprint, file_path, patch_raster_id),
+            )
+            if cur.fetchone() is None:
+                raise RuntimeError(f"versi {patch_raster_id} sudah tidak aktif")
+            raster_id = patch_raster_id
+            replaced = list(replaced or [])
+            cur.execute(
+                """
+                DELETE FROM hazard_raster_tile
+                WHERE raster_id = %s
+                  AND (tile_row, tile_col) IN (
+                    SELECT * FROM unnest(CAST(%s AS int[]), CAST(%s AS int[]))
+                  )
+                """,
+                (raster_id, [r for r, _ in replaced], [c for _, c in replaced]),
+            )
+        else:
+            cur.execute(
+                "UPDATE hazard_raster SET active = false WHERE bencana = %s AND kolom = %s AND active",
+                (bencana, kolom),
+            )
+            cur.execute(
+                """
+                INSERT INTO hazard_raster
+                    (bencana, kolom, fingerprint, file_path, value_scale, value_offset, active)
+                VALUES (%s, %s, %s, %s, %s, %s, true)
+                RETURNING id
+                """,
+                (bencana, kolom, fingerprint, file_path, value_scale, value_offset),
+            )
+            raster_id = cur.fetchone()[0]
+
+        insert_sql = """
+            INSERT INTO hazard_raster_tile (raster_id, tile_row, tile_col, rast)
+            VALUES %s
+        """
+        template = f"({raster_id}, %s, %s, ST_RastFromWKB(%s))"
+        batch = []
+        for tile_row, tile_col, wkb in tiles:
+            batch.append((tile_row, tile_col, wkb))
+            if len(batch) >= batch_size:
+                execute_values(cur, insert_sql, batch, template=template, page_size=batch_size)
+                n_tiles += len(batch)
+                batch = []
+        if batch:
+            execute_values(cur, insert_sql, batch, template=template, page_size=batch_size)
+            n_tiles += len(batch)
+
+        _prune_versions(cur, bencana, kolom, keep_versions)
+        conn.commit()
+        logger.info(f"✅ {n_tiles} tile raster {bencana}-{kolom} tersimpan (hazard_raster id={raster_id})")
+        return raster_id, n_tiles
+    except Exception as e:
+        logger.error(f"❌ Gagal menyimpan raster ke PostGIS: {e}")
+        conn.rollback()
+        return None, 0
+    finally:
+        cur.close()
+        conn.close()
+
+
+def get_values_at_points(bencana, kolom, lons, lats):
+    """
+    Nilai band 1 versi aktif di setiap titik (lon, lat); hanya tile yang beririsan
+    yang dibaca (GiST pada ST_ConvexHull(rast)). Kode kuantisasi didekode dengan
+    value_scale/value_offset. Return list nilai (None = di luar/nodata), urutan sama dengan input.
+    """
+    rows = db.session.execute(text("""
+        WITH pts AS (
+          SELECT t.ord, ST_SetSRID(ST_MakePoint(t.lon, t.lat), 4326) AS g
+          FROM unnest(CAST(:lons AS float8[]), CAST(:lats AS float8[]))
+               WITH ORDINALITY AS t(lon, lat, ord)
+        )
+        SELECT p.ord,
+               ST_Value(tile.rast, 1, p.g) * COALESCE(tile.value_scale, 1)
+                 + COALESCE(tile.value_offset, 0) AS value
+        FROM pts p
+        LEFT JOIN LATERAL (
+          SELECT ht.rast, r.value_scale, r.value_offset
+          FROM hazard_raster_tile ht
+          JOIN hazard_raster r ON r.id = ht.raster_id
+          WHERE r.active AND r.bencana = :bencana AND r.kolom = :kolom
+            AND ST_Intersects(ST_ConvexHull(ht.rast), p.g)
+          LIMIT 1
+        ) tile ON true
+        ORDER BY p.ord
+    """), {"lons": list(lons), "lats": list(lats), "bencana": bencana, "kolom": kolom}).all()
+    return [r.value for r in rows]
+
+
+def get_bbox_geotiff(bencana, kolom, minx, miny, maxx, maxy):
+    """
+    Potongan raster versi aktif untuk bbox sebagai (bytes GeoTIFF, value_scale, value_offset);
+    bytes None jika kosong. Hanya tile yang beririsan dengan bbox yang di-union & di-clip;
+    raster kuantisasi dikirim sebagai kode (didekode pemanggil dengan scale/offset).
+    """
+    row = db.session.execute(text("""
+        WITH env AS (SELECT ST_MakeEnvelope(:minx, :miny, :maxx, :maxy, 4326) AS g)
+        SELECT ST_AsGDALRaster(ST_Clip(ST_Union(ht.rast), env.g, true), 'GTiff') AS tif,
+               MAX(r.value_scale) AS value_scale, MAX(r.value_offset) AS value_offset
+        FROM hazard_raster_tile ht
+        JOIN hazard_raster r ON r.id = ht.raster_id
+        CROSS JOIN env
+        WHERE r.active AND r.bencana = :bencana AND r.kolom = :kolom
+          AND ST_Intersects(ST_ConvexHull(ht.rast), env.g)
+        GROUP BY env.g
+    """), {
+        "minx": minx, "miny": miny, "maxx": maxx, "maxy": maxy,
+        "bencana": bencana, "kolom": kolom,
+    }).first()
+    if row is None or row.tif is None:
+        return None, None, None
+    return bytes(row.tif), row.value_scale, row.value_offset
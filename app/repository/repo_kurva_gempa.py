@@ -6,6 +6,15 @@ from app.extensions import db
 
 logger = logging.getLogger(__name__)
 
+def parse_reference_curves_gempa(curves):
+    """Kelompokkan baris referensi Gempa menjadi {tipe: {"x": [...], "y": [...]}}."""
+    reference_curves = {}
+    for curve in curves:
+        reference_curves.setdefault(curve.tipe_kurva, {"x": [], "y": []})
+        reference_curves[curve.tipe_kurva]["x"].append(curve.x)
+        reference_curves[curve.tipe_kurva]["y"].append(curve.y)
+    return reference_curves
+
 def get_reference_curves_gempa():
     """Mengambil referensi kurva Gempa dengan safe‐session."""
     try:
@@ -15,11 +24,7 @@ def get_reference_curves_gempa():
         db.session.expunge_all()
         db.session.close()
 
-        reference_curves = {}
-        for curve in curves:
-            reference_curves.setdefault(curve.tipe_kurva, {"x": [], "y": []})
-            reference_curves[curve.tipe_kurva]["x"].append(curve.x)
-            reference_curves[curve.tipe_kurva]["y"].append(curve.y)
+        reference_curves = parse_reference_curves_gempa(curves)
 
         logger.info(f"✅ Berhasil mengambil {len(curves)} referensi kurva Gempa.")
         return reference_curves
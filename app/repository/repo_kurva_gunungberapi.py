@@ -4,6 +4,16 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+def parse_reference_curves_gunungberapi(curves):
+    """Kelompokkan baris referensi Gunung Berapi per tipe_kurva."""
+    reference_curves = {}
+    for curve in curves:
+        if curve.tipe_kurva not in reference_curves:
+            reference_curves[curve.tipe_kurva] = {"x": [], "y": []}
+        reference_curves[curve.tipe_kurva]["x"].append(curve.x)
+        reference_curves[curve.tipe_kurva]["y"].append(curve.y)
+    return reference_curves
+
 def get_reference_curves_gunungberapi():
     """Mengambil referensi kurva Gunung Berapi dari database dengan transaksi yang aman."""
     try:
@@ -17,12 +27,7 @@ def get_reference_curves_gunungberapi():
         db.session.expunge_all()
         db.session.close()
 
-        reference_curves = {}
-        for curve in curves:
-            if curve.tipe_kurva not in reference_curves:
-                reference_curves[curve.tipe_kurva] = {"x": [], "y": []}
-            reference_curves[curve.tipe_kurva]["x"].append(curve.x)
-            reference_curves[curve.tipe_kurva]["y"].append(curve.y)
+        reference_curves = parse_reference_curves_gunungberapi(curves)
 
         logger.info(f"✅ Berhasil mengambil {len(curves)} referensi kurva Gunung Berapi.")
         return reference_curves
@@ -6,6 +6,32 @@ from app.extensions import db
 
 logger = logging.getLogger(__name__)
 
+def parse_reference_curves_longsor(curves):
+    """
+    Kelompokkan baris referensi Longsor (sudah urut tipe_kurva, x),
+    normalize key ke huruf besar & hapus duplikat x.
+    """
+    reference_curves = {}
+    for curve in curves:
+        key = curve.tipe_kurva.strip().upper()
+        reference_curves.setdefault(key, {"x": [], "y": []})
+        reference_curves[key]["x"].append(curve.x)
+        reference_curves[key]["y"].append(curve.y)
+
+    # Sort & hapus duplikat x (strictly increasing)
+    for key, data in reference_curves.items():
+        unique = []
+        last_x = None
+        for x_val, y_val in zip(data["x"], data["y"]):
+            if x_val != last_x:
+                unique.append((x_val, y_val))
+                last_x = x_val
+        xs, ys = zip(*unique)
+        reference_curves[key]["x"] = list(xs)
+        reference_curves[key]["y"] = list(ys)
+
+    return reference_curves
+
 def get_reference_curves_longsor():
     """Mengambil & memproses referensi kurva Longsor dari DB."""
     try:
@@ -21,24 +47,7 @@ def get_reference_curves_longsor():
         db.session.expunge_all()
         db.session.close()
 
-        reference_curves = {}
-        for curve in curves:
-            key = curve.tipe_kurva.strip().upper()
-            reference_curves.setdefault(key, {"x": [], "y": []})
-            reference_curves[key]["x"].append(curve.x)
-            reference_curves[key]["y"].append(curve.y)
-
-        # Sort & hapus duplikat x (strictly increasing)
-        for key, data in reference_curves.items():
-            unique = []
-            last_x = None
-            for x_val, y_val in zip(data["x"], data["y"]):
-                if x_val != last_x:
-                    unique.append((x_val, y_val))
-                    last_x = x_val
-            xs, ys = zip(*unique)
-            reference_curves[key]["x"] = list(xs)
-            reference_curves[key]["y"] = list(ys)
+        reference_curves = parse_reference_curves_longsor(curves)
 
         logger.info(f"✅ Berhasil mengambil {len(curves)} referensi kurva Longsor.")
         return reference_curves
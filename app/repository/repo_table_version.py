@@ -0,0 +1,24 @@
+# app/repository/repo_table_version.py
+
+import logging
+from sqlalchemy import text
+from app.extensions import db
+
+logger = logging.getLogger(__name__)
+
+
+def get_table_fingerprint(table: str, columns: list) -> str:
+    """
+    Sidik jari (fingerprint) isi sebuah tabel: jumlah baris + md5 dari seluruh
+    nilai kolom yang diminta. Dipakai cache in-process untuk mendeteksi
+    perubahan data tanpa harus memuat ulang seluruh baris ke Python.
+    """
+    cols = ", ".join(columns)
+    sql = text(f"""
+        SELECT
+          count(*) AS n,
+          md5(COALESCE(string_agg(s::text, ';' ORDER BY s::text), '')) AS digest
+        FROM (SELECT {cols} FROM {table}) s
+    """)
+    row = db.session.execute(sql).mappings().first()
+    return f"{row['n']}:{row['digest']}"
@@ -1,33 +1,78 @@
+import io
+import numpy as np
+import pandas as pd
 from app.models.models_database import RawGempa, RawBanjir, RawLongsor, RawGunungBerapi
 from app import db
-from geoalchemy2.shape import to_shape
+
+MODEL_MAP = {
+    'gempa': RawGempa,
+    'banjir': RawBanjir,
+    'longsor': RawLongsor,
+    'gunungberapi': RawGunungBerapi
+}
 
 class IntensitasRepo:
     @staticmethod
-    def get_points_by_bencana(bencana, kolom):
-        model_map = {
-            'gempa': RawGempa,
-            'banjir': RawBanjir,
-            'longsor': RawLongsor,
-            'gunungberapi': RawGunungBerapi
-        }
-
-        model = model_map.get(bencana)
-        if not model:
-            return []
+    def table_name(bencana):
+        model = MODEL_MAP.get(bencana)
+        return model.__tablename__ if model else None
+
+    @staticmethod
+    def has_columns(bencana, koloms):
+        """True bila bencana dikenal dan semua kolom ada di model-nya (aman dipakai di SQL)."""
+        model = MODEL_MAP.get(bencana)
+        return bool(model) and all(k in model.__table__.columns for k in koloms)
+
+    @staticmethod
+    def get_point_arrays(bencana, kolom, skip_null=False, skip_zero=False):
+        """
+        Titik intensitas sebagai array NumPy kontigu (x, y, z) lewat satu COPY
+        terproyeksi — tanpa ORM & tanpa decode WKB ke shapely per baris.
+        Koordinat dari ST_X/ST_Y(geom) (sama dengan yang dipakai raster selama ini).
+
+        kolom     : satu nama kolom → z berbentuk (n,); list kolom → z (n, band);
+                    list kosong → hanya koordinat (z berbentuk (n, 0))
+        skip_null : buang baris yang salah satu kolomnya NULL (default: NULL → 0)
+        skip_zero : buang baris yang salah satu kolomnya bernilai 0
+        Return (x, y, z); array kosong bila bencana tidak dikenal / tidak ada data.
+        """
+        single = isinstance(kolom, str)
+        koloms = [kolom] if single else list(kolom)
+        model = MODEL_MAP.get(bencana)
+        columns = set(model.__table__.columns.keys()) if model else set()
+        if not model or any(k not in columns for k in koloms):
+            empty = np.empty(0)
+            return empty, empty, (empty if single else np.empty((0, len(koloms))))
 
+        where = []
+        if skip_null:
+            where += [f"{k} IS NOT NULL" for k in koloms]
+        if skip_zero:
+            where += [f"COALESCE({k}, 0) <> 0" for k in koloms]
+        values = "".join(f", COALESCE({k}, 0)" for k in koloms)
+        copy_sql = f"""
+        COPY (
+          SELECT ST_X(geom), ST_Y(geom){values}
+          FROM {model.__tablename__}
+          {"WHERE " + " AND ".join(where) if where else ""}
+        ) TO STDOUT WITH CSV
+        """
+
+        raw_conn = db.session.connection().connection
+        cur = raw_conn.cursor()
+        buf = io.StringIO()
         try:
-            results = db.session.query(model).all()
-            points = []
-            for row in results:
-                geom = to_shape(row.geom)
-                points.append({
-                    'id_lokasi': row.id_lokasi,
-                    'x': geom.x,
-                    'y': geom.y,
-                    kolom: getattr(row, kolom, None)
-                })
-            return points
-        except Exception as e:
-            print(f"[ERROR] Gagal mengambil data {bencana}: {e}")
-            return []
+            cur.copy_expert(copy_sql, buf)
+        finally:
+            cur.close()
+        # COPY kosong (tabel kosong / semua baris tersaring) → read_csv akan EmptyDataError
+        if buf.tell() == 0:
+            empty = np.empty(0)
+            return empty, empty, (empty if single else np.empty((0, len(koloms))))
+        buf.seek(0)
+
+        arr = pd.read_csv(buf, header=None, dtype=np.float64, engine='c').to_numpy()
+        x = np.ascontiguousarray(arr[:, 0])
+        y = np.ascontiguousarray(arr[:, 1])
+        z = np.ascontiguousarray(arr[:, 2] if single else arr[:, 2:])
+        return x, y, z
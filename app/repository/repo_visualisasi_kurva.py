@@ -1,21 +1,50 @@
+from app.extensions import db
 from app.models.models_database import (
     GempaReferenceCurve,
     BanjirReferenceCurve,
     GunungBerapiReferenceCurve,
     LongsorReferenceCurve,
 )
+from app.repository.repo_table_version import get_table_fingerprint
 
-def get_disaster_data(disaster_type):
-    model_map = {
-        "gempa": GempaReferenceCurve,
-        "banjir": BanjirReferenceCurve,
-        "gunungberapi": GunungBerapiReferenceCurve,
-        "longsor": LongsorReferenceCurve,
-    }
-
-    model = model_map.get(disaster_type)
+MODEL_MAP = {
+    "gempa": GempaReferenceCurve,
+    "banjir": BanjirReferenceCurve,
+    "gunungberapi": GunungBerapiReferenceCurve,
+    "longsor": LongsorReferenceCurve,
+}
+
+
+def _get_model(disaster_type):
+    model = MODEL_MAP.get(disaster_type)
     if not model:
         raise ValueError(f"Unknown disaster type: {disaster_type}")
+    return model
 
+
+def get_disaster_data(disaster_type):
+    model = _get_model(disaster_type)
     rows = model.query.order_by(model.x.asc()).all()
     return [(row.x, row.y) for row in rows]
+
+
+def get_reference_rows(disaster_type):
+    """
+    Ambil (tipe_kurva, x, y) referensi kurva, urut per tipe_kurva lalu x.
+    Hanya kolom yang dibutuhkan, tanpa membangun objek ORM per baris.
+    """
+    model = _get_model(disaster_type)
+    return (
+        db.session
+          .query(model.tipe_kurva, model.x, model.y)
+          .order_by(model.tipe_kurva, model.x)
+          .all()
+    )
+
+
+def get_reference_fingerprint(disaster_type):
+    """Fingerprint tabel referensi kurva, untuk deteksi perubahan."""
+    model = _get_model(disaster_type)
+    return get_table_fingerprint(
+        model.__tablename__, ["id_referensi", "tipe_kurva", "x", "y"]
+    )
@@ -1,4 +1,4 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request
 from app.controller.controller_buffer_hazard import BufferDisasterController
 
 bp = Blueprint(
@@ -45,7 +45,30 @@ def get_buffer(dtype: str):
         field=field,
         tol=tol
     )
-    return jsonify(fc)
+    return Response(fc, mimetype="application/json")
+
+
+@bp.route("/<dtype>/<int:z>/<int:x>/<int:y>.mvt", methods=["GET"])
+def get_buffer_tile(dtype: str, z: int, x: int, y: int):
+    field = request.args.get("field")
+    if not field:
+        return jsonify({"error": "Parameter field wajib"}), 400
+
+    # Delegate to controller
+    tile, error, status = BufferDisasterController.get_buffer_tile(
+        dtype=dtype,
+        field=field,
+        z=z,
+        x=x,
+        y=y
+    )
+    if error:
+        return jsonify({"error": error}), status
+
+    resp = Response(tile, mimetype="application/vnd.mapbox-vector-tile")
+    max_age = current_app.config.get("TILE_CACHE_MAX_AGE", 300)
+    resp.headers["Cache-Control"] = f"public, max-age={max_age}"
+    return resp
 
 
 @bp.route("/<dtype>/nearest", methods=["GET"])
@@ -1,52 +1,55 @@
 from flask import Blueprint
-from app.controller.controller_crud_bangunan import BangunanController
+from app.startup import LazyView
+
+# Controller (→ pandas & service_directloss) di-import saat request pertama
+_CTRL = 'app.controller.controller_crud_bangunan:BangunanController'
 
 bangunan_bp = Blueprint("bangunan_bp", __name__, url_prefix="/api")
 
 # CRUD endpoints
 bangunan_bp.add_url_rule(
-    "/bangunan", view_func=BangunanController.get_all, methods=["GET"]
+    "/bangunan", endpoint="get_all", view_func=LazyView(f"{_CTRL}.get_all"), methods=["GET"]
 )
 bangunan_bp.add_url_rule(
     "/bangunan/<string:bangunan_id>",
-    view_func=BangunanController.get_by_id,
+    endpoint="get_by_id", view_func=LazyView(f"{_CTRL}.get_by_id"),
     methods=["GET"]
 )
 bangunan_bp.add_url_rule(
-    "/bangunan", view_func=BangunanController.create, methods=["POST"]
+    "/bangunan", endpoint="create", view_func=LazyView(f"{_CTRL}.create"), methods=["POST"]
 )
 bangunan_bp.add_url_rule(
     "/bangunan/<string:bangunan_id>",
-    view_func=BangunanController.update,
+    endpoint="update", view_func=LazyView(f"{_CTRL}.update"),
     methods=["PUT"]
 )
 bangunan_bp.add_url_rule(
     "/bangunan/<string:bangunan_id>/<string:prov>",
-    view_func=BangunanController.delete,
+    endpoint="delete", view_func=LazyView(f"{_CTRL}.delete"),
     methods=["DELETE"]
 )
 
 # Helper untuk generate ID, dan daftar provinsi/kota
 bangunan_bp.add_url_rule(
-    "/bangunan/new-id", view_func=BangunanController.new_id, methods=["GET"]
+    "/bangunan/new-id", endpoint="new_id", view_func=LazyView(f"{_CTRL}.new_id"), methods=["GET"]
 )
 bangunan_bp.add_url_rule(
-    "/bangunan/provinsi", view_func=BangunanController.get_provinsi_list, methods=["GET"]
+    "/bangunan/provinsi", endpoint="get_provinsi_list", view_func=LazyView(f"{_CTRL}.get_provinsi_list"), methods=["GET"]
 )
 bangunan_bp.add_url_rule(
-    "/bangunan/kota", view_func=BangunanController.get_kota_list, methods=["GET"]
+    "/bangunan/kota", endpoint="get_kota_list", view_func=LazyView(f"{_CTRL}.get_kota_list"), methods=["GET"]
 )
 
 # Endpoint untuk upload CSV
 bangunan_bp.add_url_rule(
     "/bangunan/upload",
-    view_func=BangunanController.upload_csv,
+    endpoint="upload_csv", view_func=LazyView(f"{_CTRL}.upload_csv"),
     methods=["POST"]
 )
 
 # Recalc directloss & AAL untuk satu bangunan
 bangunan_bp.add_url_rule(
     "/bangunan/<string:bangunan_id>/recalc",
-    view_func=BangunanController.recalc,
+    endpoint="recalc", view_func=LazyView(f"{_CTRL}.recalc"),
     methods=["POST"]
 )
@@ -1,8 +1,8 @@
-from app.controller.controller_directloss import home, process_data
+from app.startup import LazyView
 
 def setup_join_routes(app):
     """
     Menetapkan rute API untuk pemrosesan data.
     """
-    app.add_url_rule('/', 'home', home, methods=['GET'])
-    app.add_url_rule('/process_join', 'process_data', process_data, methods=['GET'])
+    app.add_url_rule('/', 'home', LazyView('app.controller.controller_directloss:home'), methods=['GET'])
+    app.add_url_rule('/process_join', 'process_data', LazyView('app.controller.controller_directloss:process_data'), methods=['GET'])
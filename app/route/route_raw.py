@@ -1,10 +1,5 @@
-from flask import Blueprint
-from app.controller.controller_kurva import (
-    process_kurva_gempa,
-    process_kurva_banjir,
-    process_kurva_longsor,
-    process_kurva_gunungberapi
-)
+from flask import Blueprint, current_app, jsonify
+from app.startup import LazyView
 
 # Buat Blueprint
 main_bp = Blueprint('main', __name__)
@@ -14,19 +9,30 @@ main_bp = Blueprint('main', __name__)
 def index():
     return {"message": "Welcome to the main route!"}
 
-# Route untuk setiap jenis bencana
-@main_bp.route('/process_kurva_gempa', methods=['GET'])
-def process_gempa():
-    return process_kurva_gempa()
-
-@main_bp.route('/process_kurva_banjir', methods=['GET'])
-def process_banjir():
-    return process_kurva_banjir()
+# Readiness: 200 setelah warm-up background selesai, 503 selama masih berjalan
+@main_bp.route('/api/ready')
+def ready():
+    state = current_app.extensions['warm_up']
+    return jsonify(state.to_dict()), (200 if state.ready else 503)
 
-@main_bp.route('/process_kurva_longsor', methods=['GET'])
-def process_longsor():
-    return process_kurva_longsor()
-
-@main_bp.route('/process_kurva_gunungberapi', methods=['GET'])
-def process_gunungberapi():
-    return process_kurva_gunungberapi()
+# Route untuk setiap jenis bencana (controller di-import saat request pertama)
+main_bp.add_url_rule(
+    '/process_kurva_gempa', 'process_gempa',
+    LazyView('app.controller.controller_kurva:process_kurva_gempa'), methods=['GET']
+)
+main_bp.add_url_rule(
+    '/process_kurva_banjir', 'process_banjir',
+    LazyView('app.controller.controller_kurva:process_kurva_banjir'), methods=['GET']
+)
+main_bp.add_url_rule(
+    '/process_kurva_longsor', 'process_longsor',
+    LazyView('app.controller.controller_kurva:process_kurva_longsor'), methods=['GET']
+)
+main_bp.add_url_rule(
+    '/process_kurva_gunungberapi', 'process_gunungberapi',
+    LazyView('app.controller.controller_kurva:process_kurva_gunungberapi'), methods=['GET']
+)
+main_bp.add_url_rule(
+    '/process_kurva_all', 'process_all',
+    LazyView('app.controller.controller_kurva:process_kurva_all'), methods=['GET']
+)
@@ -0,0 +1,21 @@
+# app/route/route_tile_hazard.py
+
+from flask import Blueprint
+from app.startup import LazyView
+
+tile_bp = Blueprint('tile_hazard', __name__)
+
+_CONTROLLER = 'app.controller.controller_tile_hazard'
+
+tile_bp.add_url_rule(
+    '/api/tiles/hazard/<bencana>/<kolom>/<int:z>/<int:x>/<int:y>.png', 'get_hazard_tile',
+    LazyView(f'{_CONTROLLER}:get_hazard_tile_controller'), methods=['GET']
+)
+tile_bp.add_url_rule(
+    '/api/legend/hazard/<bencana>/<kolom>', 'get_hazard_legend',
+    LazyView(f'{_CONTROLLER}:get_hazard_legend_controller'), methods=['GET']
+)
+tile_bp.add_url_rule(
+    '/api/tiles/cache-stats', 'tile_cache_stats',
+    LazyView(f'{_CONTROLLER}:tile_cache_stats'), methods=['GET']
+)
@@ -1,4 +1,45 @@
-from app.controller.controller_visualisasi_hazard import bencana_bp
+from flask import Blueprint
+from app.startup import LazyView
+
+bencana_bp = Blueprint('bencana_bp', __name__)
+
+_CONTROLLER = 'app.controller.controller_visualisasi_hazard'
+
+bencana_bp.add_url_rule(
+    '/generate-raster/<bencana>/<kolom>', 'generate_raster',
+    LazyView(f'{_CONTROLLER}:generate_raster'), methods=['GET']
+)
+bencana_bp.add_url_rule(
+    '/generate-all-raster', 'generate_all_raster',
+    LazyView(f'{_CONTROLLER}:generate_all_raster'), methods=['GET']
+)
+bencana_bp.add_url_rule(
+    '/geoserver/upload-all', 'upload_all_to_geoserver',
+    LazyView(f'{_CONTROLLER}:upload_all_to_geoserver'), methods=['GET']
+)
+bencana_bp.add_url_rule(
+    '/generate-dmgratio-raster/<bencana>/<kolom>', 'generate_dmgratio_raster',
+    LazyView(f'{_CONTROLLER}:generate_dmgratio_raster'), methods=['GET']
+)
+bencana_bp.add_url_rule(
+    '/generate-all-dmgratio-raster', 'generate_all_dmgratio_raster',
+    LazyView(f'{_CONTROLLER}:generate_all_dmgratio_raster'), methods=['GET']
+)
+bencana_bp.add_url_rule(
+    '/api/dmgratio/<bencana>/<kolom>/sample', 'sample_dmgratio',
+    LazyView(f'{_CONTROLLER}:sample_dmgratio'), methods=['GET']
+)
+
+# Sampling raster via .npy memory-map (tanpa DB)
+_SAMPLING = 'app.controller.controller_hazard_sampling'
+bencana_bp.add_url_rule(
+    '/api/hazard/<bencana>/<kolom>/sample', 'sample_hazard_point',
+    LazyView(f'{_SAMPLING}:sample_hazard_point'), methods=['GET']
+)
+bencana_bp.add_url_rule(
+    '/api/hazard/<bencana>/sample', 'sample_hazard_batch',
+    LazyView(f'{_SAMPLING}:sample_hazard_batch'), methods=['POST']
+)
 
 def register_visualisasi_routes_hazard(app):
     app.register_blueprint(bencana_bp)
@@ -1,12 +1,14 @@
 # app/route/route_visualisasi_kurva.py
 
 from flask import Blueprint
-from app.controller.controller_visualisasi_kurva import get_disaster_curves_controller
+from app.startup import LazyView
 
 # Pastikan Blueprint ini bernama disaster_curve_bp
 disaster_curve_bp = Blueprint('visualisasi_kurva', __name__)
 
 # Daftarkan route pada objek disaster_curve_bp
-disaster_curve_bp.route('/api/disaster-curves', methods=['GET'])(
-    get_disaster_curves_controller
+disaster_curve_bp.add_url_rule(
+    '/api/disaster-curves', 'get_disaster_curves_controller',
+    LazyView('app.controller.controller_visualisasi_kurva:get_disaster_curves_controller'),
+    methods=['GET']
 )
@@ -1,8 +1,135 @@
-import json, logging
-from app.repository.repo_buffer_hazard import get_buffered_features, get_nearest_point
+import json, math, struct, logging, threading
+import numpy as np
+from flask import current_app
+from app.cache import LRUCache
+from app.repository.repo_buffer_hazard import (
+    TYPE_CFG, get_buffered_features, get_materialized_tile_features, get_buffer_mvt, get_nearest_point,
+)
+from app.service.service_buffer_materialize import (
+    materialized_state, materialized_tolerances, nearest_level,
+)
 
 logger = logging.getLogger(__name__)
 
+MVT_MAX_ZOOM = 16
+# Default toleransi simplify vector tile (piksel tile 256) & batas fitur per zoom minimum
+DEFAULT_MVT_TOLERANCE_PX = 0.5
+DEFAULT_MVT_FEATURE_LIMITS = {0: 2000, 6: 5000, 9: 10000, 12: 20000}
+
+# Cache respons bbox: batas memori (MB) & ukuran sel grid = toleransi level × faktor
+DEFAULT_BUFFER_CACHE_MAX_MB = 32
+DEFAULT_BUFFER_CACHE_TILE_FACTOR = 500
+# Pembungkus FeatureCollection & ukuran potongan respons streaming
+FC_HEAD = b'{"type":"FeatureCollection","features":['
+FC_TAIL = b']}'
+STREAM_CHUNK_BYTES = 64 * 1024
+
+# Maks sel per request; sel diperbesar ×2 (grid tetap per kelipatan) bila bbox sangat luas
+MAX_CACHE_CELLS = 1024
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_buffer_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            max_mb = current_app.config.get('BUFFER_CACHE_MAX_MB') or DEFAULT_BUFFER_CACHE_MAX_MB
+            _cache = LRUCache(int(max_mb * 1024 * 1024), current_app.config.get('BUFFER_CACHE_DIR'))
+        return _cache
+
+
+def invalidate_buffer_cache(dtype=None):
+    """Dipanggil setelah tabel buffer di-refresh; sel cache lama dibuang."""
+    return get_buffer_cache().invalidate_prefix("buffer/" + (f"{dtype}/" if dtype else ""))
+
+
+def feature_bytes(field: str, value, geojson: str) -> bytes:
+    """Satu Feature GeoJSON; geometry = teks ST_AsGeoJSON disisipkan apa adanya."""
+    return b'{"type":"Feature","properties":{"%s":%s},"geometry":%s}' % (
+        field.encode(), json.dumps(value).encode(), geojson.encode()
+    )
+
+
+def stream_feature_collection(fragments):
+    """Bungkus iterator Feature (bytes) menjadi FeatureCollection, dikirim per potongan ±64 KB."""
+    yield FC_HEAD
+    chunk, size, sep = [], 0, b""
+    for fragment in fragments:
+        chunk.append(fragment)
+        size += len(fragment)
+        if size >= STREAM_CHUNK_BYTES:
+            yield sep + b",".join(chunk)
+            chunk, size, sep = [], 0, b","
+    if chunk:
+        yield sep + b",".join(chunk)
+    yield FC_TAIL
+
+
+def pack_cell(bounds: list, fragments: list) -> bytes:
+    """
+    Entry cache satu sel: jumlah fitur (uint32), bbox per fitur (float64 ×4),
+    offset (uint64, n+1) lalu Feature bytes yang disambung.
+    """
+    n = len(fragments)
+    offsets = np.zeros(n + 1, dtype="<u8")
+    offsets[1:] = np.cumsum([len(f) for f in fragments])
+    return b"".join([
+        struct.pack("<I", n),
+        np.asarray(bounds, dtype="<f8").reshape(n, 4).tobytes(),
+        offsets.tobytes(),
+        *fragments,
+    ])
+
+
+def unpack_cell(payload: bytes):
+    """Kebalikan pack_cell tanpa menyalin/parse Feature: (bounds, offsets, blob)."""
+    n = struct.unpack_from("<I", payload)[0]
+    pos = 4
+    bounds = np.frombuffer(payload, dtype="<f8", count=n * 4, offset=pos).reshape(n, 4)
+    pos += n * 32
+    offsets = np.frombuffer(payload, dtype="<u8", count=n + 1, offset=pos)
+    blob = memoryview(payload)[pos + (n + 1) * 8:]
+    if len(blob) != offsets[-1]:
+        raise ValueError("entry cache sel buffer rusak")
+    return bounds, offsets, blob
+
+
+def cell_fragments(cell, bbox: dict):
+    """Feature bytes dalam satu sel yang bbox-nya beririsan dengan bbox request."""
+    bounds, offsets, blob = cell
+    hit = (
+        (bounds[:, 2] >= bbox["minlng"]) & (bounds[:, 0] <= bbox["maxlng"])
+        & (bounds[:, 3] >= bbox["minlat"]) & (bounds[:, 1] <= bbox["maxlat"])
+    )
+    for i in np.flatnonzero(hit):
+        yield blob[offsets[i]:offsets[i + 1]]
+
+
+def cover_cells(bbox: dict, cell_deg: float, margin_deg: float):
+    """
+    Sel grid yang pojok kiri-bawah buffer-nya mungkin memuat fitur yang beririsan
+    dengan bbox: bbox diperluas ke kiri/bawah sejauh diameter buffer (margin_deg).
+    """
+    tx0 = math.floor((bbox["minlng"] - margin_deg) / cell_deg)
+    ty0 = math.floor((bbox["minlat"] - margin_deg) / cell_deg)
+    tx1 = math.floor(bbox["maxlng"] / cell_deg)
+    ty1 = math.floor(bbox["maxlat"] / cell_deg)
+    return [(tx, ty) for tx in range(tx0, tx1 + 1) for ty in range(ty0, ty1 + 1)]
+
+
+def mvt_tolerance(z: int) -> float:
+    """Toleransi simplify (derajat) sebanding ukuran piksel tile pada zoom z."""
+    px = current_app.config.get('BUFFER_MVT_TOLERANCE_PX', DEFAULT_MVT_TOLERANCE_PX)
+    return px * 360.0 / (256 * 2 ** z)
+
+
+def mvt_feature_limit(z: int) -> int:
+    limits = current_app.config.get('BUFFER_MVT_FEATURE_LIMITS') or DEFAULT_MVT_FEATURE_LIMITS
+    return limits[max((k for k in limits if k <= z), default=min(limits))]
+
+
 class BufferDisasterService:
 
     @staticmethod
@@ -12,25 +139,97 @@ class BufferDisasterService:
         :param field: kolom intensitas yang diminta
         :param bbox: bounding box dict
         :param tol: simplify tolerance
+        :return: iterator bytes FeatureCollection GeoJSON (untuk respons streaming);
+                 teks ST_AsGeoJSON disambung apa adanya, tanpa json.loads
+        """
+        # buffer tersimpan (level toleransi terdekat, per sel grid ter-cache);
+        # on-the-fly selama tabel basi/belum ada
+        fragments = None
+        state = materialized_state(dtype)
+        if state and field in TYPE_CFG[dtype]["fields"]:
+            fragments = BufferDisasterService._cached_fragments(dtype, field, bbox, tol, state)
+        if fragments is None:
+            fragments = [
+                feature_bytes(field, getattr(row, "_mapping", row)["value"], row.geojson)
+                for row in get_buffered_features(dtype, field, bbox, tol)
+                if row.geojson
+            ]
+        return stream_feature_collection(fragments)
+
+    @staticmethod
+    def _cached_fragments(dtype: str, field: str, bbox: dict, tol: float, state: dict):
+        """
+        Feature GeoJSON (bytes) buffer tersimpan yang bbox-nya beririsan dengan bbox
+        request. bbox di-snap ke grid sel tetap; isi tiap sel di-cache (LRU memori +
+        disk opsional) per (dtype, revisi tabel, field, level, sel), sehingga viewport
+        yang sedikit bergeser memakai sel yang sama. None bila query gagal.
+        """
+        tolerances = state["tolerances"]
+        level = nearest_level(tol, tolerances)
+        cell_deg = tolerances[level] * (
+            current_app.config.get('BUFFER_CACHE_TILE_FACTOR') or DEFAULT_BUFFER_CACHE_TILE_FACTOR
+        )
+        # diameter buffer (derajat bujur melebar menjauhi ekuator)
+        max_lat = min(max(abs(bbox["minlat"]), abs(bbox["maxlat"])), 80.0)
+        margin = 2.02 * TYPE_CFG[dtype]["buffer_deg"] / math.cos(math.radians(max_lat))
+
+        cover = cover_cells(bbox, cell_deg, margin)
+        while len(cover) > MAX_CACHE_CELLS:
+            cell_deg *= 2
+            cover = cover_cells(bbox, cell_deg, margin)
+
+        cache = get_buffer_cache()
+        prefix = f"buffer/{dtype}/{state['revision']}/{field}/{level}/{cell_deg:g}/"
+        cells = []
+        missing = []
+        for tx, ty in cover:
+            payload = cache.get(f"{prefix}{tx}_{ty}")
+            if payload is not None:
+                try:
+                    cells.append(unpack_cell(payload))
+                    continue
+                except (ValueError, struct.error):
+                    logger.warning(f"⚠️ Entry cache {prefix}{tx}_{ty} tidak terbaca, query ulang")
+            missing.append((tx, ty))
+
+        if missing:
+            fetched = get_materialized_tile_features(dtype, field, level, cell_deg, missing)
+            if fetched is None:
+                return None
+            grouped = {cell: ([], []) for cell in missing}
+            for r in fetched:
+                bounds, frags = grouped[(r.tx, r.ty)]
+                bounds.append((r.xmin, r.ymin, r.xmax, r.ymax))
+                frags.append(feature_bytes(field, r.value, r.geojson))
+            for cell, (bounds, frags) in grouped.items():
+                payload = pack_cell(bounds, frags)
+                cache.set(f"{prefix}{cell[0]}_{cell[1]}", payload)
+                cells.append(unpack_cell(payload))
+
+        return (
+            fragment
+            for cell in cells
+            for fragment in cell_fragments(cell, bbox)
+        )
+
+    @staticmethod
+    def is_valid_field(dtype: str, field: str) -> bool:
+        return field in TYPE_CFG.get(dtype, {}).get("fields", [])
+
+    @staticmethod
+    def get_mvt_tile(dtype: str, field: str, z: int, x: int, y: int):
+        """
+        Vector tile buffer hazard (bytes MVT) dengan simplify sesuai zoom.
+        Return (tile, error); tile kosong (b"") berarti tidak ada fitur di tile.
+        dtype/field/koordinat tile diasumsikan sudah divalidasi pemanggil.
         """
-        # panggil repo dengan signature baru: dtype, field, bbox, tol
-        rows = get_buffered_features(dtype, field, bbox, tol)
-        features = []
-        for row in rows:
-            geojson_str = row.geojson
-            if not geojson_str:
-                continue
-            geom = json.loads(geojson_str)
-            mapping = getattr(row, "_mapping", row)
-            # hanya satu properti sesuai lazy‑load field
-            props = { field: mapping["value"] }
-
-            features.append({
-                "type": "Feature",
-                "properties": props,
-                "geometry": geom
-            })
-        return {"type":"FeatureCollection","features":features}
+        tol = mvt_tolerance(z)
+        tolerances = materialized_tolerances(dtype)
+        level = nearest_level(tol, tolerances) if tolerances else None
+        tile = get_buffer_mvt(dtype, field, z, x, y, tol, mvt_feature_limit(z), level)
+        if tile is None:
+            return None, "Gagal membuat vector tile"
+        return tile, None
 
     @staticmethod
     def get_nearest(dtype: str, field: str, lat: float, lng: float):
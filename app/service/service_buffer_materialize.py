@@ -0,0 +1,153 @@
+# app/service/service_buffer_materialize.py
+
+import math
+import time
+import hashlib
+import logging
+import threading
+
+from flask import current_app, has_app_context
+
+from app.repository.repo_buffer_hazard import (
+    TYPE_CFG,
+    get_source_fingerprint,
+    get_buffer_state,
+    refresh_buffer_table,
+)
+
+logger = logging.getLogger(__name__)
+
+# Level toleransi simplify default (derajat) & interval cek fingerprint (detik)
+DEFAULT_BUFFER_TOLERANCES = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01)
+DEFAULT_CHECK_INTERVAL = 30
+
+# dtype → ({'tolerances', 'revision'} tabel tersimpan atau None, waktu cek terakhir)
+_levels = {}
+_refreshing = set()
+_lock = threading.Lock()
+
+
+def _config(key, default):
+    if has_app_context():
+        return current_app.config.get(key) or default
+    return default
+
+
+def configured_tolerances():
+    return sorted(float(t) for t in _config('BUFFER_TOLERANCES', DEFAULT_BUFFER_TOLERANCES))
+
+
+def nearest_level(tol, tolerances):
+    """Indeks level dengan toleransi terdekat ke `tol` (jarak di skala log)."""
+    tol = max(float(tol), 1e-12)
+    return min(range(len(tolerances)), key=lambda i: abs(math.log(tolerances[i] / tol)))
+
+
+def buffer_revision(dtype, fingerprint, tolerances):
+    """Revisi pendek isi tabel buffer (dipakai di key cache respons /api/buffer)."""
+    raw = f"{fingerprint}|{tolerances}|{TYPE_CFG[dtype]['buffer_deg']}"
+    return hashlib.md5(raw.encode()).hexdigest()[:12]
+
+
+def refresh_buffers(dtype, force=False):
+    """
+    Hitung ulang tabel hazard_buffer_<dtype> bila fingerprint model_intensitas_*,
+    level toleransi, atau jarak buffer berubah sejak refresh terakhir.
+    Return laporan {'dtype', 'status': fresh|refreshed|error, 'rows', 'ms'}.
+    """
+    t0 = time.perf_counter()
+    tolerances = configured_tolerances()
+    report = {'dtype': dtype, 'tolerances': tolerances}
+    try:
+        fingerprint = get_source_fingerprint(dtype)
+        state = get_buffer_state(dtype)
+        if not force and _is_current(state, dtype, fingerprint, tolerances):
+            report.update(status='fresh', rows=state['n_rows'])
+        else:
+            logger.info(f"🔄 Refresh buffer {dtype} ({len(tolerances)} level toleransi)")
+            rows, refreshed = refresh_buffer_table(dtype, tolerances, fingerprint, force=force)
+            if refreshed:
+                report.update(status='refreshed', rows=rows)
+                logger.info(f"✅ Buffer {dtype}: {rows} baris dalam {(time.perf_counter() - t0):.1f} s")
+                from app.service.service_buffer_hazard import invalidate_buffer_cache
+                invalidate_buffer_cache(dtype)
+            else:
+                # refresh lain (proses/CLI) selesai lebih dulu dengan fingerprint yang sama
+                report.update(status='fresh', rows=rows)
+        state = {'tolerances': tolerances, 'revision': buffer_revision(dtype, fingerprint, tolerances)}
+        with _lock:
+            _levels[dtype] = (state, time.monotonic())
+    except Exception as e:
+        logger.error(f"❌ Gagal refresh buffer {dtype}: {e}")
+        report.update(status='error', message=str(e))
+    report['ms'] = round((time.perf_counter() - t0) * 1000, 1)
+    return report
+
+
+def refresh_all_buffers(force=False):
+    return [refresh_buffers(dtype, force=force) for dtype in TYPE_CFG]
+
+
+def _is_current(state, dtype, fingerprint, tolerances):
+    return (
+        state is not None
+        and fingerprint is not None
+        and state['fingerprint'] == fingerprint
+        and sorted(state['tolerances']) == tolerances
+        and state['buffer_deg'] == TYPE_CFG[dtype]['buffer_deg']
+    )
+
+
+def _refresh_in_background(dtype):
+    with _lock:
+        if dtype in _refreshing:
+            return
+        _refreshing.add(dtype)
+    app = current_app._get_current_object()
+
+    def run():
+        try:
+            with app.app_context():
+                refresh_buffers(dtype)
+        finally:
+            with _lock:
+                _refreshing.discard(dtype)
+
+    threading.Thread(target=run, name=f'buffer-refresh-{dtype}', daemon=True).start()
+
+
+def materialized_state(dtype):
+    """
+    {'tolerances', 'revision'} tabel buffer tersimpan bila isinya masih sesuai
+    model_intensitas_*, selain itu None (pemanggil pakai buffer on-the-fly). Fingerprint
+    dicek paling sering tiap BUFFER_CHECK_INTERVAL detik; bila basi, refresh
+    dijalankan di background.
+    """
+    if dtype not in TYPE_CFG:
+        return None
+    interval = _config('BUFFER_CHECK_INTERVAL', DEFAULT_CHECK_INTERVAL)
+    now = time.monotonic()
+    with _lock:
+        cached = _levels.get(dtype)
+    if cached is not None and now - cached[1] < interval:
+        return cached[0]
+
+    tolerances = configured_tolerances()
+    fingerprint = get_source_fingerprint(dtype)
+    current = _is_current(get_buffer_state(dtype), dtype, fingerprint, tolerances)
+    state = None
+    if current:
+        state = {'tolerances': tolerances, 'revision': buffer_revision(dtype, fingerprint, tolerances)}
+    with _lock:
+        _levels[dtype] = (state, now)
+    if not current:
+        logger.info(f"⚠️ Buffer tersimpan {dtype} basi/belum ada, memakai buffer on-the-fly")
+        if current_app.config.get('BUFFER_AUTO_REFRESH', True):
+            _refresh_in_background(dtype)
+    return state
+
+
+def materialized_tolerances(dtype):
+    """Level toleransi tabel buffer tersimpan yang masih segar, atau None."""
+    state = materialized_state(dtype)
+    return state['tolerances'] if state else None
@@ -0,0 +1,159 @@
+# app/service/service_clip_mask.py
+
+import os
+import time
+import logging
+import tempfile
+import threading
+
+import numpy as np
+from flask import current_app, has_app_context
+from rasterio.features import rasterize
+from rasterio.transform import from_origin
+
+from app.repository.repo_clip_boundary import (
+    get_provinsi_fingerprint,
+    compute_provinsi_union,
+    get_clip_boundary,
+    get_any_clip_boundary,
+    save_clip_boundary,
+    update_mask_path,
+    clip_geometry,
+)
+
+logger = logging.getLogger(__name__)
+
+# Default interval (detik) cek fingerprint tabel provinsi
+DEFAULT_CHECK_INTERVAL = 30
+
+
+def _config(key, default):
+    if has_app_context():
+        return current_app.config.get(key) or default
+    return default
+
+
+class ClipGrid:
+    """
+    Definisi grid raster nasional untuk satu pixel_size: union batas provinsi,
+    bounds, ukuran grid, transform, dan mask daratan hasil rasterize (uint8 0/1).
+    """
+
+    def __init__(self, fingerprint, pixel_size, geometry, bounds, width, height, mask):
+        self.fingerprint = fingerprint
+        self.pixel_size = pixel_size
+        self.geometry = geometry
+        self.minx, self.miny, self.maxx, self.maxy = bounds
+        self.width = width
+        self.height = height
+        self.mask = mask
+        self.transform = from_origin(self.minx, self.maxy, pixel_size, pixel_size)
+
+    @property
+    def bounds(self):
+        return self.minx, self.miny, self.maxx, self.maxy
+
+    @property
+    def land(self):
+        return self.mask == 1
+
+    @property
+    def xi(self):
+        return np.linspace(self.minx, self.maxx, self.width)
+
+    @property
+    def yi(self):
+        return np.linspace(self.maxy, self.miny, self.height)  # flipped so origin top-left
+
+
+def grid_shape(bounds, pixel_size):
+    minx, miny, maxx, maxy = bounds
+    width = int(np.ceil((maxx - minx) / pixel_size))
+    height = int(np.ceil((maxy - miny) / pixel_size))
+    return width, height
+
+
+def rasterize_land_mask(geometry, bounds, pixel_size):
+    width, height = grid_shape(bounds, pixel_size)
+    minx, _, _, maxy = bounds
+    return rasterize(
+        shapes=[(geometry, 1)],
+        out_shape=(height, width),
+        transform=from_origin(minx, maxy, pixel_size, pixel_size),
+        fill=0,
+        default_value=1,
+        dtype='uint8'
+    )
+
+
+def _mask_path(fingerprint, pixel_size):
+    folder = _config('CLIP_CACHE_FOLDER', os.path.join(tempfile.gettempdir(), 'clip_cache'))
+    os.makedirs(folder, exist_ok=True)
+    digest = fingerprint.split(':')[-1][:12]
+    return os.path.join(folder, f'land_mask_{digest}_{pixel_size:g}.npy')
+
+
+def _build(fingerprint, pixel_size):
+    row = get_clip_boundary(fingerprint, pixel_size)
+    if row is not None:
+        geometry = clip_geometry(row)
+        bounds = (row.minx, row.miny, row.maxx, row.maxy)
+        if os.path.exists(row.mask_path):
+            logger.info(f"📂 Memuat mask daratan dari cache {row.mask_path}")
+            mask = np.load(row.mask_path)
+        else:
+            logger.info("🧩 File mask hilang, rasterize ulang dari geometri tersimpan...")
+            mask = rasterize_land_mask(geometry, bounds, pixel_size)
+            path = _mask_path(fingerprint, pixel_size)
+            np.save(path, mask)
+            update_mask_path(row, path)
+        return ClipGrid(fingerprint, pixel_size, geometry, bounds, row.width, row.height, mask)
+
+    # Geometri union dipakai ulang dari grid lain bila provinsi tidak berubah
+    other = get_any_clip_boundary(fingerprint)
+    geometry = clip_geometry(other) if other is not None else compute_provinsi_union()
+    bounds = geometry.bounds
+    width, height = grid_shape(bounds, pixel_size)
+
+    logger.info(f"🧩 Rasterize mask daratan {width} x {height} (pixel {pixel_size})...")
+    mask = rasterize_land_mask(geometry, bounds, pixel_size)
+    path = _mask_path(fingerprint, pixel_size)
+    np.save(path, mask)
+    save_clip_boundary(fingerprint, pixel_size, geometry, bounds, width, height, path)
+    logger.info(f"💾 Cache clip_boundary tersimpan ({path})")
+    return ClipGrid(fingerprint, pixel_size, geometry, bounds, width, height, mask)
+
+
+_lock = threading.Lock()
+_grids = {}  # pixel_size → (ClipGrid, checked_at)
+
+
+def get_clip_grid(pixel_size):
+    """
+    ClipGrid untuk pixel_size. Urutan sumber: memori proses → tabel clip_boundary
+    + file .npy → hitung ulang (union provinsi + rasterize) lalu simpan.
+    Cache dianggap basi bila fingerprint tabel provinsi berubah (dicek paling
+    sering tiap CLIP_CACHE_CHECK_INTERVAL detik).
+    """
+    interval = _config('CLIP_CACHE_CHECK_INTERVAL', DEFAULT_CHECK_INTERVAL)
+    with _lock:
+        cached = _grids.get(pixel_size)
+        now = time.monotonic()
+        if cached is not None and now - cached[1] < interval:
+            return cached[0]
+
+        fingerprint = get_provinsi_fingerprint()
+        if cached is not None and cached[0].fingerprint == fingerprint:
+            _grids[pixel_size] = (cached[0], now)
+            return cached[0]
+        if cached is not None:
+            logger.info("♻️ Tabel provinsi berubah, membangun ulang clip grid...")
+
+        grid = _build(fingerprint, pixel_size)
+        _grids[pixel_size] = (grid, now)
+        return grid
+
+
+def invalidate_clip_grid():
+    with _lock:
+        _grids.clear()
@@ -0,0 +1,205 @@
+# app/service/service_hazard_sampling.py
+
+import os
+import glob
+import json
+import uuid
+import logging
+import tempfile
+import threading
+
+import numpy as np
+
+from app.repository.repo_visualisasi_hazard import MODEL_MAP
+from app.service.service_raster_codec import QUANT_NODATA, encode, decode, read_values
+
+logger = logging.getLogger(__name__)
+
+# Kolom non-intensitas pada tabel model_intensitas_*
+_NON_INTENSITY = {'id_lokasi', 'lon', 'lat', 'geom'}
+
+
+def is_valid_layer(bencana, kolom):
+    model = MODEL_MAP.get(bencana)
+    if model is None:
+        return False
+    return kolom in model.__table__.columns.keys() and kolom not in _NON_INTENSITY
+
+
+def sidecar_paths(bencana, kolom):
+    """(prefix, .json) di samping GeoTIFF {bencana}_{kolom}_clipped.tif; array ada di {prefix}.{versi}.npy."""
+    base = os.path.join(tempfile.gettempdir(), f'{bencana}_{kolom}_clipped')
+    return base, f'{base}.json'
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _npy_path(meta_path, meta):
+    """Path .npy yang dirujuk metadata; None untuk sidecar lama tanpa versi."""
+    name = (meta or {}).get('npy')
+    return os.path.join(os.path.dirname(meta_path), name) if name else None
+
+
+def write_sidecar(bencana, kolom, data, transform, nodata, fingerprint=None, scale=None):
+    """
+    Simpan band raster sebagai .npy (bisa di-mmap) + metadata JSON.
+    scale=None → float32; scale diisi → kode uint16 (nilai = kode × scale), separuh ukuran.
+    Array ditulis ke file baru {prefix}.{versi}.npy, baru kemudian metadata (yang
+    merujuk versi itu) diganti via os.replace: pembaca selalu mendapat pasangan
+    array + transform/scale yang cocok. Versi lama selain yang sebelumnya aktif dihapus.
+    """
+    base, meta_path = sidecar_paths(bencana, kolom)
+    previous = _npy_path(meta_path, _read_meta(meta_path))
+    if scale:
+        data = encode(data, nodata, scale)
+        nodata = QUANT_NODATA
+    else:
+        data = np.asarray(data, dtype='float32')
+    version = uuid.uuid4().hex[:12]
+    npy_path = f'{base}.{version}.npy'
+    tmp_npy = f'{npy_path}.{os.getpid()}.tmp'
+    with open(tmp_npy, 'wb') as f:
+        np.save(f, np.ascontiguousarray(data))
+    os.replace(tmp_npy, npy_path)
+
+    meta = {
+        'bencana': bencana,
+        'kolom': kolom,
+        'version': version,
+        'npy': os.path.basename(npy_path),
+        'height': int(data.shape[0]),
+        'width': int(data.shape[1]),
+        'transform': [transform.a, transform.b, transform.c, transform.d, transform.e, transform.f],
+        'nodata': None if nodata is None or np.isnan(nodata) else nodata,
+        'scale': scale,
+        'offset': 0.0 if scale else None,
+        'fingerprint': fingerprint,
+    }
+    tmp_meta = f'{meta_path}.{os.getpid()}.tmp'
+    with open(tmp_meta, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_meta, meta_path)
+
+    # Versi sebelumnya dibiarkan untuk pembaca yang baru saja membaca metadata lama;
+    # file yang sudah di-mmap tetap valid walau dihapus
+    keep = {npy_path, previous}
+    for old in glob.glob(f'{glob.escape(base)}.*.npy') + [f'{base}.npy']:
+        if old not in keep:
+            try:
+                os.remove(old)
+            except FileNotFoundError:
+                pass
+    return npy_path
+
+
+class RasterSampler:
+    """
+    Sampling nilai raster dari .npy yang di-memory-map (read-only). Page cache OS
+    dipakai bersama oleh semua worker proses, jadi tidak ada salinan per proses.
+    Lookup = aritmatika index vektor (tanpa DB, tanpa GDAL).
+    """
+
+    def __init__(self, npy_path, meta):
+        self.array = np.load(npy_path, mmap_mode='r')
+        if self.array.shape != (meta['height'], meta['width']):
+            raise ValueError(f"Sidecar {npy_path} tidak cocok dengan metadata versi {meta.get('version')}")
+        a, b, c, d, e, f = meta['transform']
+        if b or d:
+            raise ValueError("Raster berotasi tidak didukung sampler")
+        self.x0, self.dx, self.y0, self.dy = c, a, f, e
+        self.height, self.width = self.array.shape
+        self.version = meta.get('version')
+        self.nodata = meta.get('nodata')
+        self.scale = meta.get('scale')
+        self.offset = meta.get('offset') or 0.0
+        self.fingerprint = meta.get('fingerprint')
+
+    def sample(self, lons, lats):
+        """Array nilai float64; NaN untuk titik di luar raster atau nodata (laut)."""
+        lons = np.asarray(lons, dtype=float)
+        lats = np.asarray(lats, dtype=float)
+        cols = np.floor((lons - self.x0) / self.dx).astype(np.int64)
+        rows = np.floor((lats - self.y0) / self.dy).astype(np.int64)
+        inside = (cols >= 0) & (cols < self.width) & (rows >= 0) & (rows < self.height)
+
+        out = np.full(lons.shape, np.nan)
+        raw = self.array[rows[inside], cols[inside]]
+        if self.scale:
+            values = decode(raw, self.scale, self.offset, self.nodata).astype(float)
+        else:
+            values = raw.astype(float)
+            if self.nodata is not None:
+                values[values == self.nodata] = np.nan
+        out[inside] = values
+        return out
+
+
+_lock = threading.Lock()
+_samplers = {}  # (bencana, kolom) → (revision, RasterSampler)
+
+
+def _ensure_sidecar(bencana, kolom):
+    """Bangun sidecar dari GeoTIFF bila belum ada (mis. raster lama / dipakai ulang / format tanpa versi)."""
+    base, meta_path = sidecar_paths(bencana, kolom)
+    npy_path = _npy_path(meta_path, _read_meta(meta_path))
+    if npy_path and os.path.exists(npy_path):
+        return True
+    tif_path = f'{base}.tif'
+    if not os.path.exists(tif_path):
+        return False
+    import rasterio
+    logger.info(f"🧩 Membuat sidecar .npy dari {tif_path}")
+    with rasterio.open(tif_path) as src:
+        scale = src.scales[0] if np.issubdtype(np.dtype(src.dtypes[0]), np.integer) else None
+        write_sidecar(bencana, kolom, read_values(src), src.transform, np.nan,
+                      src.tags().get('input_fingerprint'), scale=scale)
+    return True
+
+
+def get_sampler(bencana, kolom):
+    """RasterSampler untuk layer; dibuka ulang otomatis bila sidecar ditulis ulang. None jika belum ada raster."""
+    if not _ensure_sidecar(bencana, kolom):
+        return None
+    _, meta_path = sidecar_paths(bencana, kolom)
+    key = (bencana, kolom)
+    with _lock:
+        cached = _samplers.get(key)
+        revision = os.stat(meta_path).st_mtime_ns
+        if cached is not None and cached[0] == revision:
+            return cached[1]
+        # .npy versi yang dirujuk bisa sudah dihapus oleh dua penulisan beruntun → baca ulang metadata
+        for attempt in range(3):
+            meta = _read_meta(meta_path)
+            npy_path = _npy_path(meta_path, meta)
+            if npy_path is None:
+                return None
+            try:
+                sampler = RasterSampler(npy_path, meta)
+                break
+            except FileNotFoundError:
+                if attempt == 2:
+                    raise
+        _samplers[key] = (revision, sampler)
+        return sampler
+
+
+def sample_points(bencana, koloms, lons, lats):
+    """
+    Nilai beberapa kolom di banyak titik sekaligus.
+    Return ({kolom: list nilai|None}, [kolom yang rasternya belum ada]).
+    """
+    values, missing = {}, []
+    for kolom in koloms:
+        sampler = get_sampler(bencana, kolom)
+        if sampler is None:
+            missing.append(kolom)
+            continue
+        arr = sampler.sample(lons, lats)
+        values[kolom] = np.where(np.isnan(arr), None, np.round(arr, 6)).tolist()
+    return values, missing
@@ -0,0 +1,164 @@
+# app/service/service_kurva_all.py
+
+import os
+import time
+import atexit
+import logging
+import threading
+import multiprocessing
+from importlib import import_module
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import pandas as pd
+from flask import current_app
+
+from app.extensions import db
+from app.models.models_database import RawGempa, RawBanjir, RawLongsor, RawGunungBerapi
+from app.service.service_kurva_registry import curve_registry
+
+logger = logging.getLogger(__name__)
+
+# bencana → (model raw, kolom intensitas, rename kolom, modul service)
+HAZARD_JOBS = {
+    "gempa": (
+        RawGempa, ["mmi_500", "mmi_250", "mmi_100"],
+        {"mmi_500": "MMI500", "mmi_250": "MMI250", "mmi_100": "MMI100"},
+        "app.service.service_kurva_gempa",
+    ),
+    "banjir": (
+        RawBanjir, ["depth_100", "depth_50", "depth_25"], {},
+        "app.service.service_kurva_banjir",
+    ),
+    "longsor": (
+        RawLongsor, ["mflux_5", "mflux_2"], {},
+        "app.service.service_kurva_longsor",
+    ),
+    "gunungberapi": (
+        RawGunungBerapi, ["kpa_250", "kpa_100", "kpa_50"], {},
+        "app.service.service_kurva_gunungberapi",
+    ),
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+_export_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kurva-csv")
+
+
+def _ms(t0):
+    return round((time.perf_counter() - t0) * 1000, 1)
+
+
+def _worker_count():
+    default = min(len(HAZARD_JOBS), os.cpu_count() or 1)
+    return int(current_app.config.get("CURVE_PROCESS_WORKERS") or default)
+
+
+def _get_pool(workers):
+    """ProcessPoolExecutor persisten (spawn) agar biaya start worker hanya sekali."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            ctx = multiprocessing.get_context("spawn")
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx)
+            atexit.register(_pool.shutdown, wait=False)
+            logger.info(f"🧵 Process pool kurva dibuat ({workers} worker)")
+        return _pool
+
+
+def load_hazard_input(bencana):
+    """Ambil kolom intensitas raw (tanpa geom) langsung ke DataFrame."""
+    model, columns, rename, _ = HAZARD_JOBS[bencana]
+    table = model.__table__
+    query = db.select(*[table.c[c] for c in ["id_lokasi"] + columns])
+    df = pd.read_sql(query, db.session.connection())
+    for col in columns:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df.rename(columns=rename)
+
+
+def compute_hazard(bencana, input_data, curves):
+    """Dijalankan di proses worker: interpolasi murni, tanpa DB."""
+    t0 = time.perf_counter()
+    service = import_module(HAZARD_JOBS[bencana][3])
+    result = service.compute_dmgratio(input_data, curves)
+    return result, _ms(t0)
+
+
+def _export_csv(result, path):
+    try:
+        result.to_csv(path, index=False)
+        logger.info(f"💾 CSV tersimpan: {path}")
+    except Exception as e:
+        logger.error(f"❌ Gagal menulis CSV {path}: {e}")
+
+
+def process_all_hazards(bencana_list=None, export_csv=False):
+    """
+    Refresh damage ratio seluruh bencana sekaligus:
+      - data raw dimuat di proses utama (satu query terproyeksi per bencana),
+      - kurva diambil dari registry dan dikirim ke worker bersama datanya,
+      - interpolasi jalan paralel di process pool,
+      - hasil disimpan ke DB di proses utama begitu worker selesai,
+      - CSV (opsional) ditulis di thread background.
+    Return list laporan per bencana (status, jumlah baris, durasi tiap tahap).
+    """
+    bencana_list = bencana_list or list(HAZARD_JOBS)
+    reports = {b: {"bencana": b, "status": "pending"} for b in bencana_list}
+    jobs = {}
+
+    for b in bencana_list:
+        report = reports[b]
+        t0 = time.perf_counter()
+        try:
+            df = load_hazard_input(b)
+            curves = curve_registry.get(b)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"❌ Gagal memuat data {b}: {e}")
+            report.update(status="error", message=str(e))
+            continue
+        report.update(rows_in=len(df), load_ms=_ms(t0))
+        if df.empty or not curves:
+            report["status"] = "skipped"
+            report["message"] = "No raw data" if df.empty else "No reference curves"
+            continue
+        jobs[b] = (df, curves)
+
+    workers = min(_worker_count(), len(jobs)) if jobs else 0
+    export_dir = current_app.config.get("CURVE_EXPORT_FOLDER") or os.getcwd()
+
+    def _finish(b, result, compute_ms):
+        report = reports[b]
+        t0 = time.perf_counter()
+        service = import_module(HAZARD_JOBS[b][3])
+        service.save_dmgratio(result)
+        report.update(
+            status="success",
+            rows_out=len(result),
+            compute_ms=compute_ms,
+            save_ms=_ms(t0),
+        )
+        if export_csv:
+            path = os.path.join(export_dir, f"output_kurva_{b}.csv")
+            _export_pool.submit(_export_csv, result, path)
+            report["csv_path"] = path
+
+    if workers <= 1:
+        for b, (df, curves) in jobs.items():
+            try:
+                _finish(b, *compute_hazard(b, df, curves))
+            except Exception as e:
+                logger.error(f"❌ Proses kurva {b} gagal: {e}")
+                reports[b].update(status="error", message=str(e))
+    else:
+        pool = _get_pool(workers)
+        futures = {pool.submit(compute_hazard, b, df, curves): b for b, (df, curves) in jobs.items()}
+        for fut in as_completed(futures):
+            b = futures[fut]
+            try:
+                _finish(b, *fut.result())
+            except Exception as e:
+                logger.error(f"❌ Proses kurva {b} gagal: {e}")
+                reports[b].update(status="error", message=str(e))
+
+    return [reports[b] for b in bencana_list]
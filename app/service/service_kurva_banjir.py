@@ -2,38 +2,18 @@
 
 import logging
 import pandas as pd
-from scipy.interpolate import CubicSpline
 
-from app.repository.repo_kurva_banjir import get_reference_curves_banjir
+from app.service.service_kurva_registry import curve_registry
 from app.extensions import db
 from app.models.models_database import HasilProsesBanjir
 
 logger = logging.getLogger(__name__)
 
-def interpolate_spline(x, y, xi):
-    """Interpolasi CubicSpline, dibatasi di [0,1]."""
-    if pd.isna(xi):
-        return None
-    try:
-        spline = CubicSpline(x, y, extrapolate=True)
-        val = spline(float(xi))
-        return float(max(0, min(val, 1)))
-    except Exception as e:
-        logger.error(f"❌ Error interpolasi nilai {xi}: {e}")
-        return None
-
-def process_data(input_data: pd.DataFrame) -> pd.DataFrame:
+def compute_dmgratio(input_data: pd.DataFrame, reference_curves) -> pd.DataFrame:
     """
-    Untuk setiap baris input_data:
-      - ambil referensi kurva tipe '1' & '2'
-      - interpolasi depth_100, 50, 25
-      - hasilkan kolom dmgratio_1_* dan dmgratio_2_*
+    Interpolasi depth_100, 50, 25 untuk kurva tipe '1' & '2' dari registry,
+    hasilkan kolom dmgratio_1_* dan dmgratio_2_*. Tanpa akses DB.
     """
-    logger.info("📥 Memulai proses interpolasi Banjir...")
-
-    # 1) Ambil referensi (tipe '1' & '2')
-    reference_curves = get_reference_curves_banjir()
-
     # 2) Salin dan cast kolom depth
     df = input_data.copy()
     for col in ['depth_100', 'depth_50', 'depth_25']:
@@ -45,17 +25,16 @@ def process_data(input_data: pd.DataFrame) -> pd.DataFrame:
             df[f'dmgratio_{tipe}_depth{d}'] = None
 
     # 4) Interpolasi untuk tiap tipe
-    for tipe, ref in reference_curves.items():
-        x_ref, y_ref = ref['x'], ref['y']
-        if not x_ref or not y_ref:
+    for tipe, curve in reference_curves.items():
+        if not len(curve.x) or not len(curve.y):
             logger.warning(f"⚠️ Referensi tipe {tipe} kosong: seluruh dmgratio_{tipe}_* = None")
             continue
 
-        logger.info(f"📊 Interpolasi kurva tipe {tipe} (n={len(x_ref)})")
+        logger.info(f"📊 Interpolasi kurva tipe {tipe} (n={len(curve.x)})")
         for d in ['100','50','25']:
             in_col  = f'depth_{d}'
             out_col = f'dmgratio_{tipe}_depth{d}'
-            df[out_col] = df[in_col].apply(lambda v: interpolate_spline(x_ref, y_ref, v))
+            df[out_col] = curve(df[in_col].to_numpy(dtype=float))
 
     # 5) Pilih kolom final
     cols = ['id_lokasi'] + [
@@ -63,7 +42,12 @@ def process_data(input_data: pd.DataFrame) -> pd.DataFrame:
         for t in ['1','2'] for d in ['100','50','25']
     ]
     result = df[cols]
+    result = result.astype(object).where(result.notna(), None)
+
+    return result
 
+def save_dmgratio(result: pd.DataFrame):
+    """Simpan ke dmgratio_banjir_copy (bulk: hapus lalu insert); bila gagal di-rollback dan exception diteruskan."""
     # 6) Simpan ke database (bulk: hapus lalu insert)
     try:
         db.session.query(HasilProsesBanjir).delete()
@@ -75,5 +59,21 @@ def process_data(input_data: pd.DataFrame) -> pd.DataFrame:
     except Exception as e:
         db.session.rollback()
         logger.error(f"❌ Gagal simpan dmgratio_banjir_copy: {e}")
+        raise
+
+
+def process_data(input_data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Untuk setiap baris input_data:
+      - ambil referensi kurva tipe '1' & '2'
+      - interpolasi depth_100, 50, 25
+      - hasilkan kolom dmgratio_1_* dan dmgratio_2_*
+    """
+    logger.info("📥 Memulai proses interpolasi Banjir...")
+
+    # 1) Ambil referensi (tipe '1' & '2') dari registry
+    reference_curves = curve_registry.get('banjir')
 
+    result = compute_dmgratio(input_data, reference_curves)
+    save_dmgratio(result)
     return result
@@ -2,8 +2,7 @@
 
 import logging
 import pandas as pd
-from scipy.interpolate import CubicSpline
-from app.repository.repo_kurva_gempa import get_reference_curves_gempa
+from app.service.service_kurva_registry import curve_registry
 from app.extensions import db
 from app.models.models_database import HasilProsesGempa
 
@@ -15,40 +14,22 @@ def to_float(v):
         return None
     return float(v)
 
-def interpolate_spline(x, y, xi):
-    """CubicSpline + clamp [0,1]."""
-    if pd.isna(xi):
-        return None
-    try:
-        spline = CubicSpline(x, y, extrapolate=True)
-        val = spline(float(xi))
-        return float(max(0, min(val, 1)))
-    except Exception as e:
-        logger.error(f"❌ ERROR interpolasi nilai {xi}: {e}")
-        return None
-
-def process_data(input_data):
+def compute_dmgratio(input_data, rc):
     """
-    Proses data Gempa: interpolasi CR, MCF, MUR, Lightwood untuk MMI500/250/100.
-    Simpan ke dmgratio_gempa (bulk insert/update).
+    Interpolasi CR, MCF, MUR, Lightwood untuk MMI500/250/100 memakai kurva `rc`
+    (dict tipe → FragilityCurve dari registry). Murni komputasi, tanpa DB,
+    sehingga bisa dijalankan di proses worker.
     """
-    logger.info("📥 Mulai interpolasi data Gempa...")
-    rc = get_reference_curves_gempa()
-    if not rc:
-        logger.warning("⚠️ Kurva Gempa kosong, dibatalkan.")
-        return pd.DataFrame()
-
     df = input_data.copy()
     for c in ['MMI500','MMI250','MMI100']:
         df[c] = pd.to_numeric(df[c], errors='coerce')
 
     # interpolasi
-    for tipe, ref in rc.items():
-        x_ref, y_ref = ref['x'], ref['y']
-        logger.info(f"📊 Kurva {tipe}: X={x_ref}, Y={y_ref}")
+    for tipe, curve in rc.items():
+        logger.info(f"📊 Kurva {tipe}: X={curve.x.tolist()}, Y={curve.y.tolist()}")
         for m in ['500','250','100']:
             in_col, out_col = f'MMI{m}', f'dmgratio_{tipe.lower()}_mmi{m}'
-            df[out_col] = df[in_col].apply(lambda v: interpolate_spline(x_ref, y_ref, v))
+            df[out_col] = curve(df[in_col].to_numpy(dtype=float))
 
     # enforce cr ≤ mcf ≤ mur ≤ lightwood
     for m in ['500','250','100']:
@@ -70,6 +51,10 @@ def process_data(input_data):
     result = df[cols].applymap(to_float)
     logger.info(f"✅ Interpolasi selesai: {len(result)} baris.")
 
+    return result
+
+def save_dmgratio(result):
+    """Simpan hasil ke dmgratio_gempa (bulk insert/update); bila gagal di-rollback dan exception diteruskan."""
     # bulk insert/update
     try:
         existing = {i for (i,) in db.session.query(HasilProsesGempa.id_lokasi).all()}
@@ -120,5 +105,20 @@ def process_data(input_data):
     except Exception as e:
         db.session.rollback()
         logger.error(f"❌ Gagal simpan data Gempa: {e}")
+        raise
+
+
+def process_data(input_data):
+    """
+    Proses data Gempa: interpolasi CR, MCF, MUR, Lightwood untuk MMI500/250/100.
+    Simpan ke dmgratio_gempa (bulk insert/update).
+    """
+    logger.info("📥 Mulai interpolasi data Gempa...")
+    rc = curve_registry.get('gempa')
+    if not rc:
+        logger.warning("⚠️ Kurva Gempa kosong, dibatalkan.")
+        return pd.DataFrame()
 
+    result = compute_dmgratio(input_data, rc)
+    save_dmgratio(result)
     return result
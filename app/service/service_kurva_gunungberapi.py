@@ -1,53 +1,28 @@
 import logging
 import pandas as pd
-from scipy.interpolate import CubicSpline
-from app.repository.repo_kurva_gunungberapi import get_reference_curves_gunungberapi
+from app.service.service_kurva_registry import curve_registry
 from app.extensions import db
 from app.models.models_database import HasilProsesGunungBerapi  # ORM model untuk tabel dmgratio_gunungberapi
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
-def interpolate_spline(x, y, xi):
-    """Interpolasi CubicSpline dengan hasil dibatasi [0, 1]."""
-    if pd.isna(xi):
-        return None
-    try:
-        spline = CubicSpline(x, y, extrapolate=True)
-        val = spline(float(xi))
-        return float(max(0, min(val, 1)))
-    except Exception as e:
-        logger.error(f"❌ ERROR interpolasi nilai {xi}: {e}")
-        return None
-
-def process_data(input_data):
+def compute_dmgratio(input_data, reference_curves):
     """
-    Proses data kpa untuk interpolasi CR, MCF, MUR, Lightwood pada Gunung Berapi.
-    Kolom input: lon, lat, kpa_250, kpa_100, kpa_50.
-    Output: DataFrame hasil interpolasi.
+    Interpolasi CR, MCF, MUR, Lightwood kpa_250/100/50 memakai kurva registry.
+    Tanpa akses DB, sehingga bisa dijalankan di proses worker.
     """
-    logger.info("📥 Memulai proses interpolasi data Gunung Berapi...")
-
-    # Pastikan selalu kembalikan DataFrame, minimal kosong
-    result = pd.DataFrame()
-
-    reference_curves = get_reference_curves_gunungberapi()
-    if not reference_curves:
-        logger.warning("⚠️ Tidak ada referensi kurva Gunung Berapi! Proses dihentikan.")
-        return result   # DataFrame kosong, bukan None
-
     df = input_data.copy()
     for col in ['kpa_250', 'kpa_100', 'kpa_50']:
         df[col] = pd.to_numeric(df[col], errors='coerce')
 
     # Lakukan interpolasi per tipe kurva
-    for tipe, ref in reference_curves.items():
-        x_ref, y_ref = ref['x'], ref['y']
-        logger.info(f"📊 Referensi {tipe}: X={x_ref}, Y={y_ref}")
+    for tipe, curve in reference_curves.items():
+        logger.info(f"📊 Referensi {tipe}: X={curve.x.tolist()}, Y={curve.y.tolist()}")
         for kpa in ['250', '100', '50']:
             col_in  = f'kpa_{kpa}'
             col_out = f'dmgratio_{tipe.lower()}_kpa{kpa}'
-            df[col_out] = df[col_in].apply(lambda v: interpolate_spline(x_ref, y_ref, v))
+            df[col_out] = curve(df[col_in].to_numpy(dtype=float))
 
     # Kolom keluaran sesuai HasilProsesGunungBerapi
     cols = [
@@ -59,6 +34,10 @@ def process_data(input_data):
     result = df[cols].applymap(lambda x: float(x) if pd.notna(x) else None)
     logger.info(f"✅ Interpolasi selesai: {result.shape[0]} baris.")
 
+    return result
+
+def save_dmgratio(result):
+    """Simpan hasil ke dmgratio_gunungberapi (bulk insert/update); bila gagal di-rollback dan exception diteruskan."""
     # — Bulk insert/update ke DB —
     try:
         existing_ids = {id_ for (id_,) in db.session.query(HasilProsesGunungBerapi.id_lokasi).all()}
@@ -111,5 +90,25 @@ def process_data(input_data):
     except Exception as e:
         db.session.rollback()
         logger.error(f"❌ Gagal simpan: {e}")
+        raise
+
+
+def process_data(input_data):
+    """
+    Proses data kpa untuk interpolasi CR, MCF, MUR, Lightwood pada Gunung Berapi.
+    Kolom input: lon, lat, kpa_250, kpa_100, kpa_50.
+    Output: DataFrame hasil interpolasi.
+    """
+    logger.info("📥 Memulai proses interpolasi data Gunung Berapi...")
+
+    # Pastikan selalu kembalikan DataFrame, minimal kosong
+    result = pd.DataFrame()
+
+    reference_curves = curve_registry.get('gunungberapi')
+    if not reference_curves:
+        logger.warning("⚠️ Tidak ada referensi kurva Gunung Berapi! Proses dihentikan.")
+        return result   # DataFrame kosong, bukan None
 
+    result = compute_dmgratio(input_data, reference_curves)
+    save_dmgratio(result)
     return result
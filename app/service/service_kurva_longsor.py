@@ -2,8 +2,7 @@
 
 import logging
 import pandas as pd
-from scipy.interpolate import CubicSpline
-from app.repository.repo_kurva_longsor import get_reference_curves_longsor
+from app.service.service_kurva_registry import curve_registry
 from app.extensions import db
 from app.models.models_database import HasilProsesLongsor
 
@@ -15,68 +14,23 @@ def to_float(v):
         return None
     return float(v)
 
-def interpolate_cubic_with_linear_extrap(x_ref, y_ref, xi):
+def compute_dmgratio(input_data, rc):
     """
-    - <2 titik: y_ref[0] jika ada
-    - xi di dalam domain: CubicSpline(extrapolate=False)
-    - xi di luar domain: linear extrap berdasarkan 2 titik terdekat
-    - Clamp ke [0,1]
+    Interpolasi Longsor (mflux_5, mflux_2) memakai kurva `rc` dari registry:
+    CubicSpline interior + linear extrapolasi luar domain, clamp [0,1],
+    enforce CR≤MCF≤MUR≤LIGHTWOOD. Tanpa akses DB.
     """
-    if pd.isna(xi):
-        return None
-
-    xs, ys = x_ref, y_ref
-    n = len(xs)
-    if n < 2:
-        val = ys[0] if ys else None
-    else:
-        x0, x1 = xs[0], xs[1]
-        xn_1, xn = xs[-2], xs[-1]
-        if xi < x0:
-            slope = (ys[1] - ys[0]) / (x1 - x0)
-            val = ys[0] + slope * (xi - x0)
-        elif xi > xn:
-            slope = (ys[-1] - ys[-2]) / (xn - xn_1)
-            val = ys[-1] + slope * (xi - xn)
-        else:
-            try:
-                spline = CubicSpline(xs, ys, extrapolate=False)
-                val = float(spline(float(xi)))
-            except Exception as e:
-                logger.error(f"❌ ERROR spline interior {xi}: {e}")
-                # fallback ke linear interp agar tidak None
-                val = float(pd.Series(ys).interpolate().reindex(pd.Series(xs).append(pd.Series([xi]))).iloc[-1])
-
-    return float(max(0, min(val, 1))) if val is not None else None
-
-def process_data(input_data):
-    """
-    Proses data Longsor (mflux_5, mflux_2):
-    - CubicSpline interior + linear extrapolasi luar domain
-    - clamp [0,1]
-    - enforce CR≤MCF≤MUR≤LIGHTWOOD
-    - bulk insert/update ke dmgratio_longsor
-    """
-    logger.info("📥 Mulai interpolasi data Longsor...")
-    rc = get_reference_curves_longsor()
-    if not rc:
-        logger.warning("⚠️ Kurva Longsor kosong, dibatalkan.")
-        return pd.DataFrame()
-
     df = input_data.copy()
     for c in ['mflux_5','mflux_2']:
         df[c] = pd.to_numeric(df[c], errors='coerce')
 
     # interpolasi per tipe & skala
-    for tipe, ref in rc.items():
-        xs, ys = ref['x'], ref['y']
-        logger.info(f"📊 Kurva {tipe}: X={xs}, Y={ys}")
+    for tipe, curve in rc.items():
+        logger.info(f"📊 Kurva {tipe}: X={curve.x.tolist()}, Y={curve.y.tolist()}")
         for m in ['5','2']:
             in_col = f'mflux_{m}'
             out_col= f'dmgratio_{tipe.lower()}_mflux{m}'
-            df[out_col] = df[in_col].apply(
-                lambda v: interpolate_cubic_with_linear_extrap(xs, ys, v)
-            )
+            df[out_col] = curve(df[in_col].to_numpy(dtype=float))
 
     # enforce ordering: cr ≤ mcf ≤ mur ≤ lightwood
     for m in ['5','2']:
@@ -98,6 +52,11 @@ def process_data(input_data):
     result = df[cols].applymap(to_float)
     logger.info(f"✅ Interpolasi selesai: {len(result)} baris.")
 
+    return result
+
+def save_dmgratio(result):
+    """Simpan hasil ke dmgratio_longsor (bulk insert/update); bila gagal di-rollback dan exception diteruskan."""
+    cols = list(result.columns)
     # bulk insert/update
     try:
         existing = {i for (i,) in db.session.query(HasilProsesLongsor.id_lokasi).all()}
@@ -134,5 +93,23 @@ def process_data(input_data):
     except Exception as e:
         db.session.rollback()
         logger.error(f"❌ Gagal simpan data Longsor: {e}")
+        raise
+
+
+def process_data(input_data):
+    """
+    Proses data Longsor (mflux_5, mflux_2):
+    - CubicSpline interior + linear extrapolasi luar domain
+    - clamp [0,1]
+    - enforce CR≤MCF≤MUR≤LIGHTWOOD
+    - bulk insert/update ke dmgratio_longsor
+    """
+    logger.info("📥 Mulai interpolasi data Longsor...")
+    rc = curve_registry.get('longsor')
+    if not rc:
+        logger.warning("⚠️ Kurva Longsor kosong, dibatalkan.")
+        return pd.DataFrame()
 
+    result = compute_dmgratio(input_data, rc)
+    save_dmgratio(result)
     return result
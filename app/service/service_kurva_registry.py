@@ -0,0 +1,258 @@
+# app/service/service_kurva_registry.py
+
+import logging
+import threading
+import time
+
+import numpy as np
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.extensions import db
+from app.models.models_database import (
+    GempaReferenceCurve,
+    BanjirReferenceCurve,
+    GunungBerapiReferenceCurve,
+    LongsorReferenceCurve,
+)
+from app.repository.repo_visualisasi_kurva import get_reference_rows, get_reference_fingerprint
+from app.repository.repo_kurva_gempa import parse_reference_curves_gempa
+from app.repository.repo_kurva_banjir import parse_reference_curves_banjir
+from app.repository.repo_kurva_gunungberapi import parse_reference_curves_gunungberapi
+from app.repository.repo_kurva_longsor import parse_reference_curves_longsor
+
+logger = logging.getLogger(__name__)
+
+# bencana → (parser repo, longsor pakai extrapolasi linear di luar domain)
+CURVE_SOURCES = {
+    "gempa":        (parse_reference_curves_gempa,        False),
+    "banjir":       (parse_reference_curves_banjir,       False),
+    "gunungberapi": (parse_reference_curves_gunungberapi, False),
+    "longsor":      (parse_reference_curves_longsor,      True),
+}
+
+MODEL_TO_BENCANA = {
+    GempaReferenceCurve: "gempa",
+    BanjirReferenceCurve: "banjir",
+    GunungBerapiReferenceCurve: "gunungberapi",
+    LongsorReferenceCurve: "longsor",
+}
+
+# Default interval (detik) cek fingerprint tabel referensi
+DEFAULT_CHECK_INTERVAL = 30
+
+
+class FragilityCurve:
+    """
+    Satu kurva kerentanan (x, y) dengan CubicSpline yang dibangun sekali.
+    Dipanggil dengan array intensitas → array damage ratio [0, 1], NaN tetap NaN.
+    Spline (scipy) baru dibangun saat pertama dipakai, sehingga warm-up registry
+    tidak memaksa worker CRUD ikut memuat scipy.
+    """
+
+    def __init__(self, tipe, x, y, linear_extrapolation=False):
+        self.tipe = tipe
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.linear_extrapolation = linear_extrapolation
+        self._spline = None
+        self._spline_built = False
+
+    @property
+    def spline(self):
+        if not self._spline_built:
+            self._spline_built = True
+            if len(self.x) >= 2:
+                from scipy.interpolate import CubicSpline
+                try:
+                    self._spline = CubicSpline(self.x, self.y, extrapolate=True)
+                except Exception as e:
+                    logger.error(f"❌ Gagal membangun spline kurva {self.tipe}: {e}")
+        return self._spline
+
+    def __call__(self, values):
+        xi = np.asarray(values, dtype=float)
+        out = np.full(xi.shape, np.nan)
+        valid = ~np.isnan(xi)
+        if not valid.any():
+            return out
+
+        if self.linear_extrapolation:
+            out[valid] = self._cubic_with_linear_extrap(xi[valid])
+        elif self.spline is not None:
+            out[valid] = self.spline(xi[valid])
+
+        return np.clip(out, 0, 1)
+
+    def _cubic_with_linear_extrap(self, xi):
+        """
+        - <2 titik: y[0] jika ada
+        - xi di dalam domain: CubicSpline
+        - xi di luar domain: linear extrap berdasarkan 2 titik terdekat
+        """
+        xs, ys = self.x, self.y
+        if len(xs) < 2:
+            return np.full(xi.shape, ys[0] if len(ys) else np.nan)
+
+        if self.spline is not None:
+            val = self.spline(xi)
+        else:
+            # fallback ke linear interp agar tidak None
+            val = np.interp(xi, xs, ys)
+
+        left = xi < xs[0]
+        right = xi > xs[-1]
+        slope_l = (ys[1] - ys[0]) / (xs[1] - xs[0])
+        slope_r = (ys[-1] - ys[-2]) / (xs[-1] - xs[-2])
+        val = np.where(left, ys[0] + slope_l * (xi - xs[0]), val)
+        val = np.where(right, ys[-1] + slope_r * (xi - xs[-1]), val)
+        return val
+
+
+class CurveRegistry:
+    """
+    Cache in-process kurva kerentanan per bencana.
+
+    Isi entry dimuat sekali dari tabel referensi_dmgratio_* lalu dipakai bersama
+    oleh service kurva & endpoint visualisasi. Entry diinvalidasi ketika:
+      - ada commit ORM yang menyentuh model referensi (notifikasi perubahan), atau
+      - fingerprint tabel berubah (dicek paling sering tiap CURVE_REGISTRY_CHECK_INTERVAL
+        detik, untuk perubahan dari proses lain / SQL langsung).
+    Setiap reload menaikkan version counter bencana tersebut.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._versions = {b: 0 for b in CURVE_SOURCES}
+
+    # ---------- public API ----------
+
+    def get(self, bencana):
+        """Dict {tipe: FragilityCurve} untuk bencana."""
+        return self._entry(bencana)["curves"]
+
+    def get_grouped(self, bencana):
+        """Referensi mentah {tipe_kurva: {"x": [...], "y": [...]}} untuk visualisasi."""
+        return self._entry(bencana)["grouped"]
+
+    def curve_for(self, bencana, tipe_kurva):
+        """FragilityCurve untuk tipe_kurva mentah (key visualisasi), None jika tidak dipakai."""
+        entry = self._entry(bencana)
+        return entry["curves"].get(entry["raw_to_curve"].get(tipe_kurva))
+
+    def version(self, bencana=None):
+        """Version counter satu bencana, atau tuple seluruh bencana."""
+        if bencana is None:
+            self._entries_fresh()
+            return tuple(self._versions[b] for b in CURVE_SOURCES)
+        self._entry(bencana)
+        return self._versions[bencana]
+
+    def invalidate(self, bencana=None):
+        targets = [bencana] if bencana else list(CURVE_SOURCES)
+        with self._lock:
+            for b in targets:
+                if self._entries.pop(b, None) is not None:
+                    logger.info(f"♻️ Kurva {b} diinvalidasi")
+
+    def warm_up(self):
+        for b in CURVE_SOURCES:
+            try:
+                self._entry(b)
+            except Exception as e:
+                logger.error(f"❌ Gagal memuat kurva {b}: {e}")
+                db.session.rollback()
+
+    # ---------- internal ----------
+
+    def _entries_fresh(self):
+        for b in CURVE_SOURCES:
+            self._entry(b)
+
+    def _check_interval(self):
+        if has_app_context():
+            return current_app.config.get("CURVE_REGISTRY_CHECK_INTERVAL", DEFAULT_CHECK_INTERVAL)
+        return DEFAULT_CHECK_INTERVAL
+
+    def _entry(self, bencana):
+        if bencana not in CURVE_SOURCES:
+            raise ValueError(f"Unknown disaster type: {bencana}")
+
+        with self._lock:
+            entry = self._entries.get(bencana)
+            now = time.monotonic()
+            if entry is not None:
+                if now - entry["checked_at"] < self._check_interval():
+                    return entry
+                fingerprint = get_reference_fingerprint(bencana)
+                if fingerprint == entry["fingerprint"]:
+                    entry["checked_at"] = now
+                    return entry
+                logger.info(f"♻️ Referensi kurva {bencana} berubah, memuat ulang...")
+
+            entry = self._load(bencana)
+            self._entries[bencana] = entry
+            self._versions[bencana] += 1
+            return entry
+
+    def _load(self, bencana):
+        parse, linear_extrap = CURVE_SOURCES[bencana]
+        logger.info(f"📥 Memuat referensi kurva {bencana} ke registry...")
+        fingerprint = get_reference_fingerprint(bencana)
+        rows = get_reference_rows(bencana)
+
+        grouped = {}
+        for row in rows:
+            grouped.setdefault(row.tipe_kurva, {"x": [], "y": []})
+            grouped[row.tipe_kurva]["x"].append(row.x)
+            grouped[row.tipe_kurva]["y"].append(row.y)
+
+        curves = {
+            tipe: FragilityCurve(tipe, ref["x"], ref["y"], linear_extrap)
+            for tipe, ref in parse(rows).items()
+        }
+        # tipe_kurva mentah → key kurva hasil normalisasi parser (mis. banjir '1.0' → '1')
+        raw_to_curve = {}
+        for tipe in grouped:
+            parsed = parse([r for r in rows if r.tipe_kurva == tipe])
+            key = next((k for k, ref in parsed.items() if ref["x"]), None)
+            if key in curves:
+                raw_to_curve[tipe] = key
+
+        logger.info(f"✅ {len(rows)} baris referensi {bencana}, {len(curves)} kurva siap.")
+        return {
+            "curves": curves,
+            "grouped": grouped,
+            "raw_to_curve": raw_to_curve,
+            "fingerprint": fingerprint,
+            "checked_at": time.monotonic(),
+        }
+
+
+curve_registry = CurveRegistry()
+
+
+# ---------- notifikasi perubahan via ORM ----------
+
+def _mark_dirty(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("kurva_dirty", set()).add(MODEL_TO_BENCANA[type(target)])
+
+
+for _model in MODEL_TO_BENCANA:
+    for _evt in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _evt, _mark_dirty)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_dirty(session):
+    for bencana in session.info.pop("kurva_dirty", ()):
+        curve_registry.invalidate(bencana)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_dirty(session):
+    session.info.pop("kurva_dirty", None)
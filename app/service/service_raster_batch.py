@@ -0,0 +1,195 @@
+# app/service/service_raster_batch.py
+
+import os
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from flask import current_app
+
+from app.startup import available_memory_mb
+from app.service.service_clip_mask import get_clip_grid
+
+logger = logging.getLogger(__name__)
+
+# Porsi memori tersedia yang boleh dipakai worker raster sekaligus
+MEMORY_HEADROOM = 0.7
+# Perkiraan overhead tetap satu proses worker (interpreter + numpy/scipy/rasterio/app), MB
+WORKER_BASE_MB = 350
+# Zoom tile yang di-seed saat publish='tiles'
+PUBLISH_SEED_ZOOMS = range(4, 7)
+
+_worker_app = None
+
+
+def _ms(t0):
+    return round((time.perf_counter() - t0) * 1000, 1)
+
+
+def _init_worker(config_overrides):
+    """Initializer proses worker: app sendiri (tanpa warm-up) + app context permanen."""
+    global _worker_app
+    from app import create_app
+    _worker_app = create_app(warm_up=False)
+    _worker_app.config.update(config_overrides)
+    _worker_app.app_context().push()
+
+
+def generate_hazard_job(bencana, koloms, multiband=False, force=False):
+    """Satu job batch: semua kolom satu bencana (bobot IDW dipakai bersama)."""
+    from app.service.service_visualisasi_hazard import RasterService
+    t0 = time.perf_counter()
+    report = {}
+    try:
+        paths, error = RasterService.generate_rasters_for_hazard(
+            bencana, koloms, multiband=multiband, force=force, report=report
+        )
+    except Exception as e:
+        paths, error = None, str(e)
+    finally:
+        if _worker_app is not None:
+            from app.extensions import db
+            db.session.remove()
+    return {
+        'paths': paths,
+        'error': error,
+        'reused': report.get('reused', []),
+        'patched': report.get('patched', {}),
+        'generate_ms': _ms(t0),
+        'pid': os.getpid(),
+    }
+
+
+def estimate_job_memory_mb(bencana, n_bands):
+    """Perkiraan puncak memori satu job: array float32 semua band + mask + anggaran IDW."""
+    from app.service.service_visualisasi_hazard import RasterService
+    grid = get_clip_grid(RasterService.resolve_pixel_size(bencana))
+    cells = grid.width * grid.height
+    arrays_mb = cells * (4 * n_bands + 1 + 1) / (1024 * 1024)
+    idw_mb = current_app.config.get('IDW_MEMORY_BUDGET_MB', 256)
+    return WORKER_BASE_MB + arrays_mb + idw_mb
+
+
+def resolve_worker_limit(jobs):
+    """
+    Batas konkurensi: RASTER_BATCH_WORKERS (0 = jumlah CPU), dipotong jumlah job
+    dan memori tersedia / perkiraan memori job terbesar.
+    """
+    configured = int(current_app.config.get('RASTER_BATCH_WORKERS') or os.cpu_count() or 1)
+    limit = max(1, min(configured, len(jobs)))
+
+    available = available_memory_mb()
+    if available is not None and jobs:
+        per_job = max(estimate_job_memory_mb(b, len(koloms)) for b, koloms in jobs.items())
+        by_memory = max(1, int(available * MEMORY_HEADROOM // per_job))
+        if by_memory < limit:
+            logger.info(f"🧠 Worker raster dibatasi memori: {by_memory} (tersedia {available} MB, ~{per_job:.0f} MB/job)")
+        limit = min(limit, by_memory)
+    return limit
+
+
+def _publish(app, target, bencana, kolom, path, republish=False):
+    """Publish satu raster; cache tile sudah diinvalidasi di _collect sebelum dipanggil."""
+    t0 = time.perf_counter()
+    with app.app_context():
+        if target == 'geoserver':
+            from app.geoserver_register import publish_geotiff
+            rec = publish_geotiff(bencana, kolom, path, force=republish)
+        else:
+            from app.service.service_tile_hazard import seed_tiles
+            rec = {'status': 'success', 'tiles': seed_tiles(bencana, kolom, PUBLISH_SEED_ZOOMS)}
+    return rec, _ms(t0)
+
+
+def run_raster_batch(jobs, publish=None, multiband=False, force=False, republish=False):
+    """
+    Generate raster banyak bencana paralel di process pool (spawn).
+
+    jobs    : {bencana: [kolom, ...]}; satu job per bencana
+    publish : None | 'geoserver' | 'tiles' — dijalankan di thread pool begitu raster
+              suatu bencana selesai, sehingga publish tumpang tindih dengan generate
+    force   : abaikan fingerprint, hitung ulang semua raster
+    republish: publish ke GeoServer walau raster & style sama dengan publish terakhir
+    Return list laporan per kombinasi bencana/kolom (status, path, durasi).
+    """
+    app = current_app._get_current_object()
+    t_batch = time.perf_counter()
+    workers = resolve_worker_limit(jobs)
+    cpu = os.cpu_count() or 1
+    overrides = {
+        'IDW_WORKERS': max(1, cpu // workers),
+        'WARM_UP_ON_START': False,
+    }
+    logger.info(f"🚀 Raster batch: {len(jobs)} job, {workers} worker, publish={publish}")
+
+    reports = {}
+    publish_futures = {}
+    # Thread publish hanya menunggu; request GeoServer paralel dibatasi GeoServerPublisher
+    publish_threads = max(2, int(app.config.get('GEOSERVER_PUBLISH_WORKERS') or 2)) if publish == 'geoserver' else 2
+    publisher = ThreadPoolExecutor(max_workers=publish_threads, thread_name_prefix='raster-publish') if publish else None
+
+    def _collect(bencana, koloms, result):
+        from app.service.service_tile_hazard import invalidate_hazard_tiles, invalidate_hazard_tile_bounds
+        for kolom in koloms:
+            rep = {
+                'bencana': bencana,
+                'kolom': kolom,
+                'generate_ms': result['generate_ms'],
+                'worker_pid': result.get('pid'),
+            }
+            if result['error']:
+                rep.update(status='error', message=result['error'])
+            else:
+                path = result['paths']['multiband'] if multiband else result['paths'][kolom]
+                reused = kolom in result.get('reused', [])
+                bounds = result.get('patched', {}).get(kolom)
+                rep.update(status='success', raster_file=path, reused=reused)
+                if bounds is not None:
+                    rep['patched_tiles'] = len(bounds)
+                if not multiband:
+                    # Satu-satunya titik invalidasi cache tile di proses ini (publish 'tiles'
+                    # men-seed setelahnya); refresh inkremental: hanya bbox tile yang dihitung ulang
+                    if bounds is not None:
+                        invalidate_hazard_tile_bounds(bencana, kolom, bounds)
+                    elif not reused:
+                        invalidate_hazard_tiles(bencana, kolom)
+                    if publisher:
+                        fut = publisher.submit(_publish, app, publish, bencana, kolom, path, republish)
+                        publish_futures[fut] = (bencana, kolom)
+            reports[(bencana, kolom)] = rep
+
+    try:
+        if workers == 1:
+            for bencana, koloms in jobs.items():
+                _collect(bencana, koloms, generate_hazard_job(bencana, koloms, multiband, force))
+        else:
+            ctx = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                     initializer=_init_worker, initargs=(overrides,)) as pool:
+                futures = {
+                    pool.submit(generate_hazard_job, b, k, multiband, force): (b, k)
+                    for b, k in jobs.items()
+                }
+                for fut in as_completed(futures):
+                    bencana, koloms = futures[fut]
+                    try:
+                        result = fut.result()
+                    except Exception as e:
+                        result = {'paths': None, 'error': str(e), 'generate_ms': None}
+                    logger.info(f"✅ Raster {bencana} selesai ({result['generate_ms']} ms)")
+                    _collect(bencana, koloms, result)
+
+        for fut in as_completed(publish_futures):
+            bencana, kolom = publish_futures[fut]
+            try:
+                rec, ms = fut.result()
+            except Exception as e:
+                rec, ms = {'status': 'error', 'message': str(e)}, None
+            reports[(bencana, kolom)].update(publish=rec, publish_ms=ms)
+    finally:
+        if publisher:
+            publisher.shutdown(wait=True)
+
+    logger.info(f"🏁 Raster batch selesai dalam {_ms(t_batch)} ms")
+    return [reports[(b, k)] for b, koloms in jobs.items() for k in koloms if (b, k) in reports]
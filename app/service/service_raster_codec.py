@@ -0,0 +1,88 @@
+# app/service/service_raster_codec.py
+
+import logging
+
+import numpy as np
+from flask import current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+# Encoding kuantisasi: nilai = kode × scale + offset; kode uint16, 65535 = nodata.
+# Intensitas (MMI, kedalaman, mflux, kPa) selalu ≥ 0 sehingga offset 0 cukup.
+QUANT_DTYPE = 'uint16'
+QUANT_NODATA = 65535
+QUANT_MAX_CODE = QUANT_NODATA - 1
+
+# Scale default per bencana (resolusi nilai); override lewat RASTER_QUANT_SCALES
+DEFAULT_QUANT_SCALES = {
+    'gempa': 0.001,         # MMI, maks 65.5
+    'banjir': 0.001,        # kedalaman (m), maks 65.5
+    'longsor': 0.001,       # mflux, maks 65.5
+    'gunungberapi': 0.01,   # kPa, maks 655
+}
+DEFAULT_QUANT_SCALE = 0.001
+
+
+def quantize_enabled():
+    if has_app_context():
+        return bool(current_app.config.get('RASTER_QUANTIZE', False))
+    return False
+
+
+def base_scale(bencana):
+    """Scale kuantisasi untuk bencana, atau None bila raster disimpan float32."""
+    if not quantize_enabled():
+        return None
+    overrides = current_app.config.get('RASTER_QUANT_SCALES') or {}
+    return overrides.get(bencana) or DEFAULT_QUANT_SCALES.get(bencana, DEFAULT_QUANT_SCALE)
+
+
+def fit_scale(values, nodata, scale):
+    """
+    Scale dasar, dinaikkan ×10 sampai nilai maksimum muat di 0..65534 agar tidak
+    ada nilai yang terpotong (mis. data kPa ekstrem).
+    """
+    valid = values[(values != nodata) & ~np.isnan(values)]
+    vmax = float(valid.max()) if valid.size else 0.0
+    fitted = scale
+    while vmax > fitted * QUANT_MAX_CODE:
+        fitted *= 10
+    if fitted != scale:
+        logger.warning(f"⚠️ Nilai maks {vmax} melebihi rentang scale {scale}, scale dinaikkan ke {fitted}")
+    return fitted
+
+
+def encode(values, nodata, scale, offset=0.0):
+    """float → kode uint16 (nodata/NaN → QUANT_NODATA)."""
+    invalid = (values == nodata) | np.isnan(values)
+    codes = np.rint((values - offset) / scale)
+    codes = np.clip(codes, 0, QUANT_MAX_CODE)
+    codes[invalid] = QUANT_NODATA
+    return codes.astype(QUANT_DTYPE)
+
+
+def decode(codes, scale, offset=0.0, code_nodata=QUANT_NODATA):
+    """kode → float32 (nodata → NaN)."""
+    out = codes.astype('float32') * np.float32(scale) + np.float32(offset)
+    out[codes == code_nodata] = np.nan
+    return out
+
+
+def read_values(src, band=1, **kwargs):
+    """
+    Baca band rasterio sebagai float32 nilai asli, nodata → NaN. Raster kuantisasi
+    (scale/offset di metadata GeoTIFF) didekode otomatis, raster float dibiarkan.
+    kwargs diteruskan ke src.read (window, out_shape, resampling, ...).
+    """
+    raw = src.read(band, **kwargs)
+    scale = src.scales[band - 1] if src.scales else 1.0
+    offset = src.offsets[band - 1] if src.offsets else 0.0
+    nodata = src.nodata
+    if np.issubdtype(raw.dtype, np.integer):
+        return decode(raw, scale, offset, QUANT_NODATA if nodata is None else nodata)
+    out = raw.astype('float32')
+    if nodata is not None:
+        out[raw == nodata] = np.nan
+    if scale != 1.0 or offset != 0.0:
+        out = out * np.float32(scale) + np.float32(offset)
+    return out
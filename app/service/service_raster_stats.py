@@ -0,0 +1,204 @@
+# app/service/service_raster_stats.py
+
+import os
+import json
+import logging
+
+import numpy as np
+from flask import current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+# Histogram nilai > 0 (jumlah bin), ukuran reservoir sample & seed-nya
+DEFAULT_STATS_BINS = 1024
+DEFAULT_STATS_SAMPLE_SIZE = 10000
+DEFAULT_STATS_SEED = 42
+# Sumber natural breaks: 'histogram' (Fisher-Jenks berbobot di atas bin) atau 'sample'
+DEFAULT_BREAKS_METHOD = 'histogram'
+
+# Baris per blok saat statistik diakumulasi
+STATS_BLOCK_ROWS = 512
+
+
+def _config(key, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+def stats_path(tif_path):
+    """Statistik disimpan sebagai JSON di samping GeoTIFF ({nama}.stats.json)."""
+    return os.path.splitext(tif_path)[0] + '.stats.json'
+
+
+def band_stats(band, nodata=None, bins=None, sample_size=None, seed=None):
+    """
+    Statistik satu band 2D, diakumulasi per blok baris:
+      - count/min/max/mean seluruh piksel valid (bukan nodata/NaN)
+      - histogram halus & reservoir sample nilai > 0 (dasar natural breaks)
+    Reservoir = bottom-k atas kunci acak ber-seed, jadi sample sama untuk data yang sama.
+    """
+    bins = int(bins or _config('RASTER_STATS_BINS', DEFAULT_STATS_BINS))
+    sample_size = int(sample_size or _config('RASTER_STATS_SAMPLE_SIZE', DEFAULT_STATS_SAMPLE_SIZE))
+    seed = int(_config('RASTER_STATS_SEED', DEFAULT_STATS_SEED) if seed is None else seed)
+    rng = np.random.default_rng(seed)
+
+    count, total = 0, 0.0
+    vmin, vmax = np.inf, -np.inf
+    pos_count, pos_min = 0, np.inf
+    sample = np.empty(0)
+    sample_keys = np.empty(0)
+
+    def blocks():
+        for row in range(0, band.shape[0], STATS_BLOCK_ROWS):
+            block = np.asarray(band[row:row + STATS_BLOCK_ROWS], dtype=float).ravel()
+            valid = ~np.isnan(block)
+            if nodata is not None:
+                valid &= block != nodata
+            yield block[valid]
+
+    for values in blocks():
+        if not values.size:
+            continue
+        count += values.size
+        total += float(values.sum())
+        vmin, vmax = min(vmin, float(values.min())), max(vmax, float(values.max()))
+        positive = values[values > 0]
+        if positive.size:
+            pos_count += positive.size
+            pos_min = min(pos_min, float(positive.min()))
+            keys = rng.random(positive.size)
+            if sample.size >= sample_size:
+                candidate = keys < sample_keys.max()
+                keys, positive = keys[candidate], positive[candidate]
+            keys = np.concatenate([sample_keys, keys])
+            pool = np.concatenate([sample, positive])
+            if keys.size > sample_size:
+                keep = np.argpartition(keys, sample_size)[:sample_size]
+                keys, pool = keys[keep], pool[keep]
+            sample_keys, sample = keys, pool
+
+    histogram = None
+    if pos_count:
+        hi = vmax if vmax > pos_min else pos_min + 1e-9
+        counts = np.zeros(bins, dtype=np.int64)
+        for values in blocks():
+            counts += np.histogram(values[values > 0], bins=bins, range=(pos_min, hi))[0]
+        histogram = {'min': pos_min, 'max': hi, 'counts': counts.tolist()}
+
+    return {
+        'count': count,
+        'min': vmin if count else None,
+        'max': vmax if count else None,
+        'mean': total / count if count else None,
+        'positive_count': pos_count,
+        'histogram': histogram,
+        'sample': np.sort(sample).tolist(),
+        'seed': seed,
+    }
+
+
+def write_stats(tif_path, bands, fingerprint=None):
+    """Simpan statistik semua band (atomic) dengan fingerprint input GeoTIFF-nya."""
+    path = stats_path(tif_path)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'input_fingerprint': fingerprint, 'bands': bands}, f)
+    os.replace(tmp, path)
+    return path
+
+
+def load_stats(tif_path):
+    """Statistik tersimpan bila masih cocok dengan GeoTIFF (fingerprint sama), selain itu None."""
+    import rasterio
+    path = stats_path(tif_path)
+    if not os.path.exists(path) or not os.path.exists(tif_path):
+        return None
+    with open(path) as f:
+        stats = json.load(f)
+    with rasterio.open(tif_path) as src:
+        fingerprint = src.tags().get('input_fingerprint')
+        if fingerprint is None and os.path.getmtime(path) < os.path.getmtime(tif_path):
+            return None
+    if stats.get('input_fingerprint') != fingerprint:
+        return None
+    return stats
+
+
+def get_raster_stats(tif_path):
+    """Statistik GeoTIFF; dihitung dari file (sekali) bila belum ada, mis. raster lama."""
+    stats = load_stats(tif_path)
+    if stats is not None:
+        return stats
+    import rasterio
+    from app.service.service_raster_codec import read_values
+    logger.info(f"📊 Menghitung statistik raster {tif_path}")
+    with rasterio.open(tif_path) as src:
+        bands = [band_stats(read_values(src, i)) for i in range(1, src.count + 1)]
+        fingerprint = src.tags().get('input_fingerprint')
+    write_stats(tif_path, bands, fingerprint)
+    return {'input_fingerprint': fingerprint, 'bands': bands}
+
+
+def jenks_from_histogram(hist, k):
+    """
+    Fisher-Jenks berbobot di atas bin histogram (pusat bin, bobot = jumlah piksel):
+    minimalkan jumlah kuadrat simpangan dalam kelas, O(k · bin²) — tidak bergantung
+    jumlah piksel. Return batas atas tiap kelas (terakhir = nilai maksimum).
+    """
+    counts = np.asarray(hist['counts'], dtype=float)
+    edges = np.linspace(hist['min'], hist['max'], len(counts) + 1)
+    nz = counts > 0
+    x = ((edges[:-1] + edges[1:]) / 2)[nz]
+    upper = edges[1:][nz]
+    w = counts[nz]
+    n = len(w)
+    if n <= k:
+        return upper[:-1].tolist() + [hist['max']]
+
+    cw = np.concatenate([[0.0], np.cumsum(w)])
+    cs1 = np.concatenate([[0.0], np.cumsum(w * x)])
+    cs2 = np.concatenate([[0.0], np.cumsum(w * x * x)])
+    i = np.arange(n)[:, np.newaxis]
+    j = np.arange(n)[np.newaxis, :]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weight = cw[j + 1] - cw[i]
+        ssd = (cs2[j + 1] - cs2[i]) - (cs1[j + 1] - cs1[i]) ** 2 / weight
+    ssd = np.where(i <= j, np.maximum(ssd, 0.0), np.inf)   # ssd[i, j]: satu kelas bin i..j
+
+    cost = ssd[0]
+    back = []
+    for _ in range(1, k):
+        total = cost[:-1, np.newaxis] + ssd[1:]            # kelas terakhir mulai di bin i (1..n-1)
+        start = np.argmin(total, axis=0)
+        cost = total[start, np.arange(n)]
+        back.append(start + 1)
+
+    ends, end = [n - 1], n - 1
+    for start in reversed(back):
+        end = start[end] - 1
+        ends.append(end)
+    breaks = upper[ends[::-1]].tolist()
+    breaks[-1] = hist['max']
+    return breaks
+
+
+def sample_breaks(sample, k, seed):
+    """NaturalBreaks (mapclassify) di atas reservoir sample, dengan RNG global ber-seed."""
+    from mapclassify import NaturalBreaks
+    state = np.random.get_state()
+    np.random.seed(seed)
+    try:
+        return NaturalBreaks(np.asarray(sample), k=k).bins.tolist()
+    finally:
+        np.random.set_state(state)
+
+
+def breaks_from_stats(stats, k=5, method=None):
+    """Natural breaks satu band dari statistik tersimpan (tanpa membaca raster)."""
+    if not stats['positive_count']:
+        return []
+    method = method or _config('RASTER_BREAKS_METHOD', DEFAULT_BREAKS_METHOD)
+    if method == 'sample' and len(stats['sample']) > k:
+        return sample_breaks(stats['sample'], k, stats['seed'])
+    return jenks_from_histogram(stats['histogram'], k)
@@ -0,0 +1,330 @@
+# app/service/service_tile_hazard.py
+
+import os
+import math
+import zlib
+import struct
+import logging
+import threading
+
+import numpy as np
+import rasterio
+from rasterio.enums import Resampling
+from rasterio.windows import from_bounds, bounds as window_bounds, Window
+from flask import current_app, has_app_context
+
+from app.cache import LRUCache
+from app.geoserver_register import compute_breaks, ZERO_COLOR, POS_COLORS
+from app.service.service_visualisasi_hazard import RasterService
+from app.service.service_raster_codec import read_values
+from app.service.service_raster_stats import get_raster_stats
+
+logger = logging.getLogger(__name__)
+
+TILE_SIZE = 256
+MAX_ZOOM = 14
+DEFAULT_TILE_CACHE_MAX_MB = 64
+
+# Zoom default yang di-seed oleh `flask seed-tiles`
+DEFAULT_SEED_ZOOMS = range(4, 9)
+
+
+def _config(key, default):
+    if has_app_context():
+        return current_app.config.get(key) or default
+    return default
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+# (bencana, kolom) → (revision, breaks)
+_breaks = {}
+_breaks_lock = threading.Lock()
+
+# path raster → (mtime+ukuran, revision)
+_revisions = {}
+
+
+def get_tile_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            max_mb = _config('TILE_CACHE_MAX_MB', DEFAULT_TILE_CACHE_MAX_MB)
+            _cache = LRUCache(int(max_mb * 1024 * 1024), _config('TILE_CACHE_DIR', None))
+        return _cache
+
+
+def invalidate_hazard_tiles(bencana, kolom=None):
+    """Dipanggil setelah raster diregenerasi; tile & kelas warna lama dibuang."""
+    prefix = f"hazard/{bencana}/" + (f"{kolom}/" if kolom else "")
+    with _breaks_lock:
+        for key in [k for k in _breaks if k[0] == bencana and (kolom is None or k[1] == kolom)]:
+            _breaks.pop(key)
+    get_tile_cache().invalidate_prefix(prefix)
+
+
+def invalidate_hazard_tile_bounds(bencana, kolom, bounds):
+    """
+    Setelah refresh inkremental: revisi raster sudah naik (tag 'tile_revision'),
+    jadi tile revisi lama tidak pernah terlayani lagi — di proses mana pun. Tile
+    revisi sebelumnya (tag 'tile_revision_prev', hanya ada bila kelas warna tidak
+    berubah) yang tidak beririsan dengan bbox (minx, miny, maxx, maxy) dipindah ke
+    revisi baru di cache proses ini & tier disk; sisanya dirender ulang saat diminta.
+    """
+    path = RasterService.clipped_raster_path(bencana, kolom)
+    if not bounds or not os.path.exists(path):
+        return 0
+    with rasterio.open(path) as src:
+        previous = src.tags().get('tile_revision_prev')
+    if not previous:
+        return 0
+    base = f"hazard/{bencana}/{kolom}/"
+    old_prefix = f"{base}{previous}/"
+
+    def hit(key):
+        try:
+            z, x, y = (int(v) for v in key[len(old_prefix):-len('.png')].split('/'))
+        except ValueError:
+            return True
+        lon_left, lon_right = tile_lon_bounds(z, x)
+        lat_bottom, lat_top = tile_lat_bounds(z, y)
+        return any(
+            lon_left < maxx and lon_right > minx and lat_bottom < maxy and lat_top > miny
+            for minx, miny, maxx, maxy in bounds
+        )
+
+    _, dropped = get_tile_cache().move_prefix(old_prefix, f"{base}{raster_revision(path)}/", hit)
+    return dropped
+
+
+def raster_revision(path):
+    """
+    Revisi raster untuk key cache tile: tag GeoTIFF 'tile_revision' (dinaikkan
+    setiap refresh inkremental), selain itu mtime + ukuran file sehingga berubah
+    setiap raster ditulis ulang penuh. Revisi dicek ulang bila stat file berubah,
+    jadi setiap worker melihat revisi baru tanpa invalidasi bersama.
+    """
+    st = os.stat(path)
+    stat_key = f"{st.st_mtime_ns:x}{st.st_size:x}"
+    cached = _revisions.get(path)
+    if cached and cached[0] == stat_key:
+        return cached[1]
+    with rasterio.open(path) as src:
+        revision = src.tags().get('tile_revision') or stat_key
+    _revisions[path] = (stat_key, revision)
+    return revision
+
+
+# ---------- warna ----------
+
+def _hex_rgb(color):
+    color = color.lstrip('#')
+    return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+# index palette: 0 transparan (nodata), 1 nilai 0, 2.. kelas natural breaks
+PALETTE = [(0, 0, 0), _hex_rgb(ZERO_COLOR)] + [_hex_rgb(c) for c in POS_COLORS]
+ALPHA = [0] + [255] * (len(PALETTE) - 1)
+
+
+def get_breaks(bencana, kolom, path, revision):
+    key = (bencana, kolom)
+    with _breaks_lock:
+        cached = _breaks.get(key)
+        if cached and cached[0] == revision:
+            return cached[1]
+    breaks = compute_breaks(path, k=len(POS_COLORS))
+    with _breaks_lock:
+        _breaks[key] = (revision, breaks)
+    return breaks
+
+
+def classify(data, valid, breaks):
+    """Array nilai → index palette (sama dengan kelas SLD GeoServer)."""
+    idx = np.zeros(data.shape, dtype=np.uint8)
+    positive = valid & (data > 0)
+    idx[valid & ~positive] = 1
+    if breaks:
+        cls = np.searchsorted(np.asarray(breaks), data[positive], side='left')
+        idx[positive] = 2 + np.minimum(cls, len(POS_COLORS) - 1)
+    else:
+        idx[positive] = 2
+    return idx
+
+
+# ---------- PNG ----------
+
+def _png_chunk(tag, data):
+    return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+
+def encode_png(indexed):
+    """PNG palette 8-bit (color type 3) + tRNS dari array index uint8 (h, w)."""
+    h, w = indexed.shape
+    raw = np.zeros((h, w + 1), dtype=np.uint8)  # byte filter 0 per baris
+    raw[:, 1:] = indexed
+    header = struct.pack('>IIBBBBB', w, h, 8, 3, 0, 0, 0)
+    plte = b''.join(struct.pack('BBB', *rgb) for rgb in PALETTE)
+    trns = bytes(ALPHA)
+    return b''.join([
+        b'\x89PNG\r\n\x1a\n',
+        _png_chunk(b'IHDR', header),
+        _png_chunk(b'PLTE', plte),
+        _png_chunk(b'tRNS', trns),
+        _png_chunk(b'IDAT', zlib.compress(raw.tobytes(), 6)),
+        _png_chunk(b'IEND', b''),
+    ])
+
+
+EMPTY_TILE = encode_png(np.zeros((TILE_SIZE, TILE_SIZE), dtype=np.uint8))
+
+
+# ---------- geometri tile ----------
+
+def tile_lon_bounds(z, x):
+    n = 2 ** z
+    return x / n * 360.0 - 180.0, (x + 1) / n * 360.0 - 180.0
+
+
+def tile_pixel_lats(z, y):
+    """Latitude pusat tiap baris piksel tile (Web Mercator, non-linear di lat)."""
+    n = 2 ** z
+    ty = y + (np.arange(TILE_SIZE) + 0.5) / TILE_SIZE
+    return np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * ty / n))))
+
+
+def tile_lat_bounds(z, y):
+    n = 2 ** z
+    top = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    bottom = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    return bottom, top
+
+
+def tiles_for_bounds(bounds, z):
+    """Semua (x, y) tile pada zoom z yang beririsan dengan bounds lon/lat."""
+    minx, miny, maxx, maxy = bounds
+    n = 2 ** z
+
+    def tx(lon):
+        return min(n - 1, max(0, int((lon + 180.0) / 360.0 * n)))
+
+    def ty(lat):
+        lat_r = math.radians(lat)
+        return min(n - 1, max(0, int((1 - math.asinh(math.tan(lat_r)) / math.pi) / 2 * n)))
+
+    for x in range(tx(minx), tx(maxx) + 1):
+        for y in range(ty(maxy), ty(miny) + 1):
+            yield x, y
+
+
+# ---------- render ----------
+
+def render_tile(path, z, x, y, breaks):
+    lon_left, lon_right = tile_lon_bounds(z, x)
+    lat_bottom, lat_top = tile_lat_bounds(z, y)
+
+    with rasterio.open(path) as src:
+        left, bottom, right, top = src.bounds
+        if lon_right <= left or lon_left >= right or lat_top <= bottom or lat_bottom >= top:
+            return EMPTY_TILE
+
+        window = from_bounds(
+            max(lon_left, left), max(lat_bottom, bottom),
+            min(lon_right, right), min(lat_top, top),
+            src.transform,
+        )
+        window = window.round_offsets('floor').round_lengths('ceil')
+        window = window.intersection(Window(0, 0, src.width, src.height))
+        w_left, w_bottom, w_right, w_top = window_bounds(window, src.transform)
+
+        # Baca dengan resolusi ≈ tile; GDAL otomatis memakai overview COG di zoom rendah
+        scale = max(window.width / TILE_SIZE, window.height / TILE_SIZE, 1.0)
+        out_h = max(1, int(math.ceil(window.height / scale)))
+        out_w = max(1, int(math.ceil(window.width / scale)))
+        # Nilai asli (raster kuantisasi didekode), nodata → NaN
+        data = read_values(src, 1, window=window, out_shape=(out_h, out_w),
+                           resampling=Resampling.nearest)
+
+    lons = lon_left + (np.arange(TILE_SIZE) + 0.5) * (lon_right - lon_left) / TILE_SIZE
+    lats = tile_pixel_lats(z, y)
+    cols = np.floor((lons - w_left) / (w_right - w_left) * out_w).astype(int)
+    rows = np.floor((w_top - lats) / (w_top - w_bottom) * out_h).astype(int)
+    col_ok = (cols >= 0) & (cols < out_w)
+    row_ok = (rows >= 0) & (rows < out_h)
+
+    sampled = data[np.clip(rows, 0, out_h - 1)][:, np.clip(cols, 0, out_w - 1)]
+    inside = row_ok[:, np.newaxis] & col_ok[np.newaxis, :]
+    valid = inside & ~np.isnan(sampled)
+    if not valid.any():
+        return EMPTY_TILE
+
+    return encode_png(classify(sampled, valid, breaks))
+
+
+def get_hazard_tile(bencana, kolom, z, x, y):
+    """
+    Return (png bytes, revision) atau (None, None) bila raster belum digenerate.
+    Tile di-cache per revisi raster, jadi regenerasi raster otomatis memakai key baru.
+    """
+    path = RasterService.clipped_raster_path(bencana, kolom)
+    if not os.path.exists(path):
+        return None, None
+
+    revision = raster_revision(path)
+    key = f"hazard/{bencana}/{kolom}/{revision}/{z}/{x}/{y}.png"
+    cache = get_tile_cache()
+    png = cache.get(key)
+    if png is None:
+        breaks = get_breaks(bencana, kolom, path, revision)
+        png = render_tile(path, z, x, y, breaks)
+        cache.set(key, png)
+    return png, revision
+
+
+def get_hazard_legend(bencana, kolom):
+    """
+    Legenda layer (kelas sama dengan tile & SLD GeoServer) + ringkasan statistik.
+    Return (dict, revision) atau (None, None) bila raster belum digenerate.
+    """
+    path = RasterService.clipped_raster_path(bencana, kolom)
+    if not os.path.exists(path):
+        return None, None
+
+    revision = raster_revision(path)
+    breaks = get_breaks(bencana, kolom, path, revision)
+    classes = [{'min': 0.0, 'max': 0.0, 'color': ZERO_COLOR, 'label': '0'}]
+    lower = 0.0
+    for i, upper in enumerate(breaks):
+        classes.append({
+            'min': lower,
+            'max': upper,
+            'color': POS_COLORS[min(i, len(POS_COLORS) - 1)],
+            'label': f"{lower:.2f}-{upper:.2f}",
+        })
+        lower = upper
+
+    stats = get_raster_stats(path)['bands'][0]
+    return {
+        'bencana': bencana,
+        'kolom': kolom,
+        'breaks': breaks,
+        'classes': classes,
+        'stats': {key: stats[key] for key in ('count', 'min', 'max', 'mean', 'positive_count')},
+    }, revision
+
+
+def seed_tiles(bencana, kolom, zooms=DEFAULT_SEED_ZOOMS):
+    """Pre-render tile untuk zoom tertentu di seluruh extent raster; return jumlah tile."""
+    path = RasterService.clipped_raster_path(bencana, kolom)
+    if not os.path.exists(path):
+        return 0
+    with rasterio.open(path) as src:
+        bounds = tuple(src.bounds)
+    count = 0
+    for z in zooms:
+        for x, y in tiles_for_bounds(bounds, z):
+            get_hazard_tile(bencana, kolom, z, x, y)
+            count += 1
+    logger.info(f"🌱 {count} tile {bencana}-{kolom} di-seed (zoom {list(zooms)})")
+    return count
@@ -1,139 +1,676 @@
 import os
+import json
+import struct
+import hashlib
 import tempfile
 import numpy as np
-import geopandas as gpd
+import pandas as pd
 import rasterio
 import logging
-from rasterio.transform import from_origin
-from rasterio.mask import mask
-from rasterio.features import rasterize
+from flask import current_app, has_app_context
 from scipy.spatial import cKDTree
-from scipy.interpolate import griddata
+from rasterio.windows import Window
 from app.repository.repo_visualisasi_hazard import IntensitasRepo
-from app import db
+from app.service.service_kurva_registry import curve_registry
+from app.service.service_clip_mask import get_clip_grid
+from app.service.service_hazard_sampling import write_sidecar
+from app.service.service_raster_stats import band_stats, breaks_from_stats, write_stats
+from app.service.service_raster_codec import (
+    QUANT_DTYPE,
+    QUANT_NODATA,
+    base_scale,
+    fit_scale,
+    encode,
+    read_values,
+)
+from app.repository.repo_table_version import get_table_fingerprint
+from app.repository.repo_hazard_raster import (
+    get_point_checksum,
+    find_raster,
+    insert_raster_tiles,
+    DEFAULT_KEEP_VERSIONS,
+    get_active_raster,
+    get_values_at_points,
+    get_bbox_geotiff,
+)
 
 logger = logging.getLogger(__name__)
 
+# Default anggaran memori IDW per blok (MB) & jumlah thread cKDTree.query (-1 = semua core)
+DEFAULT_IDW_MEMORY_BUDGET_MB = 256
+DEFAULT_IDW_WORKERS = -1
+
+# Parameter IDW & versi pipeline; ikut masuk fingerprint raster
+IDW_POWER = 2
+IDW_K = 6
+RASTER_PIPELINE_VERSION = 1
+
+# Resolusi raster adaptif: pixel = jarak median tetangga terdekat / oversample,
+# dibulatkan ke bawah ke salah satu nilai "rapi" agar cache clip grid bisa dipakai ulang
+DEFAULT_PIXEL_SIZE = 'auto'
+DEFAULT_PIXEL_OVERSAMPLE = 2
+DEFAULT_MIN_PIXEL_SIZE = 0.01
+DEFAULT_MAX_PIXEL_SIZE = 0.1
+NICE_PIXEL_SIZES = [0.005, 0.01, 0.0125, 0.02, 0.025, 0.04, 0.05, 0.1, 0.2, 0.25]
+
+# Default kompresi & ukuran tile internal GeoTIFF hasil (COG)
+DEFAULT_RASTER_COMPRESS = 'DEFLATE'
+DEFAULT_RASTER_BLOCKSIZE = 512
+
+# Ukuran tile (piksel) penyimpanan hazard_raster_tile di PostGIS
+DEFAULT_POSTGIS_TILE_SIZE = 256
+# Refresh inkremental: dipakai bila porsi tile darat terdampak ≤ batas ini, selebihnya full rebuild
+DEFAULT_INCREMENTAL_MAX_FRACTION = 0.5
+
+# Kode pixel type PostGIS raster (32BF / 16BUI) & flag band "punya nodata"
+_PT_32BF = 10
+_PT_16BUI = 6
+_BAND_HAS_NODATA = 0x40
+
+# dtype numpy → (pixel type PostGIS, format struct nodata, dtype little-endian)
+_POSTGIS_PIXTYPES = {
+    'float32': (_PT_32BF, '<Bf', '<f4'),
+    'uint16': (_PT_16BUI, '<BH', '<u2'),
+}
+
+
+def _config(key, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+def _has_driver(name):
+    with rasterio.Env() as env:
+        return name in env.drivers()
+
+
 class RasterService:
     @staticmethod
-    def generate_raster_from_points(bencana, kolom):
-        logger.info(f"📥 Mulai generate raster untuk {bencana} - {kolom}")
-        points = IntensitasRepo.get_points_by_bencana(bencana, kolom)
-        if not points:
+    def generate_raster_from_points(bencana, kolom, force=False):
+        paths, error = RasterService.generate_rasters_for_hazard(bencana, [kolom], force=force)
+        if error:
+            return None, error
+        return paths[kolom], None
+
+    @staticmethod
+    def measure_point_spacing(xs, ys):
+        """Jarak median (derajat) tiap titik ke tetangga terdekatnya (titik duplikat diabaikan)."""
+        if len(xs) < 2:
+            return None
+        tree = cKDTree(np.column_stack((xs, ys)))
+        dist, _ = tree.query(np.column_stack((xs, ys)), k=2, workers=_config('IDW_WORKERS', DEFAULT_IDW_WORKERS))
+        nn = dist[:, 1]
+        nn = nn[nn > 0]
+        return float(np.median(nn)) if len(nn) else None
+
+    @staticmethod
+    def choose_pixel_size(spacing):
+        """Pixel size dari jarak titik: spacing / oversample, dibulatkan ke bawah & dibatasi min/max."""
+        lo = float(_config('RASTER_MIN_PIXEL_SIZE', DEFAULT_MIN_PIXEL_SIZE))
+        hi = float(_config('RASTER_MAX_PIXEL_SIZE', DEFAULT_MAX_PIXEL_SIZE))
+        if not spacing:
+            return lo
+        target = spacing / float(_config('RASTER_PIXEL_OVERSAMPLE', DEFAULT_PIXEL_OVERSAMPLE))
+        candidates = [p for p in NICE_PIXEL_SIZES if lo <= p <= hi and p <= target]
+        return max(candidates) if candidates else lo
+
+    _pixel_sizes = {}  # (bencana, checksum koordinat) → pixel size auto
+
+    @staticmethod
+    def resolve_pixel_size(bencana):
+        """
+        Pixel size raster untuk bencana:
+          1) RASTER_PIXEL_SIZES[bencana] bila dikonfigurasi,
+          2) RASTER_PIXEL_SIZE bila berupa angka,
+          3) 'auto': diukur dari jarak titik (di-cache per checksum koordinat titik).
+        """
+        per_hazard = _config('RASTER_PIXEL_SIZES', {}) or {}
+        configured = per_hazard.get(bencana, _config('RASTER_PIXEL_SIZE', DEFAULT_PIXEL_SIZE))
+        if str(configured).lower() != 'auto':
+            return float(configured)
+
+        table = IntensitasRepo.table_name(bencana)
+        key = (bencana, get_table_fingerprint(table, ["ST_X(geom) AS x", "ST_Y(geom) AS y"]))
+        if key not in RasterService._pixel_sizes:
+            xs, ys, _ = IntensitasRepo.get_point_arrays(bencana, [])
+            spacing = RasterService.measure_point_spacing(xs, ys)
+            pixel_size = RasterService.choose_pixel_size(spacing)
+            logger.info(f"📏 {bencana}: jarak titik median {spacing} → pixel {pixel_size}")
+            RasterService._pixel_sizes[key] = pixel_size
+        return RasterService._pixel_sizes[key]
+
+    @staticmethod
+    def build_params(bencana, kolom, pixel_size, grid):
+        """Parameter build selain titik: kolom, pixel size, IDW, encoding, geometri clip, pipeline."""
+        return {
+            'bencana': bencana,
+            'kolom': kolom,
+            'pixel_size': pixel_size,
+            'power': IDW_POWER,
+            'k': IDW_K,
+            'quant_scale': base_scale(bencana),
+            'clip': grid.fingerprint,
+            'pipeline': RASTER_PIPELINE_VERSION,
+        }
+
+    @staticmethod
+    def input_fingerprint(bencana, kolom, pixel_size, grid):
+        """
+        Fingerprint seluruh input satu raster: checksum titik (koordinat + nilai)
+        ditambah parameter build (lihat build_params).
+        """
+        payload = json.dumps({
+            'points': get_point_checksum(IntensitasRepo.table_name(bencana), kolom),
+            **RasterService.build_params(bencana, kolom, pixel_size, grid),
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def file_fingerprint(path):
+        """Fingerprint yang tercatat di tag GeoTIFF, None jika file tidak ada."""
+        if not os.path.exists(path):
+            return None
+        with rasterio.open(path) as src:
+            return src.tags().get('input_fingerprint')
+
+    @staticmethod
+    def generate_rasters_for_hazard(bencana, koloms, multiband=False, force=False, report=None):
+        """
+        Raster semua kolom periode ulang satu bencana dalam satu lintasan IDW:
+        titik, tetangga k-NN & bobot IDW dihitung sekali, lalu diterapkan ke
+        setiap kolom intensitas sekaligus (satu operasi matriks).
+
+        multiband=False → satu GeoTIFF per kolom ({bencana}_{kolom}_clipped.tif),
+                          masing-masing juga disimpan ke hazard_raster
+        multiband=True  → satu GeoTIFF multi-band ({bencana}_multiband_clipped.tif),
+                          deskripsi band = nama kolom; file per kolom, sidecar
+                          sampling & hazard_raster tidak diubah
+
+        Kolom yang fingerprint input-nya sama dengan file & baris hazard_raster
+        yang sudah ada dipakai ulang tanpa dihitung (kecuali force=True). Kolom yang
+        hanya sebagian titiknya berubah di-refresh per tile (lihat refresh_tiles).
+        `report` (dict, opsional) diisi 'fingerprints', 'reused', 'generated',
+        'patched' ({kolom: [bbox tile yang dihitung ulang]}).
+        Return ({kolom: path} atau {'multiband': path}, error).
+        """
+        koloms = list(koloms)
+        report = report if report is not None else {}
+        # nama kolom masuk ke SQL fingerprint/COPY → validasi sebelum query apa pun
+        if not koloms or not IntensitasRepo.has_columns(bencana, koloms):
+            return None, f"Kolom tidak valid untuk {bencana}: {', '.join(koloms)}"
+        pixel_size = RasterService.resolve_pixel_size(bencana)
+
+        # Batas Indonesia, ukuran grid & mask daratan dari cache clip_boundary
+        grid = get_clip_grid(pixel_size)
+
+        fingerprints = {
+            kolom: RasterService.input_fingerprint(bencana, kolom, pixel_size, grid)
+            for kolom in koloms
+        }
+        report['fingerprints'] = fingerprints
+
+        if multiband:
+            multiband_path = os.path.join(tempfile.gettempdir(), f'{bencana}_multiband_clipped.tif')
+            combined = hashlib.sha256(''.join(fingerprints[k] for k in koloms).encode()).hexdigest()
+            if not force and RasterService.file_fingerprint(multiband_path) == combined:
+                logger.info(f"♻️ Raster multi-band {bencana} tidak berubah, dipakai ulang")
+                report.update(reused=koloms, generated=[])
+                return {'multiband': multiband_path}, None
+            todo = koloms
+        else:
+            reused = {}
+            for kolom in koloms:
+                path = RasterService.clipped_raster_path(bencana, kolom)
+                if force or RasterService.file_fingerprint(path) != fingerprints[kolom]:
+                    continue
+                if find_raster(bencana, kolom, fingerprints[kolom]) is not None:
+                    reused[kolom] = path
+            todo = [k for k in koloms if k not in reused]
+            report.update(reused=list(reused), generated=todo)
+            if reused:
+                logger.info(f"♻️ Raster {bencana} {list(reused)} tidak berubah, dipakai ulang")
+            if not todo:
+                return reused, None
+
+        logger.info(f"📥 Mulai generate raster untuk {bencana} - {todo}")
+        xs, ys, zs = IntensitasRepo.get_point_arrays(bencana, todo)
+        if not len(xs):
             logger.warning("⚠️ Tidak ada data titik ditemukan.")
             return None, "No data found"
+        logger.info(f"✅ Jumlah titik: {len(xs)}, kolom: {len(todo)}")
 
-        xs = np.array([p['x'] for p in points])
-        ys = np.array([p['y'] for p in points])
-        zs = np.array([p.get(kolom) if p.get(kolom) is not None else 0 for p in points])
-        logger.info(f"✅ Jumlah titik: {len(points)}")
-
-        pixel_size = 0.01
-
-        # Ambil bounds seluruh Indonesia dari tabel provinsi
-        clip_gdf = gpd.read_postgis(
-            """
-            SELECT ST_CollectionExtract(ST_UnaryUnion(ST_MakeValid(geom)), 3) AS geom
-            FROM provinsi
-            """,
-            db.engine,
-            geom_col='geom'
-        ).to_crs(epsg=4326)
-        minx, miny, maxx, maxy = clip_gdf.total_bounds
+        minx, miny, maxx, maxy = grid.bounds
+        width, height = grid.width, grid.height
         logger.info(f"📦 Bounds Indonesia: {minx},{miny} – {maxx},{maxy}")
+        logger.info(f"🧱 Ukuran raster: {width} x {height} x {len(todo)} band")
 
-        # Hitung ukuran grid berdasarkan bounds provinsi, bukan titik saja
-        width  = int(np.ceil((maxx - minx) / pixel_size))
-        height = int(np.ceil((maxy - miny) / pixel_size))
-        logger.info(f"🧱 Ukuran raster: {width} x {height}")
+        # Koordinat grid dari bounds provinsi
+        xi, yi = grid.xi, grid.yi
+        land = grid.land
+        logger.info(f"🏝️ Piksel darat: {int(land.sum())} dari {height * width}")
 
-        # Buat meshgrid dari bounds provinsi
-        xi = np.linspace(minx, maxx, width)
-        yi = np.linspace(maxy, miny, height)  # flipped so origin top-left
-        grid_x, grid_y = np.meshgrid(xi, yi)
+        # Refresh inkremental: hanya tile di sekitar titik yang berubah dihitung ulang
+        paths = {} if multiband else dict(reused)
+        patched = {}
+        if not multiband and not force and _config('RASTER_INCREMENTAL', True):
+            tree = cKDTree(np.column_stack((xs, ys)))
+            for i, kolom in enumerate(todo):
+                bounds = RasterService.refresh_tiles(
+                    bencana, kolom, xs, ys, zs[:, i], tree, grid, fingerprints[kolom],
+                    RasterService.build_params(bencana, kolom, pixel_size, grid),
+                )
+                if bounds is not None:
+                    patched[kolom] = bounds
+                    paths[kolom] = RasterService.clipped_raster_path(bencana, kolom)
+        report['patched'] = patched
+        if patched:
+            RasterService._invalidate_tiles(bencana, [], patched)
+            keep = [i for i, k in enumerate(todo) if k not in patched]
+            todo, zs = [todo[i] for i in keep], zs[:, keep]
+            if not todo:
+                logger.info("✅ Proses selesai (refresh inkremental)")
+                return paths, None
 
-        logger.info("⚙️ Mulai interpolasi IDW...")
-        grid_z = RasterService.idw_interpolation(xs, ys, zs, grid_x, grid_y)
+        # Array akhir: nilai IDW di darat (NaN → nearest → 0), nodata di laut
+        nodata_value = -9999.0
+        arr = np.full((len(todo), height, width), nodata_value, dtype='float32')
+        logger.info("⚙️ Mulai interpolasi IDW (hanya daratan, per blok baris)...")
+        RasterService.idw_tiled(
+            xs, ys, zs, xi, yi, power=IDW_POWER, k=IDW_K,
+            out=arr, mask=land, nodata=nodata_value, fill_nan_nearest=True
+        )
 
+        # Kuantisasi opsional (RASTER_QUANTIZE): scale per band, sama untuk GeoTIFF,
+        # hazard_raster & sidecar .npy
+        scale = base_scale(bencana)
+        scales = [fit_scale(arr[i], nodata_value, scale) for i in range(len(todo))] if scale else None
 
-        logger.info("🔄 Mengisi NaN dengan nearest-neighbor…")
-        nearest = griddata(
-            (xs, ys),
-            zs,
-            (grid_x, grid_y),
-            method='nearest'
-        )
-        # hanya timpa yg NaN
-        grid_z = np.where(np.isnan(grid_z), nearest, grid_z)
-        grid_z = np.nan_to_num(grid_z, nan=0.0)
-
-        # Buat transform full‐Indonesia
-        transform = from_origin(minx, maxy, pixel_size, pixel_size)
-
-        logger.info("🧩 Membuat mask daratan untuk seluruh grid...")
-        shapes = ((geom, 1) for geom in clip_gdf.geometry)
-        mask_arr = rasterize(
-            shapes=shapes,
-            out_shape=(height, width),
-            transform=transform,
-            fill=0,
-            default_value=1,
-            dtype='uint8'
+        if multiband:
+            # Sidecar sampling tidak ditulis: sampler, stats, tile & hazard_raster tetap
+            # membaca GeoTIFF per kolom yang tidak disentuh di sini
+            RasterService.write_cog(arr, grid, nodata_value, multiband_path, descriptions=todo,
+                                    tags={'input_fingerprint': combined}, scales=scales)
+            report.update(reused=[], generated=todo)
+            logger.info("✅ Proses selesai")
+            return {'multiband': multiband_path}, None
+
+        for i, kolom in enumerate(todo):
+            path = RasterService.clipped_raster_path(bencana, kolom)
+            RasterService.write_cog(arr[i:i + 1], grid, nodata_value, path,
+                                    tags={'input_fingerprint': fingerprints[kolom]},
+                                    scales=scales[i:i + 1] if scales else None)
+            # .npy sidecar untuk sampling titik via memory-map
+            write_sidecar(bencana, kolom, arr[i], grid.transform, nodata_value, fingerprints[kolom],
+                          scale=scales[i] if scales else None)
+            logger.info("🗂️ Simpan raster ke PostGIS...")
+            RasterService.save_to_postgis(path, bencana, kolom, fingerprints[kolom])
+            RasterService.save_snapshot(bencana, kolom, xs, ys, zs[:, i],
+                                        RasterService.build_params(bencana, kolom, pixel_size, grid))
+            paths[kolom] = path
+        RasterService._invalidate_tiles(bencana, todo)
+        logger.info("✅ Proses selesai")
+        return paths, None
+
+    @staticmethod
+    def _invalidate_tiles(bencana, koloms, patched=None):
+        """Invalidasi cache tile: seluruh layer untuk `koloms`, hanya bbox tile untuk `patched`."""
+        from app.service.service_tile_hazard import invalidate_hazard_tiles, invalidate_hazard_tile_bounds
+        for kolom in koloms:
+            invalidate_hazard_tiles(bencana, kolom)
+        for kolom, bounds in (patched or {}).items():
+            invalidate_hazard_tile_bounds(bencana, kolom, bounds)
+
+    # ---------- refresh inkremental ----------
+
+    @staticmethod
+    def snapshot_path(bencana, kolom):
+        """Snapshot titik (x, y, z) build terakhir, di samping GeoTIFF."""
+        return os.path.join(tempfile.gettempdir(), f'{bencana}_{kolom}_points.npz')
+
+    @staticmethod
+    def _snapshot_params(params):
+        tile_size = int(_config('POSTGIS_TILE_SIZE', DEFAULT_POSTGIS_TILE_SIZE))
+        return json.dumps({**params, 'tile_size': tile_size}, sort_keys=True)
+
+    @staticmethod
+    def save_snapshot(bencana, kolom, xs, ys, z, params):
+        path = RasterService.snapshot_path(bencana, kolom)
+        tmp = f'{path}.{os.getpid()}.tmp.npz'
+        np.savez(tmp, x=xs, y=ys, z=z, params=np.array(RasterService._snapshot_params(params)))
+        os.replace(tmp, path)
+
+    @staticmethod
+    def load_snapshot(bencana, kolom, params):
+        """(x, y, z) build terakhir, atau None bila tidak ada / parameter build berbeda."""
+        path = RasterService.snapshot_path(bencana, kolom)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as snap:
+            if str(snap['params']) != RasterService._snapshot_params(params):
+                return None
+            return snap['x'], snap['y'], snap['z']
+
+    @staticmethod
+    def changed_points(old, new):
+        """
+        Koordinat (m, 2) titik yang berubah antara dua set (x, y, z): nilai beda,
+        titik baru, atau titik yang dihapus. Titik dicocokkan lewat koordinatnya.
+        """
+        merged = pd.DataFrame({'x': old[0], 'y': old[1], 'z_old': old[2]}).merge(
+            pd.DataFrame({'x': new[0], 'y': new[1], 'z_new': new[2]}),
+            on=['x', 'y'], how='outer', indicator=True,
         )
+        diff = (merged['_merge'] != 'both') | (merged['z_old'] != merged['z_new'])
+        return merged.loc[diff, ['x', 'y']].to_numpy(dtype=float)
 
-        # Siapkan array akhir: isi grid_z di darat, nodata di laut
+    @staticmethod
+    def tile_slices(grid, tile_size):
+        """(tile_row, tile_col, slice baris, slice kolom) untuk tile yang berisi daratan."""
+        land = grid.land
+        for row_off in range(0, grid.height, tile_size):
+            for col_off in range(0, grid.width, tile_size):
+                rs = slice(row_off, min(row_off + tile_size, grid.height))
+                cs = slice(col_off, min(col_off + tile_size, grid.width))
+                if land[rs, cs].any():
+                    yield row_off // tile_size, col_off // tile_size, rs, cs
+
+    @staticmethod
+    def affected_tiles(grid, tile_size, k, trees, changed_xy):
+        """
+        Tile yang nilainya bisa berubah. Piksel q dipengaruhi titik p hanya bila p
+        termasuk k tetangga terdekat q, yaitu |q - p| ≤ r_k(q) (jarak tetangga ke-k,
+        dulu atau sekarang). Dengan c pusat tile dan h setengah diagonal,
+        r_k(q) ≤ r_k(c) + h, jadi tile terdampak bila |c - p| ≤ r_k(c) + 2h.
+        Return (list (tile_row, tile_col, rs, cs) terdampak, jumlah tile darat).
+        """
+        xi, yi = grid.xi, grid.yi
+        tiles = list(RasterService.tile_slices(grid, tile_size))
+        if not tiles or not len(changed_xy):
+            return [], len(tiles)
+        centers = np.array([
+            ((xi[cs.start] + xi[cs.stop - 1]) / 2, (yi[rs.start] + yi[rs.stop - 1]) / 2)
+            for _, _, rs, cs in tiles
+        ])
+        half_diag = np.array([
+            np.hypot(xi[cs.stop - 1] - xi[cs.start], yi[rs.start] - yi[rs.stop - 1]) / 2
+            for _, _, rs, cs in tiles
+        ])
+        radius = np.zeros(len(tiles))
+        for tree in trees:
+            kk = min(k, tree.n)
+            dist, _ = tree.query(centers, k=kk)
+            radius = np.maximum(radius, dist if kk == 1 else dist[:, -1])
+        nearest, _ = cKDTree(changed_xy).query(centers, k=1)
+        hit = nearest <= radius + 2 * half_diag
+        return [t for t, h in zip(tiles, hit) if h], len(tiles)
+
+    @staticmethod
+    def refresh_tiles(bencana, kolom, xs, ys, z, tree, grid, fingerprint, params):
+        """
+        Refresh inkremental satu kolom terhadap snapshot titik build terakhir:
+        hanya tile (grid hazard_raster_tile) dalam radius pengaruh k-NN titik yang
+        berubah yang diinterpolasi ulang, lalu GeoTIFF & sidecar ditulis dan versi aktif
+        hazard_raster diperbarui di tempat (hanya tile tersebut). Revisi cache tile dinaikkan (penghitung
+        'tile_patch'); natural breaks dihitung ulang dari statistik baru. Bila kelasnya
+        sama, revisi lama dicatat di 'tile_revision_prev' sehingga tile peta yang tidak
+        beririsan bisa dipindah ke revisi baru (lihat invalidate_hazard_tile_bounds).
+        Return list bbox (minx, miny, maxx, maxy) tile yang dihitung ulang, atau None
+        bila harus full rebuild (tidak ada snapshot/versi cocok, atau terlalu banyak tile).
+        """
+        path = RasterService.clipped_raster_path(bencana, kolom)
+        snapshot = RasterService.load_snapshot(bencana, kolom, params)
+        if snapshot is None or not os.path.exists(path):
+            return None
+        active = get_active_raster(bencana, kolom)
+        if active is None or active['fingerprint'] != RasterService.file_fingerprint(path):
+            return None
+
+        tile_size = int(_config('POSTGIS_TILE_SIZE', DEFAULT_POSTGIS_TILE_SIZE))
+        changed = RasterService.changed_points(snapshot, (xs, ys, z))
+        old_tree = cKDTree(np.column_stack(snapshot[:2]))
+        tiles, n_land_tiles = RasterService.affected_tiles(grid, tile_size, IDW_K, [old_tree, tree], changed)
+        max_fraction = float(_config('RASTER_INCREMENTAL_MAX_FRACTION', DEFAULT_INCREMENTAL_MAX_FRACTION))
+        if len(tiles) > max_fraction * n_land_tiles:
+            logger.info(f"ℹ️ {len(tiles)}/{n_land_tiles} tile {bencana}-{kolom} terdampak, full rebuild")
+            return None
+        logger.info(f"🧩 Refresh inkremental {bencana}-{kolom}: {len(changed)} titik berubah, "
+                    f"{len(tiles)}/{n_land_tiles} tile dihitung ulang")
+
+        from app.service.service_tile_hazard import raster_revision, get_breaks, POS_COLORS
+        revision = raster_revision(path)
+        breaks = get_breaks(bencana, kolom, path, revision)
         nodata_value = -9999.0
-        arr = np.full((height, width), nodata_value, dtype='float32')
-        # grid_z mungkin mengandung nan, ganti ke 0 sebelum masking
-        grid_z = np.nan_to_num(grid_z, nan=0.0)
-        # isi nilai interpolasi hanya di daratan (mask_arr==1)
-        arr[mask_arr == 1] = grid_z[mask_arr == 1]
-
-        temp_dir = tempfile.gettempdir()
-        raw_raster_path = os.path.join(temp_dir, f'{bencana}_{kolom}_raw.tif')
-
-        logger.info(f"💾 Menyimpan raster mentah ke {raw_raster_path}")
-        with rasterio.open(
-            raw_raster_path,
-            'w',
-            driver='GTiff',
+        with rasterio.open(path) as src:
+            data = read_values(src)
+            old_scale = src.scales[0] if src.dtypes[0] == QUANT_DTYPE else None
+            patch = int(src.tags().get('tile_patch', 0)) + 1
+        data[np.isnan(data)] = nodata_value
+
+        land, xi, yi = grid.land, grid.xi, grid.yi
+        for _, _, rs, cs in tiles:
+            RasterService.idw_tiled(
+                xs, ys, z, xi[cs], yi[rs], power=IDW_POWER, k=IDW_K,
+                out=data[rs, cs], mask=land[rs, cs], nodata=nodata_value,
+                fill_nan_nearest=True, tree=tree,
+            )
+
+        scale = fit_scale(data, nodata_value, old_scale) if old_scale else None
+        # Kelas warna dari statistik data baru; tile lama hanya bisa dipakai ulang bila sama
+        data[~land] = nodata_value
+        stats = [band_stats(data, nodata_value)]
+        tags = {
+            'input_fingerprint': fingerprint,
+            'tile_patch': str(patch),
+            'tile_revision': f"{revision.partition('.p')[0]}.p{patch}",
+        }
+        new_breaks = breaks_from_stats(stats[0], k=len(POS_COLORS))
+        # toleransi = resolusi kuantisasi (nilai tile lama dibaca ulang dari kode uint16)
+        if len(new_breaks) == len(breaks) and np.allclose(new_breaks, breaks, rtol=1e-6, atol=scale or 0.0):
+            tags['tile_revision_prev'] = revision
+        else:
+            logger.info(f"🎨 Kelas warna {bencana}-{kolom} berubah, semua tile peta dirender ulang")
+        RasterService.write_cog(data[np.newaxis], grid, nodata_value, path, tags=tags,
+                                scales=[scale] if scale else None, stats=stats)
+        write_sidecar(bencana, kolom, data, grid.transform, nodata_value, fingerprint, scale=scale)
+
+        raster_id = None
+        if scale == old_scale:
+            # Versi aktif diperbarui di tempat: hanya tile yang dihitung ulang yang ditulis
+            replaced = [(tr, tc) for tr, tc, _, _ in tiles]
+            raster_id, _ = insert_raster_tiles(
+                bencana, kolom,
+                RasterService.iter_postgis_tiles(path, tile_size, only=set(replaced)),
+                fingerprint=fingerprint,
+                file_path=path,
+                batch_size=int(_config('POSTGIS_TILE_BATCH', 100)),
+                keep_versions=int(_config('HAZARD_RASTER_KEEP_VERSIONS', DEFAULT_KEEP_VERSIONS)),
+                patch_raster_id=active['id'],
+                replaced=replaced,
+            )
+        if raster_id is None:
+            # Scale kuantisasi naik (semua kode berubah) atau patch gagal → simpan ulang seluruh tile
+            RasterService.save_to_postgis(path, bencana, kolom, fingerprint)
+        RasterService.save_snapshot(bencana, kolom, xs, ys, z, params)
+
+        t = grid.transform
+        return [
+            (t.c + cs.start * t.a, t.f + rs.stop * t.e, t.c + cs.stop * t.a, t.f + rs.start * t.e)
+            for _, _, rs, cs in tiles
+        ]
+
+    @staticmethod
+    def write_cog(arr, grid, nodata_value, final_raster_path, descriptions=None, tags=None,
+                  scales=None, stats=None):
+        """
+        Tulis array (band, h, w) sekali, langsung sebagai Cloud-Optimized GeoTIFF:
+        tile internal, kompresi (RASTER_COMPRESS: DEFLATE/ZSTD), predictor,
+        dan overview internal. Clip ke batas Indonesia dilakukan di memori dengan
+        mask daratan cache (aturan sama dengan rasterio.mask: pusat piksel di dalam
+        geometri), sehingga tidak ada file *_raw.tif perantara.
+
+        scales (list per band) → disimpan sebagai kode uint16 dengan metadata
+        scale/offset GeoTIFF dan nodata 65535; pembaca GDAL/rasterio bisa mendekode.
+        Statistik per band (min/max/mean, histogram, reservoir sample) dihitung dari
+        array yang sama (atau `stats` bila sudah dihitung pemanggil) dan disimpan ke
+        {nama}.stats.json untuk natural breaks.
+        """
+        count, height, width = arr.shape
+        arr[:, ~grid.land] = nodata_value
+        if stats is None:
+            stats = [band_stats(arr[i], nodata_value) for i in range(count)]
+        fingerprint = (tags or {}).get('input_fingerprint')
+        if scales:
+            arr = np.stack([encode(arr[i], nodata_value, scales[i]) for i in range(count)])
+            nodata_value = QUANT_NODATA
+
+        compress = _config('RASTER_COMPRESS', DEFAULT_RASTER_COMPRESS).upper()
+        blocksize = int(_config('RASTER_BLOCKSIZE', DEFAULT_RASTER_BLOCKSIZE))
+        profile = dict(
             height=height,
             width=width,
-            count=1,
-            dtype='float32',
+            count=count,
+            dtype=QUANT_DTYPE if scales else 'float32',
             crs='+proj=longlat +datum=WGS84 +no_defs',
-            transform=transform,
-            nodata=nodata_value
-        ) as dst:
-            dst.write(arr, 1)
-
-        # Hapus crop=True agar ukuran raster tetap full‐Indonesia
-        logger.info("✂️ Memotong raster sesuai geometri batas (tanpa crop)...")
-        with rasterio.open(raw_raster_path) as src:
-            out_image, out_transform = mask(
-                src,
-                clip_gdf.geometry,
-                nodata=nodata_value  # crop=False by default
-            )
-            out_meta = src.meta.copy()
-
-        out_meta.update({
-            "height": out_image.shape[1],
-            "width": out_image.shape[2],
-            "transform": out_transform,
-            "nodata": nodata_value
-        })
-
-        final_raster_path = os.path.join(temp_dir, f'{bencana}_{kolom}_clipped.tif')
-        logger.info(f"💾 Menyimpan raster akhir ke {final_raster_path}")
-        with rasterio.open(final_raster_path, "w", **out_meta) as dest:
-            dest.write(out_image)
-
-        logger.info("🗂️ Simpan raster ke PostGIS...")
-        RasterService.save_to_postgis(final_raster_path, bencana, kolom)
-        logger.info("✅ Proses selesai")
+            transform=grid.transform,
+            nodata=nodata_value,
+        )
+
+        logger.info(f"💾 Menyimpan COG ({compress}) ke {final_raster_path}")
+        if _has_driver('COG'):
+            with rasterio.open(
+                final_raster_path, 'w', driver='COG',
+                compress=compress, predictor='YES', blocksize=blocksize,
+                overviews='AUTO', overview_resampling='average',
+                **profile
+            ) as dst:
+                dst.write(arr)
+                if scales:
+                    dst.scales = tuple(scales)
+                    dst.offsets = (0.0,) * count
+                dst.update_tags(**(tags or {}))
+                for i, name in enumerate(descriptions or [], start=1):
+                    dst.set_band_description(i, name)
+            write_stats(final_raster_path, stats, fingerprint)
+            return final_raster_path
+
+        # GDAL < 3.1: GTiff ber-tile + overview, lalu salin dengan COPY_SRC_OVERVIEWS
+        from rasterio.enums import Resampling
+        from rasterio.shutil import copy as rio_copy
+        with rasterio.MemoryFile() as memfile:
+            with memfile.open(driver='GTiff', tiled=True, blockxsize=blocksize,
+                              blockysize=blocksize, **profile) as tmp:
+                tmp.write(arr)
+                if scales:
+                    tmp.scales = tuple(scales)
+                    tmp.offsets = (0.0,) * count
+                tmp.update_tags(**(tags or {}))
+                for i, name in enumerate(descriptions or [], start=1):
+                    tmp.set_band_description(i, name)
+                factors = [f for f in (2, 4, 8, 16, 32) if max(height, width) // f >= blocksize]
+                tmp.build_overviews(factors, Resampling.average)
+            rio_copy(memfile.name, final_raster_path, driver='GTiff',
+                     tiled=True, blockxsize=blocksize, blockysize=blocksize,
+                     compress=compress, predictor=2 if scales else 3, copy_src_overviews=True)
+        write_stats(final_raster_path, stats, fingerprint)
+        return final_raster_path
+
+    @staticmethod
+    def clipped_raster_path(bencana, kolom):
+        return os.path.join(tempfile.gettempdir(), f'{bencana}_{kolom}_clipped.tif')
 
-        return final_raster_path, None
+    @staticmethod
+    def idw_rows_per_block(width, k, memory_budget_mb, bands=1):
+        """
+        Jumlah baris per blok agar array sementara muat di anggaran memori.
+        Per sel: k × (dist + idx + weights + z_values per band) float64/int64
+        + 2 koordinat + 1 hasil per band.
+        """
+        bytes_per_cell = k * (3 + bands) * 8 + (2 + bands) * 8
+        rows = int(memory_budget_mb * 1024 * 1024 // (bytes_per_cell * max(width, 1)))
+        return max(rows, 1)
+
+    @staticmethod
+    def idw_tiled(x, y, z, xi, yi, power=2, k=6, out=None, mask=None, nodata=np.nan,
+                  fill_nan_nearest=False, memory_budget_mb=None, workers=None, tree=None):
+        """
+        IDW per blok baris di atas grid (xi: koordinat kolom, yi: koordinat baris).
+        - cKDTree dibangun sekali, query tiap blok paralel (`workers` thread)
+        - memori sementara dibatasi `memory_budget_mb` (default IDW_MEMORY_BUDGET_MB)
+        - `mask` (bool, height×width): hanya piksel True yang diinterpolasi,
+          sisanya diisi `nodata` (mis. laut)
+        - `fill_nan_nearest`: hasil NaN diganti nilai titik terdekat (kolom pertama
+          hasil query k-NN, pengganti griddata nearest), lalu NaN sisa → 0
+        - `z` berbentuk (n,) atau (n, band): untuk banyak kolom (periode ulang) di
+          titik yang sama, tetangga & bobot dihitung sekali lalu diterapkan ke
+          semua band dengan satu operasi broadcast
+        - `out`: ndarray (height, width) / (band, height, width) atau dataset
+          rasterio terbuka; setiap blok langsung ditulis ke sana. Tanpa `out`,
+          ndarray float64 baru dibuat.
+        - `tree`: cKDTree (x, y) yang sudah dibangun, dipakai ulang antar pemanggilan
+        Tanpa mask/fill, hasil identik dengan idw_interpolation di atas meshgrid(xi, yi).
+        """
+        if memory_budget_mb is None:
+            memory_budget_mb = _config('IDW_MEMORY_BUDGET_MB', DEFAULT_IDW_MEMORY_BUDGET_MB)
+        if workers is None:
+            workers = _config('IDW_WORKERS', DEFAULT_IDW_WORKERS)
+
+        xi = np.asarray(xi, dtype=float)
+        yi = np.asarray(yi, dtype=float)
+        z = np.asarray(z, dtype=float)
+        single = z.ndim == 1
+        z2 = z[:, np.newaxis] if single else z
+        bands = z2.shape[1]
+        height, width = len(yi), len(xi)
+        k = min(k, len(z2))
+
+        if tree is None:
+            tree = cKDTree(np.column_stack((x, y)))
+        if out is None:
+            out = np.empty((height, width) if single else (bands, height, width), dtype=float)
+        is_dataset = hasattr(out, 'write')
+        out_3d = out if is_dataset or out.ndim == 3 else out[np.newaxis]
+
+        rows = RasterService.idw_rows_per_block(width, k, memory_budget_mb, bands)
+        logger.info(f"🧮 IDW {width}x{height}, k={k}, {rows} baris/blok, workers={workers}")
+
+        for row in range(0, height, rows):
+            block_y = yi[row:row + rows]
+            n_rows = len(block_y)
+            block_mask = None if mask is None else np.asarray(mask[row:row + n_rows], dtype=bool)
+
+            gx, gy = np.meshgrid(xi, block_y)
+            query_pts = np.column_stack((gx.ravel(), gy.ravel()))
+            if block_mask is not None:
+                query_pts = query_pts[block_mask.ravel()]
+
+            if len(query_pts):
+                dist, idx = tree.query(query_pts, k=k, workers=workers)
+                if k == 1:
+                    dist, idx = dist[:, np.newaxis], idx[:, np.newaxis]
+                weights = 1 / (dist**power + 1e-8)
+                z_values = z2[idx]                          # (m, k, band)
+                values = (np.sum(weights[:, :, np.newaxis] * z_values, axis=1)
+                          / np.sum(weights, axis=1)[:, np.newaxis])
+                if fill_nan_nearest:
+                    values = np.where(np.isnan(values), z_values[:, 0, :], values)
+                    values = np.nan_to_num(values, nan=0.0)
+            else:
+                values = np.empty((0, bands))
+
+            if block_mask is None:
+                block = values.T.reshape(bands, n_rows, width)
+            else:
+                block = np.full((bands, n_rows, width), nodata, dtype=float)
+                block[:, block_mask] = values.T
+
+            if is_dataset:
+                out.write(block.astype(out.dtypes[0]),
+                          window=Window(0, row, width, n_rows))
+            else:
+                out_3d[:, row:row + n_rows] = block
+
+        return out
 
     @staticmethod
     def idw_interpolation(x, y, z, xi, yi, power=2):
@@ -149,24 +686,249 @@ class RasterService:
         return weighted.reshape(xi.shape)
 
     @staticmethod
-    def save_to_postgis(tif_path, bencana, kolom):
-        from psycopg2 import connect
-        logger.info(f"📤 Membaca {tif_path} untuk disimpan ke PostGIS...")
-        conn = db.engine.raw_connection()
-        cur = conn.cursor()
-        with open(tif_path, 'rb') as f:
-            rast_data = f.read()
-        query = """
-        INSERT INTO hazard_raster (bencana, kolom, rast)
-        VALUES (%s, %s, ST_FromGDALRaster(%s));
-        """
-        try:
-            cur.execute(query, (bencana, kolom, rast_data))
-            conn.commit()
-            logger.info("✅ Raster berhasil disimpan ke tabel hazard_raster")
-        except Exception as e:
-            logger.error(f"❌ Gagal menyimpan raster ke PostGIS: {e}")
-            conn.rollback()
-        finally:
-            cur.close()
-            conn.close()
+    def postgis_tile_wkb(data, transform, nodata, srid=4326):
+        """Bytes WKB raster PostGIS (little endian, 1 band 32BF atau 16BUI sesuai dtype) untuk satu tile."""
+        pixtype, nodata_fmt, dtype = _POSTGIS_PIXTYPES[np.dtype(data.dtype).name]
+        height, width = data.shape
+        header = struct.pack(
+            '<BHHddddddiHH',
+            1, 0, 1,                       # endian NDR, versi 0, 1 band
+            transform.a, transform.e,      # scaleX, scaleY (negatif)
+            transform.c, transform.f,      # upper-left x, y
+            transform.b, transform.d,      # skew
+            srid, width, height,
+        )
+        band = struct.pack(nodata_fmt, pixtype | _BAND_HAS_NODATA, nodata)
+        return header + band + np.ascontiguousarray(data, dtype=dtype).tobytes()
+
+    @staticmethod
+    def iter_postgis_tiles(tif_path, tile_size=None, skip_empty=True, only=None):
+        """
+        Baca GeoTIFF per window tile_size×tile_size dan hasilkan (tile_row, tile_col, wkb).
+        Tile yang seluruhnya nodata (laut) dilewati. Hanya satu tile di memori sekaligus.
+        `only` (set (tile_row, tile_col), opsional) membatasi tile yang dibaca.
+        Raster kuantisasi disimpan apa adanya (kode 16BUI); scale/offset ada di hazard_raster.
+        """
+        tile_size = tile_size or int(_config('POSTGIS_TILE_SIZE', DEFAULT_POSTGIS_TILE_SIZE))
+        with rasterio.open(tif_path) as src:
+            nodata = src.nodata if src.nodata is not None else -9999.0
+            for row_off in range(0, src.height, tile_size):
+                for col_off in range(0, src.width, tile_size):
+                    if only is not None and (row_off // tile_size, col_off // tile_size) not in only:
+                        continue
+                    window = Window(col_off, row_off,
+                                    min(tile_size, src.width - col_off),
+                                    min(tile_size, src.height - row_off))
+                    data = src.read(1, window=window)
+                    if skip_empty and np.all(data == nodata):
+                        continue
+                    yield (
+                        row_off // tile_size,
+                        col_off // tile_size,
+                        RasterService.postgis_tile_wkb(
+                            data, src.window_transform(window), nodata
+                        ),
+                    )
+
+    @staticmethod
+    def save_to_postgis(tif_path, bencana, kolom, fingerprint=None):
+        """Simpan raster ke hazard_raster_tile (streaming per tile) sebagai versi aktif baru."""
+        logger.info(f"📤 Menyimpan {tif_path} ke PostGIS per tile...")
+        with rasterio.open(tif_path) as src:
+            quantized = src.dtypes[0] == QUANT_DTYPE
+            scale, offset = (src.scales[0], src.offsets[0]) if quantized else (None, None)
+        raster_id, n_tiles = insert_raster_tiles(
+            bencana, kolom,
+            RasterService.iter_postgis_tiles(tif_path),
+            fingerprint=fingerprint,
+            file_path=tif_path,
+            value_scale=scale,
+            value_offset=offset,
+            batch_size=int(_config('POSTGIS_TILE_BATCH', 100)),
+            keep_versions=int(_config('HAZARD_RASTER_KEEP_VERSIONS', DEFAULT_KEEP_VERSIONS)),
+        )
+        return raster_id
+
+    @staticmethod
+    def values_at_points(bencana, kolom, coords):
+        """Nilai raster aktif di PostGIS pada list (lon, lat); hanya tile yang beririsan dibaca."""
+        lons = [float(c[0]) for c in coords]
+        lats = [float(c[1]) for c in coords]
+        return get_values_at_points(bencana, kolom, lons, lats)
+
+    @staticmethod
+    def values_in_bbox(bencana, kolom, bbox):
+        """
+        Array nilai raster aktif di PostGIS untuk bbox (minx, miny, maxx, maxy).
+        Return (masked array 2D, transform) atau (None, None) bila bbox di luar raster.
+        """
+        tif, scale, offset = get_bbox_geotiff(bencana, kolom, *bbox)
+        if tif is None:
+            return None, None
+        with rasterio.MemoryFile(tif) as memfile, memfile.open() as src:
+            data = src.read(1, masked=True)
+            if scale is not None:
+                data = data.astype('float32') * np.float32(scale) + np.float32(offset or 0.0)
+            return data, src.transform
+
+
+# Urutan kerentanan: CR ≤ MCF ≤ MUR ≤ Lightwood (sama seperti service kurva)
+DMGRATIO_ORDER = ['cr', 'mcf', 'mur', 'lightwood']
+
+# Jumlah baris raster yang diproses per blok (membatasi pemakaian memori)
+DMGRATIO_BLOCK_ROWS = 512
+
+
+class DamageRatioRasterService:
+    """
+    Tahap pipeline raster: terapkan kurva kerentanan (registry) langsung ke grid
+    intensitas hasil IDW, sehingga damage ratio tersedia di setiap piksel daratan.
+
+    mode='per_type'  → satu GeoTIFF multi-band, satu band per tipe kurva
+                       (deskripsi band = tipe kurva)
+    mode='governing' → satu band berisi damage ratio terbesar antar tipe kurva
+    """
+
+    MODES = ('per_type', 'governing')
+
+    @staticmethod
+    def output_path(bencana, kolom, mode='per_type'):
+        suffix = 'dmgratio' if mode == 'per_type' else 'dmgratio_max'
+        return os.path.join(tempfile.gettempdir(), f'{bencana}_{kolom}_{suffix}.tif')
+
+    @staticmethod
+    def curves_fingerprint(bencana):
+        """Fingerprint isi kurva referensi (sama di semua proses, beda dengan version counter registry)."""
+        grouped = curve_registry.get_grouped(bencana)
+        payload = json.dumps(grouped, sort_keys=True, default=float)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def source_fingerprint(src_path):
+        """input_fingerprint raster intensitas; raster lama tanpa tag → mtime + ukuran file."""
+        fingerprint = RasterService.file_fingerprint(src_path)
+        if fingerprint is None:
+            st = os.stat(src_path)
+            fingerprint = f"stat:{st.st_mtime_ns:x}{st.st_size:x}"
+        return fingerprint
+
+    @staticmethod
+    def _ordered_types(curves):
+        """Tipe kurva terurut; bila tipe CR/MCF/MUR/Lightwood lengkap, urutan kerentanan dipakai."""
+        by_lower = {t.lower(): t for t in curves}
+        if all(t in by_lower for t in DMGRATIO_ORDER):
+            rest = sorted(t for t in curves if t.lower() not in DMGRATIO_ORDER)
+            return [by_lower[t] for t in DMGRATIO_ORDER] + rest, True
+        return sorted(curves), False
+
+    @staticmethod
+    def apply_curves(intensity, curves, types, enforce_order):
+        """
+        intensity: array 2D (NaN = nodata). Return array (n_tipe, h, w) damage ratio.
+        enforce_order → CR ≤ MCF ≤ MUR ≤ Lightwood lewat cumulative max antar band.
+        """
+        bands = np.stack([curves[t](intensity) for t in types])
+        if enforce_order:
+            n = len(DMGRATIO_ORDER)
+            nan_mask = np.isnan(bands[:n])
+            bands[:n] = np.fmax.accumulate(bands[:n], axis=0)
+            bands[:n][nan_mask] = np.nan
+        return bands
+
+    @staticmethod
+    def generate_dmgratio_raster(bencana, kolom, mode='per_type', force=False):
+        """
+        Raster damage ratio dari raster intensitas aktif & kurva registry. File ditandai
+        tag 'source_fingerprint' & 'curves_fingerprint'; bila keduanya masih sama dengan
+        input saat ini (dan bukan force) file dipakai ulang tanpa dihitung.
+        Return (path, error).
+        """
+        if mode not in DamageRatioRasterService.MODES:
+            return None, f"Mode tidak valid: {mode}"
+
+        curves = curve_registry.get(bencana)
+        if not curves:
+            return None, "No reference curves"
+        types, enforce_order = DamageRatioRasterService._ordered_types(curves)
+
+        src_path = RasterService.clipped_raster_path(bencana, kolom)
+        if not os.path.exists(src_path):
+            logger.info(f"ℹ️ Raster intensitas {bencana}-{kolom} belum ada, generate dulu...")
+            src_path, error = RasterService.generate_raster_from_points(bencana, kolom)
+            if error:
+                return None, error
+
+        out_path = DamageRatioRasterService.output_path(bencana, kolom, mode)
+        tags = {
+            'source_fingerprint': DamageRatioRasterService.source_fingerprint(src_path),
+            'curves_fingerprint': DamageRatioRasterService.curves_fingerprint(bencana),
+        }
+        if not force and os.path.exists(out_path):
+            with rasterio.open(out_path) as existing:
+                current = existing.tags()
+            if all(current.get(k) == v for k, v in tags.items()):
+                logger.info(f"♻️ Raster damage ratio {bencana}-{kolom} ({mode}) masih sesuai, dipakai ulang")
+                return out_path, None
+        logger.info(f"📊 Menerapkan kurva {types} ke raster {bencana}-{kolom} ({mode})")
+        # Tulis ke file sementara lalu replace: pembaca (sample) tidak melihat file setengah jadi
+        tmp_path = f"{out_path}.{os.getpid()}.tmp.tif"
+
+        with rasterio.open(src_path) as src:
+            # Output selalu float32; raster intensitas kuantisasi didekode saat dibaca
+            nodata = -9999.0 if src.dtypes[0] == QUANT_DTYPE or src.nodata is None else src.nodata
+            profile = src.profile.copy()
+            profile.update(
+                dtype='float32',
+                count=len(types) if mode == 'per_type' else 1,
+                nodata=nodata,
+            )
+            with rasterio.open(tmp_path, 'w', **profile) as dst:
+                for row in range(0, src.height, DMGRATIO_BLOCK_ROWS):
+                    window = Window(0, row, src.width, min(DMGRATIO_BLOCK_ROWS, src.height - row))
+                    intensity = read_values(src, 1, window=window).astype('float64')
+
+                    bands = DamageRatioRasterService.apply_curves(
+                        intensity, curves, types, enforce_order
+                    )
+                    if mode == 'governing':
+                        # fmax mengabaikan NaN; NaN hanya bila semua tipe NaN
+                        bands = np.fmax.reduce(bands, axis=0)[np.newaxis]
+
+                    out = np.where(np.isnan(bands), nodata, bands).astype('float32')
+                    dst.write(out, window=window)
+
+                if mode == 'per_type':
+                    for i, tipe in enumerate(types, start=1):
+                        dst.set_band_description(i, f'dmgratio_{tipe.lower()}')
+                else:
+                    dst.set_band_description(1, 'dmgratio_max')
+                dst.update_tags(**tags)
+        os.replace(tmp_path, out_path)
+
+        logger.info(f"✅ Raster damage ratio tersimpan: {out_path}")
+        return out_path, None
+
+    @staticmethod
+    def sample(bencana, kolom, coords, mode='per_type'):
+        """
+        Ambil damage ratio di koordinat (lon, lat) dari raster damage ratio; raster
+        dibuat ulang dulu bila raster intensitas atau kurva berubah sejak ditulis.
+        Return (list {lon, lat, values: {band: nilai|None}}, error).
+        """
+        path, error = DamageRatioRasterService.generate_dmgratio_raster(bencana, kolom, mode)
+        if error:
+            return None, error
+
+        results = []
+        with rasterio.open(path) as src:
+            names = list(src.descriptions)
+            for (lon, lat), vals in zip(coords, src.sample(coords, masked=True)):
+                results.append({
+                    'lon': lon,
+                    'lat': lat,
+                    'values': {
+                        name: (None if np.ma.is_masked(v) else round(float(v), 6))
+                        for name, v in zip(names, vals)
+                    },
+                })
+        return results, None
@@ -1,35 +1,78 @@
 # app/service/service_visualisasi_kurva.py
 
-from app.models.models_database import (
-    GempaReferenceCurve,
-    BanjirReferenceCurve,
-    GunungBerapiReferenceCurve,
-    LongsorReferenceCurve
-)
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from app.service.service_kurva_registry import curve_registry, CURVE_SOURCES
+
+# Batas jumlah titik sampel spline per kurva (?samples=N)
+MAX_SPLINE_SAMPLES = 2000
+DEFAULT_SPLINE_SAMPLES = 200
+
+# samples → (versi registry, body JSON, etag); LRU kecil karena samples dipilih klien
+MAX_CACHED_DOCUMENTS = 8
+_documents = OrderedDict()
+_documents_lock = threading.Lock()
 
 def get_all_disaster_curves():
-    # Peta nama tabel ke Model SQLAlchemy
-    mapping = {
-        "gempa": GempaReferenceCurve,
-        "banjir": BanjirReferenceCurve,
-        "gunungberapi": GunungBerapiReferenceCurve,
-        "longsor": LongsorReferenceCurve
+    # Urutan key mengikuti respons lama: gempa, banjir, gunungberapi, longsor.
+    # Data diambil dari registry (sudah dikelompokkan per tipe_kurva, urut x),
+    # bukan query ORM per request.
+    return {disaster: curve_registry.get_grouped(disaster) for disaster in CURVE_SOURCES}
+
+def _sample_spline(curve, x_ref, samples):
+    """Render kurva (spline registry) pada `samples` titik rata di domain x."""
+    xs = np.linspace(min(x_ref), max(x_ref), samples)
+    ys = curve(xs)
+    return {
+        "x": np.round(xs, 6).tolist(),
+        "y": [None if np.isnan(v) else round(float(v), 6) for v in ys],
     }
 
-    all_curves = {}
-    for disaster, Model in mapping.items():
-        # ambil semua baris, sort dulu by tipe_kurva lalu by x
-        rows = Model.query.order_by(Model.tipe_kurva, Model.x).all()
+def build_disaster_curves_document(samples=0):
+    """
+    Dokumen JSON /api/disaster-curves. Jika samples > 0, tiap tipe kurva
+    mendapat tambahan key "spline" berisi rendering rapat untuk plotting halus.
+    """
+    data = get_all_disaster_curves()
+    if not samples:
+        return data
+
+    dense = {}
+    for disaster, grouped in data.items():
+        dense[disaster] = {}
+        for tipe, ref in grouped.items():
+            item = dict(ref)
+            curve = curve_registry.curve_for(disaster, tipe)
+            if curve is not None and ref["x"]:
+                item["spline"] = _sample_spline(curve, ref["x"], samples)
+            dense[disaster][tipe] = item
+    return dense
 
-        # kelompokkan per tipe_kurva
-        grouped = {}
-        for row in rows:
-            t = row.tipe_kurva
-            if t not in grouped:
-                grouped[t] = {"x": [], "y": []}
-            grouped[t]["x"].append(row.x)
-            grouped[t]["y"].append(row.y)
+def get_disaster_curves_document(samples=0):
+    """
+    (body, etag) yang sudah diserialisasi. Dibangun ulang hanya jika version
+    registry berubah (tabel referensi berubah); selain itu dipakai ulang apa adanya.
+    Hanya MAX_CACHED_DOCUMENTS nilai samples terakhir yang disimpan.
+    """
+    versions = curve_registry.version()
+    with _documents_lock:
+        cached = _documents.get(samples)
+        if cached and cached[0] == versions:
+            _documents.move_to_end(samples)
+            return cached[1], cached[2]
 
-        all_curves[disaster] = grouped
+    doc = build_disaster_curves_document(samples)
+    body = json.dumps(doc, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    etag = hashlib.sha256(body).hexdigest()
 
-    return all_curves
+    with _documents_lock:
+        _documents[samples] = (versions, body, etag)
+        _documents.move_to_end(samples)
+        while len(_documents) > MAX_CACHED_DOCUMENTS:
+            _documents.popitem(last=False)
+    return body, etag
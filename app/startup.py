@@ -0,0 +1,170 @@
+# app/startup.py
+
+import os
+import sys
+import time
+import logging
+import threading
+from importlib import import_module
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Modul berat yang seharusnya TIDAK ikut ter-import saat worker baru start
+HEAVY_MODULES = ["geopandas", "rasterio", "scipy", "mapclassify", "shapely", "requests", "pandas"]
+
+
+class LazyView:
+    """
+    View function yang baru meng-import modul controller saat request pertama
+    (pola "Lazy Loading Views" Flask). Format import_name: "paket.modul:Objek.atribut".
+    Dengan begini daftar URL tetap terdaftar saat start, tapi geopandas/rasterio/scipy
+    dsb. hanya dimuat oleh worker yang memang melayani endpoint tersebut.
+    """
+
+    def __init__(self, import_name):
+        self.import_name = import_name
+        self.__name__ = import_name.rsplit(".", 1)[-1].rsplit(":", 1)[-1]
+        self._view = None
+        self._lock = threading.Lock()
+
+    @property
+    def view(self):
+        if self._view is None:
+            with self._lock:
+                if self._view is None:
+                    module_name, _, attr_path = self.import_name.partition(":")
+                    obj = import_module(module_name)
+                    for attr in attr_path.split("."):
+                        obj = getattr(obj, attr)
+                    self._view = obj
+        return self._view
+
+    def __call__(self, *args, **kwargs):
+        return self.view(*args, **kwargs)
+
+
+def current_rss_mb():
+    """RSS proses saat ini dalam MB (None jika tidak bisa diukur di platform ini)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil  # opsional, untuk Windows/macOS
+        return round(psutil.Process().memory_info().rss / (1024 * 1024), 1)
+    except ImportError:
+        pass
+    try:
+        import resource  # fallback: peak RSS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:
+        return None
+
+
+def available_memory_mb():
+    """Memori yang masih tersedia di host (MB), None jika tidak bisa diukur."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except (OSError, ValueError):
+        pass
+    try:
+        import psutil
+        return round(psutil.virtual_memory().available / (1024 * 1024), 1)
+    except ImportError:
+        return None
+
+
+def loaded_heavy_modules():
+    return [m for m in HEAVY_MODULES if m in sys.modules]
+
+
+class WarmUpState:
+    """Status warm-up background; dibaca oleh endpoint readiness."""
+
+    def __init__(self):
+        self.ready = False
+        self.started_at = time.time()
+        self.startup_ms = None
+        self.warm_up_ms = None
+        self.errors = []
+        self.tasks = []
+
+    def to_dict(self):
+        return {
+            "status": "ready" if self.ready else "warming_up",
+            "startup_ms": self.startup_ms,
+            "warm_up_ms": self.warm_up_ms,
+            "tasks": self.tasks,
+            "errors": self.errors,
+            "rss_mb": current_rss_mb(),
+            "heavy_modules_loaded": loaded_heavy_modules(),
+        }
+
+
+def _check_db_connection():
+    from app.extensions import db
+    db.session.execute(text("SELECT 1"))
+    logger.info("✅ Database connected successfully")
+
+
+def _warm_curve_registry():
+    from app.service.service_kurva_registry import curve_registry
+    from app.service.service_visualisasi_kurva import get_disaster_curves_document
+    curve_registry.warm_up()
+    get_disaster_curves_document()
+    logger.info("✅ Reference curves loaded into registry")
+
+
+# Urutan tugas warm-up; modul lain boleh menambah lewat register_warm_up_task
+WARM_UP_TASKS = [
+    ("db_connection", _check_db_connection),
+    ("curve_registry", _warm_curve_registry),
+]
+
+
+def register_warm_up_task(name, func):
+    WARM_UP_TASKS.append((name, func))
+
+
+def _run_warm_up(app, state):
+    t0 = time.perf_counter()
+    with app.app_context():
+        from app.extensions import db
+        for name, func in WARM_UP_TASKS:
+            t_task = time.perf_counter()
+            try:
+                func()
+                status = "ok"
+            except Exception as e:
+                logger.error(f"❌ Warm-up '{name}' gagal: {e}")
+                state.errors.append({"task": name, "message": str(e)})
+                db.session.rollback()
+                status = "error"
+            state.tasks.append({
+                "task": name,
+                "status": status,
+                "ms": round((time.perf_counter() - t_task) * 1000, 1),
+            })
+        db.session.remove()
+    state.warm_up_ms = round((time.perf_counter() - t0) * 1000, 1)
+    state.ready = True
+    logger.info(f"✅ Warm-up selesai dalam {state.warm_up_ms} ms (RSS {current_rss_mb()} MB)")
+
+
+def start_warm_up(app, background=True):
+    """Jalankan warm-up (cek DB, muat kurva, dsb.) di thread background."""
+    state = app.extensions["warm_up"]
+    if not background:
+        _run_warm_up(app, state)
+        return None
+    thread = threading.Thread(target=_run_warm_up, args=(app, state), name="warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,216 @@
+"""
+Bandingkan publish GeoServer lama (request satu-satu tanpa session) dengan
+GeoServerPublisher, memakai stub REST server lokal pengganti GeoServer.
+
+Stub menerima PUT/POST /rest/... , menahan setiap request `--latency` ms, dan
+mengembalikan 503 acak dengan peluang `--fail-rate` (seed tetap) untuk menguji retry.
+Dicatat per mode:
+  - seconds     : waktu total
+  - requests    : jumlah request yang diterima stub (termasuk retry)
+  - connections : jumlah koneksi TCP baru (keep-alive → jauh lebih sedikit)
+  - errors      : layer yang gagal
+  - skipped     : layer yang dilewati karena tidak berubah
+
+Contoh:
+    python benchmarks/bench_geoserver_publish.py --layers 11 --size 1500
+    python benchmarks/bench_geoserver_publish.py --latency 100 --fail-rate 0.1 --workers 8
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+from requests.auth import HTTPBasicAuth
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+class StubState:
+    def __init__(self, latency, fail_rate, seed):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.styles = set()
+
+    def reset_counters(self):
+        with self.lock:
+            self.requests = 0
+            self.connections = 0
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            with state.lock:
+                state.connections += 1
+
+        def log_message(self, *args):
+            pass
+
+        def _read_body(self):
+            if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                while True:
+                    size = int(self.rfile.readline().strip() or b"0", 16)
+                    self.rfile.read(size + 2)
+                    if size == 0:
+                        break
+            else:
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        def _reply(self, code, text=""):
+            body = text.encode()
+            self.send_response(code)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _handle(self):
+            self._read_body()
+            with state.lock:
+                state.requests += 1
+                fail = state.rng.random() < state.fail_rate
+            time.sleep(state.latency)
+            if fail:
+                return self._reply(503, "stub: service unavailable")
+            if self.command == "POST" and "/rest/styles" in self.path:
+                name = self.path.split("name=")[-1]
+                with state.lock:
+                    exists = name in state.styles
+                    state.styles.add(name)
+                if exists:
+                    return self._reply(403, f"Style '{name}' already exists")
+                return self._reply(201)
+            self._reply(200 if self.command == "PUT" else 201)
+
+        do_PUT = do_POST = do_GET = _handle
+
+    return Handler
+
+
+def make_rasters(folder, layers, size, seed):
+    """GeoTIFF float32 sintetis (nilai ≥ 0 dengan sebagian nodata)."""
+    import rasterio
+    from rasterio.transform import from_origin
+
+    rng = np.random.default_rng(seed)
+    items = []
+    for i in range(layers):
+        data = rng.gamma(2.0, 1.5, (size, size)).astype("float32")
+        data[:, : size // 5] = -9999.0
+        path = os.path.join(folder, f"bench_l{i}_clipped.tif")
+        with rasterio.open(
+            path, "w", driver="GTiff", height=size, width=size, count=1, dtype="float32",
+            crs="EPSG:4326", transform=from_origin(95.0, 6.0, 0.01, 0.01), nodata=-9999.0,
+            tiled=True, compress="DEFLATE",
+        ) as dst:
+            dst.write(data, 1)
+        items.append(("bench", f"l{i}", path))
+    return items
+
+
+def publish_legacy(url, workspace, items):
+    """Perilaku lama: request satu-satu tanpa session/keep-alive/retry."""
+    from app.geoserver_register import compute_breaks, make_sld, raster_scale_offset
+
+    auth = HTTPBasicAuth("admin", "geoserver")
+    errors = 0
+    for bencana, kolom, path in items:
+        layer = f"hazard_{bencana}_{kolom}"
+        style = f"{layer}_jb"
+        with open(path, "rb") as f:
+            r = requests.put(
+                f"{url}/rest/workspaces/{workspace}/coveragestores/{layer}/file.geotiff"
+                f"?configure=all&coverageName={layer}",
+                data=f, auth=auth, headers={"Content-Type": "image/tiff"},
+            )
+        if r.status_code not in (200, 201):
+            errors += 1
+            continue
+        sld = make_sld(layer, compute_breaks(path, k=5), *raster_scale_offset(path)).encode()
+        headers = {"Content-Type": "application/vnd.ogc.sld+xml"}
+        r1 = requests.post(f"{url}/rest/styles", params={"name": style}, data=sld, auth=auth, headers=headers)
+        if r1.status_code == 403 and "already exists" in r1.text:
+            r1 = requests.put(f"{url}/rest/styles/{style}", data=sld, auth=auth, headers=headers)
+        r2 = requests.put(
+            f"{url}/rest/layers/{workspace}:{layer}",
+            data=f"<layer><defaultStyle><name>{style}</name></defaultStyle></layer>",
+            auth=auth, headers={"Content-Type": "application/xml"},
+        )
+        if r1.status_code not in (200, 201) or r2.status_code not in (200, 201):
+            errors += 1
+    return {"errors": errors, "skipped": 0}
+
+
+def publish_pooled(url, workspace, items, workers, state_file):
+    from app.geoserver_register import GeoServerPublisher
+
+    publisher = GeoServerPublisher(url=url, workspace=workspace, workers=workers,
+                                   backoff=0.05, state_file=state_file)
+    try:
+        recs = publisher.publish_many(items)
+    finally:
+        publisher.close()
+    return {
+        "errors": sum(r["status"] == "error" for r in recs),
+        "skipped": sum(r["status"] == "skipped" for r in recs),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--layers", type=int, default=11, help="jumlah layer (default 11 = semua kolom hazard)")
+    parser.add_argument("--size", type=int, default=1000, help="ukuran raster sintetis (piksel per sisi)")
+    parser.add_argument("--latency", type=float, default=50, help="latensi stub per request (ms)")
+    parser.add_argument("--fail-rate", type=float, default=0.05, help="peluang stub membalas 503")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    from app.geoserver_register import compute_breaks
+
+    folder = tempfile.mkdtemp(prefix="bench_geoserver_")
+    state = StubState(args.latency / 1000.0, args.fail_rate, args.seed)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/geoserver"
+    state_file = os.path.join(folder, "publish_state.json")
+
+    try:
+        items = make_rasters(folder, args.layers, args.size, args.seed)
+        for _, _, path in items:
+            compute_breaks(path)  # statistik/breaks disiapkan dulu agar semua mode setara
+
+        runs = [
+            ("legacy", lambda: publish_legacy(url, "ne", items)),
+            ("pooled", lambda: publish_pooled(url, "ne", items, args.workers, state_file)),
+            ("pooled-unchanged", lambda: publish_pooled(url, "ne", items, args.workers, state_file)),
+        ]
+        print(f"{'mode':>17} {'seconds':>8} {'requests':>9} {'connections':>12} {'errors':>7} {'skipped':>8}")
+        for name, fn in runs:
+            state.reset_counters()
+            t0 = time.perf_counter()
+            res = fn()
+            elapsed = time.perf_counter() - t0
+            print(f"{name:>17} {elapsed:8.2f} {state.requests:9d} {state.connections:12d} "
+                  f"{res['errors']:7d} {res['skipped']:8d}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
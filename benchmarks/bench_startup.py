@@ -0,0 +1,78 @@
+"""
+Ukur cold-start create_app() dan RSS per worker.
+
+Setiap run memakai proses Python baru (seperti worker gunicorn yang baru
+di-spawn), lalu mencatat:
+  - import_ms    : waktu `import app`
+  - create_ms    : waktu create_app() sampai siap menerima request
+  - ready_ms     : waktu sampai warm-up background selesai (opsional, butuh DB)
+  - rss_mb       : RSS setelah create_app()
+  - heavy_modules: modul berat yang sudah ter-import
+
+Contoh:
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --runs 3 --wait-ready --hit /api/bangunan
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import app as app_pkg
+t1 = time.perf_counter()
+from app.startup import current_rss_mb, loaded_heavy_modules
+application = app_pkg.create_app(warm_up={warm})
+t2 = time.perf_counter()
+state = application.extensions['warm_up']
+while {wait} and not state.ready:
+    time.sleep(0.01)
+t3 = time.perf_counter()
+hit = {hit!r}
+status = None
+if hit:
+    status = application.test_client().get(hit).status_code
+print(json.dumps({{
+    "import_ms": round((t1 - t0) * 1000, 1),
+    "create_ms": round((t2 - t1) * 1000, 1),
+    "ready_ms": round((t3 - t1) * 1000, 1) if {wait} else None,
+    "rss_mb": current_rss_mb(),
+    "heavy_modules": loaded_heavy_modules(),
+    "hit_status": status,
+}}))
+"""
+
+
+def run_once(wait_ready, hit):
+    code = CHILD.format(warm=wait_ready, wait=wait_ready, hit=hit)
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--wait-ready", action="store_true", help="tunggu warm-up selesai (butuh DB)")
+    parser.add_argument("--hit", default="", help="URL yang di-request setelah start, mis. /api/bangunan")
+    args = parser.parse_args()
+
+    results = [run_once(args.wait_ready, args.hit) for _ in range(args.runs)]
+    for i, r in enumerate(results, 1):
+        print(f"run {i}: {json.dumps(r)}")
+
+    for key in ("import_ms", "create_ms", "ready_ms", "rss_mb"):
+        vals = [r[key] for r in results if r[key] is not None]
+        if vals:
+            print(f"{key:>10}: median {statistics.median(vals):.1f}  min {min(vals):.1f}  max {max(vals):.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Tabel cache clip_boundary (union provinsi + mask daratan per grid)
+
+Revision ID: 3c1f0a9d2b7e
+Revises: 7201c9b561ab
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import geoalchemy2
+
+
+# revision identifiers, used by Alembic.
+revision = '3c1f0a9d2b7e'
+down_revision = '7201c9b561ab'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'clip_boundary',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('provinsi_fingerprint', sa.String(length=64), nullable=False),
+        sa.Column('pixel_size', sa.Float(), nullable=False),
+        sa.Column('minx', sa.Float(), nullable=False),
+        sa.Column('miny', sa.Float(), nullable=False),
+        sa.Column('maxx', sa.Float(), nullable=False),
+        sa.Column('maxy', sa.Float(), nullable=False),
+        sa.Column('width', sa.Integer(), nullable=False),
+        sa.Column('height', sa.Integer(), nullable=False),
+        sa.Column('mask_path', sa.String(length=512), nullable=False),
+        sa.Column('geom', geoalchemy2.types.Geometry(geometry_type='GEOMETRY', srid=4326), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('provinsi_fingerprint', 'pixel_size', name='uq_clip_boundary_grid'),
+    )
+    with op.batch_alter_table('clip_boundary', schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f('ix_clip_boundary_provinsi_fingerprint'), ['provinsi_fingerprint'], unique=False
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('clip_boundary', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_clip_boundary_provinsi_fingerprint'))
+
+    op.drop_table('clip_boundary')
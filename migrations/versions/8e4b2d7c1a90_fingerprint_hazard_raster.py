@@ -0,0 +1,41 @@
+"""Fingerprint input pada hazard_raster (skip regenerasi jika tidak berubah)
+
+Revision ID: 8e4b2d7c1a90
+Revises: 3c1f0a9d2b7e
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4b2d7c1a90'
+down_revision = '3c1f0a9d2b7e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # hazard_raster dibuat di luar migrasi; pastikan ada sebelum ditambah kolom
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS hazard_raster (
+            id SERIAL PRIMARY KEY,
+            bencana VARCHAR(50),
+            kolom VARCHAR(50),
+            rast raster
+        )
+    """)
+    op.execute("ALTER TABLE hazard_raster ADD COLUMN IF NOT EXISTS fingerprint VARCHAR(64)")
+    op.execute("ALTER TABLE hazard_raster ADD COLUMN IF NOT EXISTS file_path VARCHAR(512)")
+    op.execute("ALTER TABLE hazard_raster ADD COLUMN IF NOT EXISTS created_at TIMESTAMP DEFAULT now()")
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_hazard_raster_lookup
+        ON hazard_raster (bencana, kolom, fingerprint)
+    """)
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_hazard_raster_lookup")
+    op.execute("ALTER TABLE hazard_raster DROP COLUMN IF EXISTS created_at")
+    op.execute("ALTER TABLE hazard_raster DROP COLUMN IF EXISTS file_path")
+    op.execute("ALTER TABLE hazard_raster DROP COLUMN IF EXISTS fingerprint")
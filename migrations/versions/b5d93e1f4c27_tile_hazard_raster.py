@@ -0,0 +1,49 @@
+"""Simpan hazard_raster sebagai tile (hazard_raster_tile) + flag active
+
+Revision ID: b5d93e1f4c27
+Revises: 8e4b2d7c1a90
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d93e1f4c27'
+down_revision = '8e4b2d7c1a90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Baris hazard_raster jadi metadata/versi; pixel disimpan per tile
+    op.execute("ALTER TABLE hazard_raster ALTER COLUMN rast DROP NOT NULL")
+    op.execute("ALTER TABLE hazard_raster ADD COLUMN IF NOT EXISTS active BOOLEAN NOT NULL DEFAULT true")
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_hazard_raster_active
+        ON hazard_raster (bencana, kolom) WHERE active
+    """)
+
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS hazard_raster_tile (
+            id BIGSERIAL PRIMARY KEY,
+            raster_id INTEGER NOT NULL REFERENCES hazard_raster (id) ON DELETE CASCADE,
+            tile_row INTEGER NOT NULL,
+            tile_col INTEGER NOT NULL,
+            rast raster NOT NULL
+        )
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_hazard_raster_tile_raster
+        ON hazard_raster_tile (raster_id)
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_hazard_raster_tile_extent
+        ON hazard_raster_tile USING gist (ST_ConvexHull(rast))
+    """)
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS hazard_raster_tile")
+    op.execute("DROP INDEX IF EXISTS ix_hazard_raster_active")
+    op.execute("ALTER TABLE hazard_raster DROP COLUMN IF EXISTS active")
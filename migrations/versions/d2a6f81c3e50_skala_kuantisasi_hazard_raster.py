@@ -0,0 +1,26 @@
+"""Skala & offset kuantisasi pada hazard_raster
+
+Revision ID: d2a6f81c3e50
+Revises: b5d93e1f4c27
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a6f81c3e50'
+down_revision = 'b5d93e1f4c27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # NULL = tile float32; terisi = tile berisi kode 16BUI (nilai = kode × scale + offset)
+    op.execute("ALTER TABLE hazard_raster ADD COLUMN IF NOT EXISTS value_scale DOUBLE PRECISION")
+    op.execute("ALTER TABLE hazard_raster ADD COLUMN IF NOT EXISTS value_offset DOUBLE PRECISION")
+
+
+def downgrade():
+    op.execute("ALTER TABLE hazard_raster DROP COLUMN IF EXISTS value_offset")
+    op.execute("ALTER TABLE hazard_raster DROP COLUMN IF EXISTS value_scale")
@@ -0,0 +1,62 @@
+"""Tabel buffer hazard termaterialisasi (per bencana, per level toleransi simplify)
+
+Revision ID: e7c4a2b9d813
+Revises: d2a6f81c3e50
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7c4a2b9d813'
+down_revision = 'd2a6f81c3e50'
+branch_labels = None
+depends_on = None
+
+# bencana → kolom intensitas (sama dengan TYPE_CFG repo_buffer_hazard)
+BUFFER_TABLES = {
+    'gempa': ['mmi_500', 'mmi_250', 'mmi_100'],
+    'banjir': ['depth_100', 'depth_50', 'depth_25'],
+    'longsor': ['mflux_5', 'mflux_2'],
+    'gunungberapi': ['kpa_250', 'kpa_100', 'kpa_50'],
+}
+
+
+def upgrade():
+    # GiST gabungan (level, geom) butuh btree_gist
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+
+    for dtype, fields in BUFFER_TABLES.items():
+        columns = "".join(f"{f} DOUBLE PRECISION, " for f in fields)
+        op.execute(f"""
+            CREATE TABLE IF NOT EXISTS hazard_buffer_{dtype} (
+                id BIGSERIAL PRIMARY KEY,
+                level SMALLINT NOT NULL,
+                tol DOUBLE PRECISION NOT NULL,
+                {columns}
+                geom geometry(Geometry, 4326) NOT NULL
+            )
+        """)
+        op.execute(f"""
+            CREATE INDEX IF NOT EXISTS ix_hazard_buffer_{dtype}_level_geom
+            ON hazard_buffer_{dtype} USING gist (level, geom)
+        """)
+
+    # Versi isi tabel buffer: fingerprint model_intensitas_* + parameter buffer saat refresh
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS hazard_buffer_state (
+            dtype VARCHAR(32) PRIMARY KEY,
+            fingerprint VARCHAR(128) NOT NULL,
+            tolerances DOUBLE PRECISION[] NOT NULL,
+            buffer_deg DOUBLE PRECISION NOT NULL,
+            n_rows INTEGER NOT NULL DEFAULT 0,
+            refreshed_at TIMESTAMP NOT NULL DEFAULT now()
+        )
+    """)
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS hazard_buffer_state")
+    for dtype in BUFFER_TABLES:
+        op.execute(f"DROP TABLE IF EXISTS hazard_buffer_{dtype}")